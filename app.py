@@ -6,12 +6,17 @@ OpenStreetMap Integration with Gelbe Seiten data
 import streamlit as st
 import folium
 from streamlit_folium import st_folium
-import sqlite3
-import json
-from pathlib import Path
+import os
+import numpy as np
 import pandas as pd
 from folium.plugins import Fullscreen
 
+from backend import search_engine, clustering, facets, geo
+from backend.column_store import BusinessStore, ENV_FLAG as COLUMN_STORE_FLAG
+from backend.db import ConnectionPool, DEFAULT_DB_PATH, WARM_UP_ENV
+from backend.map_layers import LazyPopupMarkers
+from backend.query_cache import QueryCache, make_key
+
 # Page configuration
 st.set_page_config(
     page_title="Berlin Business Finder",
@@ -28,6 +33,7 @@ TRANSLATIONS = {
         'search_filters': '🔍 Search & Filters',
         'businesses': 'Businesses',
         'with_coordinates': 'With Coordinates',
+        'warmed_up': 'Database warmed up in {seconds:.2f} s ({size} MB)',
         'business_name': 'Business Name',
         'search_placeholder': 'e.g. Hairdresser, Restaurant...',
         'category': 'Category',
@@ -51,6 +57,10 @@ TRANSLATIONS = {
         'language': '🌐 Language',
         'fullscreen_map': '🔍 View Fullscreen Map',
         'exit_fullscreen': '❌ Exit Fullscreen',
+        'search_in_view': '🗺️ Only visible map area',
+        'show_all': '🗺️ Show all businesses (clustered)',
+        'cluster_tooltip': '{count} businesses - zoom in for details',
+        'showing_clusters': '📊 Showing {count} businesses in {clusters} clusters',
     },
     'de': {
         'title': '🗺️ Berlin Business Finder',
@@ -58,6 +68,7 @@ TRANSLATIONS = {
         'search_filters': '🔍 Suche & Filter',
         'businesses': 'Unternehmen',
         'with_coordinates': 'Mit Koordinaten',
+        'warmed_up': 'Datenbank in {seconds:.2f} s vorgewärmt ({size} MB)',
         'business_name': 'Unternehmensname',
         'search_placeholder': 'z.B. Friseur, Restaurant...',
         'category': 'Kategorie',
@@ -81,6 +92,10 @@ TRANSLATIONS = {
         'language': '🌐 Sprache',
         'fullscreen_map': '🔍 Vollbild Karte',
         'exit_fullscreen': '❌ Vollbild beenden',
+        'search_in_view': '🗺️ Nur sichtbarer Kartenausschnitt',
+        'show_all': '🗺️ Alle Unternehmen anzeigen (gruppiert)',
+        'cluster_tooltip': '{count} Unternehmen - für Details hineinzoomen',
+        'showing_clusters': '📊 Zeige {count} Unternehmen in {clusters} Gruppen',
     }
 }
 
@@ -91,6 +106,20 @@ if 'language' not in st.session_state:
 if 'fullscreen' not in st.session_state:
     st.session_state.fullscreen = False
 
+# Initial map view (Berlin center)
+DEFAULT_MAP_VIEW = {'lat': 52.5200, 'lon': 13.4050, 'zoom': 11}
+
+# Viewport assumed when fitting the map to search results (the map is 600px
+# high and at least this wide on desktop); a single result is shown at street level
+MAP_FIT_VIEWPORT_PX = (800, 600)
+MAP_FIT_MAX_ZOOM = 16
+
+# Cap for individual markers in the overview when zoomed in past the clusters
+OVERVIEW_MAX_MARKERS = 500
+
+# Read-only connections shared by all sessions (one per concurrently running query)
+CONNECTION_POOL_SIZE = 8
+
 def t(key):
     """Get translation for current language"""
     return TRANSLATIONS[st.session_state.language].get(key, key)
@@ -212,112 +241,163 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Database connection
+# Database connections
 @st.cache_resource
-def get_database_connection():
-    """Create and cache database connection"""
-    db_path = Path('backend/data/berlin_businesses.db')
-    if not db_path.exists():
-        st.error(f"Database not found at {db_path}. Please run the data processing scripts first.")
+def get_connection_pool():
+    """Create the pool of read-only connections shared by all sessions
+
+    With BERLIN_WARM_UP=indexes (or all) the database is pre-read into the
+    page cache here, so the first search is as fast as later ones.
+    """
+    if not DEFAULT_DB_PATH.exists():
+        st.error(f"Database not found at {DEFAULT_DB_PATH}. Please run the data processing scripts first.")
         st.stop()
-    return sqlite3.connect(db_path, check_same_thread=False)
+    return ConnectionPool(
+        DEFAULT_DB_PATH, size=CONNECTION_POOL_SIZE, warm_up=os.environ.get(WARM_UP_ENV) or None
+    )
+
+def database_connection():
+    """Check out a pooled connection for a with-block"""
+    return get_connection_pool().connection()
+
+@st.cache_resource
+def get_query_cache():
+    """Create the query result cache shared by all sessions"""
+    return QueryCache()
+
+def cached_query(key, compute):
+    """Run compute(conn) on a pooled connection through the shared query cache
+
+    The cache empties itself when statistics.last_updated changes, so a
+    rebuilt or updated database is picked up without restarting the app.
+    """
+    with database_connection() as conn:
+        return get_query_cache().get_or_compute(conn, key, lambda: compute(conn))
 
-@st.cache_data
 def get_statistics():
     """Get database statistics"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
+    return cached_query(make_key('statistics'), search_engine.get_statistics)
+
+def get_all_categories():
+    """Get all categories as (id, name) tuples"""
+    return cached_query(make_key('categories'), search_engine.get_categories)
+
+def get_all_cities():
+    """Get all unique cities"""
+    return cached_query(make_key('cities'), search_engine.get_cities)
+
+def get_facet_counts(search_term="", category_id=None, city=""):
+    """Business counts per category, city and district for the current filters"""
+    return cached_query(
+        make_key('facets', search_term, category_id, city),
+        lambda conn: facets.get_facet_counts(conn, search_term, category_id, city)
+    )
+
+@st.cache_resource(max_entries=1)
+def load_business_store(version):
+    """Load the column store for one database version"""
+    with database_connection() as conn:
+        return BusinessStore.from_connection(conn)
+
+def get_business_store():
+    """Load the in-process column store if BERLIN_COLUMN_STORE=1, else None"""
+    if os.environ.get(COLUMN_STORE_FLAG) != '1':
+        return None
+    query_cache = get_query_cache()
+    with database_connection() as conn:
+        query_cache.check_version(conn)
+    return load_business_store(query_cache.version)
+
+def search_businesses(search_term="", category_id=None, city="", limit=100):
+    """Search businesses with filters (full-text ranked via businesses_fts)"""
+    store = get_business_store()
     
-    stats = {}
-    cursor.execute('SELECT key, value FROM statistics')
-    for key, value in cursor.fetchall():
-        stats[key] = value
+    def compute(conn):
+        if store is not None:
+            return store.search(conn, search_term, category_id, city, limit=limit)
+        return search_engine.search_businesses(conn, search_term, category_id, city, limit)
     
-    return stats
+    return cached_query(make_key('search', search_term, category_id, city, limit), compute)
 
-@st.cache_data
-def get_all_categories():
-    """Get all unique categories"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
+def bounds_to_bbox(bounds):
+    """Convert Leaflet map bounds (as returned by st_folium) to a bbox tuple"""
+    south_west, north_east = bounds['_southWest'], bounds['_northEast']
+    return south_west['lat'], south_west['lng'], north_east['lat'], north_east['lng']
+
+def search_in_bounds(bounds, search_term="", category_id=None, city="", limit=100):
+    """Search businesses inside the visible map bounds"""
+    store = get_business_store()
+    bbox = bounds_to_bbox(bounds)
     
-    cursor.execute('SELECT DISTINCT categories FROM businesses WHERE categories IS NOT NULL')
-    categories_set = set()
+    def compute(conn):
+        if store is not None:
+            return store.search(conn, search_term, category_id, city, bbox, limit)
+        return search_engine.search_in_bbox(conn, *bbox, search_term, category_id, city, limit)
     
-    for row in cursor.fetchall():
-        try:
-            cats = json.loads(row[0])
-            categories_set.update(cats)
-        except:
-            pass
+    return cached_query(make_key('bbox', search_term, category_id, city, limit, bbox), compute)
+
+def get_overview_markers(zoom, bounds=None):
+    """Get (clusters, businesses) for the clustered whole-dataset map
+
+    Multi-business clusters come precomputed from map_clusters; single
+    businesses, and everything past the last cluster zoom, are returned as
+    regular businesses.
+    """
+    bbox = bounds_to_bbox(bounds) if bounds else None
+    
+    with database_connection() as conn:
+        if zoom > clustering.MAX_CLUSTER_ZOOM and bbox:
+            return [], search_engine.search_in_bbox(conn, *bbox, limit=OVERVIEW_MAX_MARKERS)
+        
+        clusters = clustering.get_clusters(conn, zoom, bbox)
+        single_ids = [c['business_id'] for c in clusters if c['count'] == 1]
+        businesses = search_engine.get_businesses_by_ids(conn, single_ids)
+    return [c for c in clusters if c['count'] > 1], businesses
+
+def remember_map_view(map_state):
+    """Keep the last visible map bounds, center and zoom
+
+    Returns True if the view changed since the previous run.
+    """
+    map_state = map_state or {}
+    bounds = map_state.get('bounds') or {}
+    south_west = bounds.get('_southWest') or {}
+    if south_west.get('lat') is None:
+        return False
+    
+    center = map_state.get('center') or {}
+    view = {
+        'lat': center.get('lat', DEFAULT_MAP_VIEW['lat']),
+        'lon': center.get('lng', DEFAULT_MAP_VIEW['lon']),
+        'zoom': map_state.get('zoom') or DEFAULT_MAP_VIEW['zoom']
+    }
     
-    return sorted(list(categories_set))
+    changed = (
+        st.session_state.get('map_view') != view
+        or st.session_state.get('map_bounds') != bounds
+    )
+    st.session_state.map_bounds = bounds
+    st.session_state.map_view = view
+    return changed
 
-@st.cache_data
-def get_all_cities():
-    """Get all unique cities"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT DISTINCT city FROM businesses ORDER BY city')
-    cities = [row[0] for row in cursor.fetchall() if row[0]]
-    
-    return cities
-
-def search_businesses(search_term="", category="", city="", limit=100):
-    """Search businesses with filters"""
-    conn = get_database_connection()
-    cursor = conn.cursor()
-    
-    query = '''
-        SELECT id, name, postal_code, city, lat, lon, categories, 
-               street_address, district, phone, email, website
-        FROM businesses
-        WHERE lat IS NOT NULL
-    '''
-    params = []
-    
-    # Add search filter
-    if search_term:
-        query += ' AND name LIKE ?'
-        params.append(f'%{search_term}%')
-    
-    # Add category filter
-    if category:
-        query += ' AND categories LIKE ?'
-        params.append(f'%{category}%')
-    
-    # Add city filter
-    if city:
-        query += ' AND city = ?'
-        params.append(city)
-    
-    query += ' LIMIT ?'
-    params.append(limit)
-    
-    cursor.execute(query, params)
-    
-    businesses = []
-    for row in cursor.fetchall():
-        businesses.append({
-            'id': row[0],
-            'name': row[1],
-            'postal_code': row[2],
-            'city': row[3],
-            'lat': row[4],
-            'lon': row[5],
-            'categories': json.loads(row[6]) if row[6] else [],
-            'street_address': row[7],
-            'district': row[8],
-            'phone': row[9],
-            'email': row[10],
-            'website': row[11]
-        })
-    
-    return businesses
-
-def create_map(businesses, center_lat=52.5200, center_lon=13.4050, zoom=11):
-    """Create Folium map with business markers and fullscreen capability"""
+def fit_map_to_businesses(businesses):
+    """Map (center_lat, center_lon, zoom) showing every business"""
+    lats = np.fromiter((b['lat'] for b in businesses), dtype=np.float64, count=len(businesses))
+    lons = np.fromiter((b['lon'] for b in businesses), dtype=np.float64, count=len(businesses))
+    bbox = geo.points_bbox(lats, lons)
+    if bbox is None:
+        return DEFAULT_MAP_VIEW['lat'], DEFAULT_MAP_VIEW['lon'], DEFAULT_MAP_VIEW['zoom']
+    return geo.fit_bounds(bbox, *MAP_FIT_VIEWPORT_PX, max_zoom=MAP_FIT_MAX_ZOOM)
+
+def create_map(businesses, center_lat=52.5200, center_lon=13.4050, zoom=11, clusters=None,
+               lazy_popups=True):
+    """Create Folium map with business markers and fullscreen capability
+
+    clusters are optional aggregated markers (see backend/clustering.py)
+    drawn in addition to the individual businesses. With lazy_popups the
+    markers only carry a compact data row and popups are rendered on click;
+    otherwise every marker embeds its full popup HTML.
+    """
     
     # Create base map
     m = folium.Map(
@@ -335,7 +415,31 @@ def create_map(businesses, center_lat=52.5200, center_lon=13.4050, zoom=11):
         force_separate_button=True
     ).add_to(m)
     
-    # Add markers for businesses
+    # Add aggregated cluster markers
+    for cluster in clusters or []:
+        size = 32 + 6 * len(str(cluster['count']))
+        folium.Marker(
+            location=[cluster['lat'], cluster['lon']],
+            tooltip=t('cluster_tooltip').format(count=f"{cluster['count']:,}"),
+            icon=folium.DivIcon(
+                icon_size=(size, size),
+                icon_anchor=(size // 2, size // 2),
+                html=f'''
+                <div style="width:{size}px;height:{size}px;line-height:{size}px;border-radius:50%;
+                            background:rgba(255,215,0,0.85);border:3px solid #FFC107;
+                            text-align:center;font-weight:700;font-size:13px;color:#333;">
+                    {cluster['count']:,}
+                </div>
+                '''
+            )
+        ).add_to(m)
+    
+    # Add markers for businesses (popups rendered in the browser on click)
+    if lazy_popups:
+        LazyPopupMarkers(businesses).add_to(m)
+        return m
+    
+    # Add markers for businesses (eager popups)
     for business in businesses:
         # Create enhanced popup content
         categories_html = ''.join([
@@ -481,6 +585,12 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
+    warm_up_stats = get_connection_pool().warm_up_stats
+    if warm_up_stats:
+        st.sidebar.caption(t('warmed_up').format(
+            seconds=warm_up_stats['seconds'], size=round(warm_up_stats['bytes'] / 1024 / 1024)
+        ))
+    
     st.sidebar.markdown("---")
     
     # Search input
@@ -489,21 +599,37 @@ def main():
         placeholder=t('search_placeholder')
     )
     
+    # Counts next to each option, under the other filter's current value
+    facet_counts = get_facet_counts(
+        search_term,
+        st.session_state.get('category_filter'),
+        st.session_state.get('city_filter') or ""
+    )
+    
     # Category filter
-    all_categories = get_all_categories()
-    category = st.sidebar.selectbox(
+    category_labels = {
+        cat_id: f"{name} ({facet_counts['categories'].get(cat_id, 0):,})"
+        for cat_id, name in get_all_categories()
+    }
+    category_id = st.sidebar.selectbox(
         t('category'),
-        options=[t('all')] + all_categories
+        options=[None] + list(category_labels),
+        format_func=lambda cat_id: t('all') if cat_id is None else category_labels[cat_id],
+        key='category_filter'
     )
-    category = "" if category == t('all') else category
     
     # City filter
-    all_cities = get_all_cities()
+    city_labels = {
+        name: f"{name} ({facet_counts['cities'].get(name, 0):,})"
+        for name in get_all_cities()
+    }
     city = st.sidebar.selectbox(
         t('city_district'),
-        options=[t('all')] + all_cities
+        options=[None] + list(city_labels),
+        format_func=lambda name: t('all') if name is None else city_labels[name],
+        key='city_filter'
     )
-    city = "" if city == t('all') else city
+    city = city or ""
     
     # Results limit
     limit = st.sidebar.slider(
@@ -514,6 +640,15 @@ def main():
         step=10
     )
     
+    # Restrict search to the visible map area (available after the first render)
+    search_in_view = st.sidebar.checkbox(
+        t('search_in_view'),
+        disabled='map_bounds' not in st.session_state
+    )
+    
+    # Show the whole geocoded dataset as zoom-dependent clusters
+    show_all = st.sidebar.checkbox(t('show_all'))
+    
     # Search button
     search_button = st.sidebar.button(t('search_button'), use_container_width=True)
     
@@ -534,24 +669,40 @@ def main():
         # Perform search
         if 'businesses' not in st.session_state or search_button:
             with st.spinner(t('searching')):
-                businesses = search_businesses(search_term, category, city, limit)
+                if search_in_view and 'map_bounds' in st.session_state:
+                    businesses = search_in_bounds(
+                        st.session_state.map_bounds, search_term, category_id, city, limit
+                    )
+                else:
+                    businesses = search_businesses(search_term, category_id, city, limit)
                 st.session_state.businesses = businesses
         else:
             businesses = st.session_state.businesses
         
         # Display map
-        if businesses:
-            # Calculate center
-            if len(businesses) > 0:
-                avg_lat = sum(b['lat'] for b in businesses) / len(businesses)
-                avg_lon = sum(b['lon'] for b in businesses) / len(businesses)
-                zoom = 12 if len(businesses) < 50 else 11
-            else:
-                avg_lat, avg_lon, zoom = 52.5200, 13.4050, 11
+        if show_all:
+            view = st.session_state.get('map_view', DEFAULT_MAP_VIEW)
+            clusters, map_businesses = get_overview_markers(
+                view['zoom'], st.session_state.get('map_bounds')
+            )
+            
+            m = create_map(map_businesses, view['lat'], view['lon'], view['zoom'], clusters=clusters)
+            map_state = st_folium(m, width=None, height=600, key='overview_map')
+            
+            # Re-cluster for the new zoom level / viewport
+            if remember_map_view(map_state):
+                st.rerun()
+            
+            total_on_map = len(map_businesses) + sum(c['count'] for c in clusters)
+            st.info(t('showing_clusters').format(count=f"{total_on_map:,}", clusters=len(clusters)))
+        elif businesses:
+            # Fit the map to the results
+            center_lat, center_lon, zoom = fit_map_to_businesses(businesses)
             
             # Create and display map
-            m = create_map(businesses, avg_lat, avg_lon, zoom)
-            st_folium(m, width=None, height=600)
+            m = create_map(businesses, center_lat, center_lon, zoom)
+            map_state = st_folium(m, width=None, height=600)
+            remember_map_view(map_state)
             
             st.info(t('showing_businesses').format(count=len(businesses)))
         else:
@@ -570,7 +721,8 @@ def main():
                 title_cancel='Exit fullscreen',
                 force_separate_button=True
             ).add_to(m)
-            st_folium(m, width=None, height=600)
+            map_state = st_folium(m, width=None, height=600)
+            remember_map_view(map_state)
     
     with col2:
         st.subheader(t('results_title'))
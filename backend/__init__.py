@@ -0,0 +1,3 @@
+"""
+Berlin Business Finder - shared backend modules
+"""
@@ -0,0 +1,3 @@
+"""
+HTTP API for the Berlin Business Finder mobile app
+"""
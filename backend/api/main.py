@@ -0,0 +1,246 @@
+"""
+Berlin Business Finder - FastAPI backend
+Serves the mobile app (mobile/src/services/api.ts) from the SQLite database
+"""
+
+import os
+import sys
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+
+# Make the shared backend package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import facets, search_engine, tiles
+from backend.column_store import BusinessStore, ENV_FLAG as COLUMN_STORE_FLAG
+from backend.db import ConnectionPool, DEFAULT_DB_PATH, WARM_UP_ENV
+from backend.query_cache import QueryCache, make_key
+
+API_PREFIX = '/api/v1'
+POOL_SIZE = 8
+MAX_PAGE_SIZE = 500
+
+class Business(BaseModel):
+    id: str
+    name: str
+    postal_code: Optional[str] = None
+    city: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    categories: List[str] = []
+    branch_ids: List[str] = []
+    street_address: Optional[str] = None
+    district: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    website: Optional[str] = None
+
+class BusinessResponse(BaseModel):
+    businesses: List[Business]
+    total: Optional[int] = None
+    limit: int
+    offset: int
+    next_cursor: Optional[str] = None
+
+class FacetCounts(BaseModel):
+    categories: Dict[str, int]
+    cities: Dict[str, int]
+    districts: Dict[str, int]
+
+class Statistics(BaseModel):
+    total_businesses: int
+    geocoded_businesses: int
+    unique_postal_codes: int
+    unique_cities: int
+
+pool = None
+tile_cache = None
+store = None
+query_cache = QueryCache()
+store_lock = threading.Lock()
+
+@asynccontextmanager
+async def lifespan(app):
+    """Open the connection pool and tile cache on startup, close them on shutdown
+
+    With BERLIN_COLUMN_STORE=1 the column store used for result counts is
+    loaded as well, and with BERLIN_WARM_UP=indexes (or all) the database is
+    pre-read into the page cache before the first request.
+    """
+    global pool, tile_cache, store
+    pool = ConnectionPool(DEFAULT_DB_PATH, size=POOL_SIZE, warm_up=os.environ.get(WARM_UP_ENV) or None)
+    tile_cache = tiles.MBTilesCache(tiles.DEFAULT_CACHE_PATH)
+    with pool.connection() as conn:
+        query_cache.check_version(conn)
+        if os.environ.get(COLUMN_STORE_FLAG) == '1':
+            store = BusinessStore.from_connection(conn)
+    yield
+    query_cache.clear()
+    tile_cache.close()
+    pool.close()
+
+app = FastAPI(title='Berlin Business Finder API', version='1.0', lifespan=lifespan)
+
+def _with_connection(func, *args):
+    """Run func(conn, *args) on a pooled connection (blocking)"""
+    with pool.connection() as conn:
+        return func(conn, *args)
+
+async def run_query(func, *args):
+    """Run a search_engine function on a pooled connection off the event loop"""
+    return await run_in_threadpool(_with_connection, func, *args)
+
+def _cached(conn, key, func, *args):
+    """func(conn, *args) through the shared query cache"""
+    return query_cache.get_or_compute(conn, key, lambda: func(conn, *args))
+
+async def run_cached_query(key, func, *args):
+    """run_query() whose result is cached under key until the database changes"""
+    return await run_query(_cached, key, func, *args)
+
+def _current_store(conn):
+    """The column store, reloaded once the database version has moved on"""
+    global store
+    if store is None or store.version == query_cache.version:
+        return store
+    with store_lock:
+        if store.version != query_cache.version:
+            store = BusinessStore.from_connection(conn)
+    return store
+
+def _list_businesses(conn, search, category, city, limit, offset, cursor):
+    """Resolve the category name and fetch one page
+
+    The total count is only computed for the first request of a listing
+    (no cursor), so following pages stay a pure keyset seek.
+    """
+    category_id = None
+    if category:
+        category_id = search_engine.get_category_id(conn, category)
+        if category_id is None:
+            return [], 0, None
+    
+    businesses, next_cursor = search_engine.search_businesses_page(
+        conn, search, category_id, city, limit, cursor, offset
+    )
+    total = None
+    column_store = _current_store(conn)
+    if cursor is None and column_store is not None:
+        total = column_store.count(conn, search, category_id, city)
+    elif cursor is None:
+        total = search_engine.count_businesses(conn, search, category_id, city)
+    return businesses, total, next_cursor
+
+def _facet_counts(conn, search, category, city):
+    """Resolve the category name and count the facets, keyed by category name"""
+    category_id = None
+    if category:
+        category_id = search_engine.get_category_id(conn, category)
+        if category_id is None:
+            return {facet: {} for facet, _ in facets.FACET_DIMENSIONS}
+    
+    counts = facets.get_facet_counts(conn, search, category_id, city)
+    category_names = dict(search_engine.get_categories(conn))
+    counts['categories'] = {
+        category_names[category_id]: n for category_id, n in counts['categories'].items()
+    }
+    return counts
+
+@app.get(f'{API_PREFIX}/businesses', response_model=BusinessResponse)
+async def list_businesses(
+    search: str = '',
+    category: str = '',
+    city: str = '',
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None
+):
+    """Search geocoded businesses
+
+    Pass next_cursor from the previous response as cursor to get the next
+    page; offset pagination is still accepted for the first page.
+    """
+    try:
+        key = make_key('businesses', search, None, city, limit,
+                       category=category, offset=offset, cursor=cursor)
+        businesses, total, next_cursor = await run_cached_query(
+            key, _list_businesses, search, category, city, limit, offset, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        'businesses': businesses,
+        'total': total,
+        'limit': limit,
+        'offset': 0 if cursor else offset,
+        'next_cursor': next_cursor
+    }
+
+@app.get(f'{API_PREFIX}/businesses/{{business_id}}', response_model=Business)
+async def get_business(business_id: str):
+    """Get a single business by id"""
+    businesses = await run_query(search_engine.get_businesses_by_ids, [business_id])
+    if not businesses:
+        raise HTTPException(status_code=404, detail='Business not found')
+    return businesses[0]
+
+@app.get(f'{API_PREFIX}/categories', response_model=List[str])
+async def list_categories():
+    """Get all category names"""
+    categories = await run_cached_query(make_key('categories'), search_engine.get_categories)
+    return [name for _, name in categories]
+
+@app.get(f'{API_PREFIX}/cities', response_model=List[str])
+async def list_cities():
+    """Get all cities"""
+    return await run_cached_query(make_key('cities'), search_engine.get_cities)
+
+@app.get(f'{API_PREFIX}/facets', response_model=FacetCounts)
+async def get_facets(search: str = '', category: str = '', city: str = ''):
+    """Geocoded business counts per category, city and district
+
+    Each facet is counted under the other filters, so the category counts
+    ignore category and the city counts ignore city.
+    """
+    key = make_key('facets', search, None, city, category=category)
+    return await run_cached_query(key, _facet_counts, search, category, city)
+
+@app.get(f'{API_PREFIX}/statistics', response_model=Statistics)
+async def get_statistics():
+    """Get database statistics"""
+    stats = await run_cached_query(make_key('statistics'), search_engine.get_statistics)
+    return {key: int(stats.get(key, 0)) for key in Statistics.__annotations__}
+
+@app.get(f'{API_PREFIX}/cache', response_model=Dict[str, Union[int, float, str, None]])
+async def get_cache_metrics():
+    """Query cache hit/miss counters, size and database version"""
+    return query_cache.metrics()
+
+@app.get('/tiles/{z}/{x}/{y}.mvt')
+async def get_vector_tile(z: int, x: int, y: int):
+    """Mapbox Vector Tile of business points, clustered up to zoom 16"""
+    if not tiles.is_valid_tile(z, x, y):
+        raise HTTPException(status_code=404, detail='Tile not found')
+    
+    tile_data = await run_query(tiles.get_tile, tile_cache, z, x, y)
+    return Response(
+        content=tile_data,
+        media_type='application/vnd.mapbox-vector-tile',
+        headers={'Content-Encoding': 'gzip'}
+    )
+
+@app.get('/health')
+async def health():
+    """Health check, with the startup warm-up's mode, size and duration if one ran"""
+    return {'status': 'ok', 'warm_up': pool.warm_up_stats}
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=8000)
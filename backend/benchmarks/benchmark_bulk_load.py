@@ -0,0 +1,75 @@
+"""
+Benchmark the bulk load of create_database.py
+
+Usage:
+    py backend/benchmarks/benchmark_bulk_load.py --rows 1000000
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend.benchmarks.synthetic import generate_businesses
+
+import create_database
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def time_insert(db_path, row_count):
+    """Seconds to stream row_count businesses into an empty database, FTS included"""
+    conn = sqlite3.connect(db_path)
+    try:
+        with create_database.bulk_load_pragmas(conn):
+            create_database.create_database_schema(conn)
+            start = time.perf_counter()
+            create_database.insert_businesses(conn, generate_businesses(row_count))
+            return time.perf_counter() - start
+    finally:
+        conn.close()
+
+def time_build(db_path, row_count):
+    """Seconds for a complete build_database() run"""
+    start = time.perf_counter()
+    create_database.build_database(db_path, generate_businesses(row_count))
+    return time.perf_counter() - start
+
+def main():
+    """Report rows/sec for the insert alone and for the complete build"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000000])
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info("Bulk Load Benchmark")
+    logger.info("="*60)
+    
+    # Keep the progress output of the build itself out of the report
+    create_database.logger.setLevel(logging.WARNING)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        for row_count in args.rows:
+            insert_seconds = time_insert(Path(workdir) / f'insert_{row_count}.db', row_count)
+            build_seconds = time_build(Path(workdir) / f'build_{row_count}.db', row_count)
+            size_mb = (Path(workdir) / f'build_{row_count}.db').stat().st_size / 1024 / 1024
+            
+            logger.info(
+                f"  {row_count:>9,} rows  insert + FTS: {insert_seconds:7.1f} s "
+                f"({row_count / insert_seconds:9,.0f} rows/s)  complete build: {build_seconds:7.1f} s "
+                f"({row_count / build_seconds:9,.0f} rows/s)  database: {size_mb:,.0f} MB"
+            )
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Benchmark the shared JSON codec against the standard library json per pipeline stage
+
+Usage:
+    py backend/benchmarks/benchmark_codec.py --rows 100000
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import codec
+from backend.benchmarks.synthetic import (
+    generate_businesses, gsbestand_record, precise_data_record
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def best_of(function, repeat=3):
+    """Best wall time of function() in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def build_stages(row_count):
+    """(name, stdlib function, codec function) for every pipeline stage"""
+    rng = random.Random(42)
+    businesses = list(generate_businesses(row_count))
+    
+    gsbestand_lines = [
+        json.dumps(gsbestand_record(i, rng, berlin=True), ensure_ascii=False).encode('utf-8')
+        for i in range(row_count)
+    ]
+    precise_lines = [
+        json.dumps(precise_data_record(business['id'], rng), ensure_ascii=False).encode('utf-8')
+        for business in businesses
+    ]
+    business_lines = [
+        json.dumps(business, ensure_ascii=False).encode('utf-8') for business in businesses
+    ]
+    geocoded_file = json.dumps(businesses, ensure_ascii=False, indent=2).encode('utf-8')
+    category_values = [json.dumps(business['categories']) for business in businesses]
+    
+    return [
+        ('extract: decode gsbestand lines',
+         lambda: [json.loads(line) for line in gsbestand_lines],
+         lambda: [codec.decode_gsbestand(line) for line in gsbestand_lines]),
+        ('extract: write JSONL',
+         lambda: [json.dumps(business, ensure_ascii=False) for business in businesses],
+         lambda: [codec.dumps(business) for business in businesses]),
+        ('geocode: read JSONL',
+         lambda: [json.loads(line) for line in business_lines],
+         lambda: [codec.loads(line) for line in business_lines]),
+        ('geocode: write geocoded JSON',
+         lambda: json.dumps(businesses, ensure_ascii=False, indent=2),
+         lambda: codec.dumps(businesses, indent=True)),
+        ('create_database: load geocoded JSON',
+         lambda: json.loads(geocoded_file),
+         lambda: codec.loads(geocoded_file)),
+        ('create_database: encode category columns',
+         lambda: [json.dumps(business['categories']) for business in businesses],
+         lambda: [codec.dumps(business['categories']) for business in businesses]),
+        ('update_precise_data: decode records',
+         lambda: [json.loads(line) for line in precise_lines],
+         lambda: [codec.decode_precise_data(line) for line in precise_lines]),
+        ('search: decode categories per row',
+         lambda: [json.loads(value) for value in category_values],
+         lambda: [codec.loads(value) for value in category_values]),
+    ]
+
+def main():
+    """Time every stage with stdlib json and with the active codec backend"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info(f"JSON Codec Benchmark ({args.rows:,} records, backend: {codec.BACKEND})")
+    logger.info("="*60)
+    
+    for name, stdlib_function, codec_function in build_stages(args.rows):
+        stdlib_seconds = best_of(stdlib_function)
+        codec_seconds = best_of(codec_function)
+        logger.info(
+            f"  {name:<42} json: {stdlib_seconds * 1000:8.1f} ms  "
+            f"{codec.BACKEND}: {codec_seconds * 1000:8.1f} ms  "
+            f"speedup: {stdlib_seconds / codec_seconds:5.1f}x"
+        )
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Benchmark the NumPy column store against SQLite queries and the dict representation
+
+Usage:
+    py backend/benchmarks/benchmark_column_store.py --rows 100000 1000000 --queries 50
+"""
+
+import argparse
+import gc
+import logging
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import search_engine
+from backend.benchmarks.synthetic import BERLIN_BBOX, build_database
+from backend.column_store import BusinessStore
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def traced_size(build):
+    """Bytes still allocated by build() once it returns, and its result"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+def load_all_dicts(conn):
+    """Every geocoded business as a search_engine business dict"""
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT {search_engine.BUSINESS_COLUMNS} FROM businesses b WHERE b.lat IS NOT NULL')
+    return [search_engine.row_to_business(row) for row in cursor]
+
+def random_filters(rng, category_ids, query_count):
+    """(category_id, city, bbox) combinations without a text search"""
+    min_lat, min_lon, max_lat, max_lon = BERLIN_BBOX
+    filters = []
+    for _ in range(query_count):
+        lat = rng.uniform(min_lat, max_lat - 0.05)
+        lon = rng.uniform(min_lon, max_lon - 0.08)
+        filters.append((
+            rng.choice([None, rng.choice(category_ids)]),
+            rng.choice(['', 'Berlin', 'Potsdam']),
+            rng.choice([None, (lat, lon, lat + 0.05, lon + 0.08)]),
+        ))
+    return filters
+
+def time_queries(run, filters):
+    """Average milliseconds of run(category_id, city, bbox) over filters"""
+    start = time.perf_counter()
+    results = [run(*f) for f in filters]
+    ms = (time.perf_counter() - start) * 1000 / len(filters)
+    return ms, results
+
+def run_benchmark(row_count, query_count, workdir):
+    """Measure memory and query latency on a database of row_count rows"""
+    db_path = Path(workdir) / f'store_{row_count}.db'
+    logger.info(f"Building synthetic database with {row_count:,} rows...")
+    conn = build_database(db_path, row_count)
+    
+    dict_bytes, businesses = traced_size(lambda: load_all_dicts(conn))
+    del businesses
+    start = time.perf_counter()
+    store_bytes, store = traced_size(lambda: BusinessStore.from_connection(conn))
+    load_seconds = time.perf_counter() - start
+    
+    logger.info(
+        f"  {row_count:>9,} rows  dicts: {dict_bytes / 1024 / 1024:8.1f} MB  "
+        f"column store: {store_bytes / 1024 / 1024:6.1f} MB "
+        f"({store.memory_bytes() / 1024 / 1024:.1f} MB by memory_bytes(), loaded in {load_seconds:.1f} s)"
+    )
+    
+    category_ids = [category_id for category_id, _ in search_engine.get_categories(conn)]
+    filters = random_filters(random.Random(7), category_ids, query_count)
+    
+    def sql_page(category_id, city, bbox):
+        if bbox is None:
+            return search_engine.search_businesses(conn, '', category_id, city, limit=100)
+        return search_engine.search_in_bbox(conn, *bbox, '', category_id, city, limit=100)
+    
+    workloads = (
+        ('count',
+         lambda category_id, city, bbox: search_engine.count_businesses(conn, '', category_id, city, bbox),
+         lambda category_id, city, bbox: store.count(conn, '', category_id, city, bbox)),
+        ('page of 100',
+         lambda category_id, city, bbox: [b['id'] for b in sql_page(category_id, city, bbox)],
+         lambda category_id, city, bbox: [b['id'] for b in store.search(conn, '', category_id, city, bbox, limit=100)]),
+    )
+    for label, sql_run, store_run in workloads:
+        sql_ms, expected = time_queries(sql_run, filters)
+        store_ms, found = time_queries(store_run, filters)
+        
+        # SQLite returns bbox pages in R*Tree order, not by name, so only
+        # their sizes are comparable
+        for (_, _, bbox), a, b in zip(filters, expected, found):
+            if (len(a) != len(b)) if bbox and label != 'count' else (a != b):
+                raise AssertionError(f"{label}: column store differs from SQLite")
+        
+        logger.info(
+            f"  {row_count:>9,} rows  {label:<12} SQLite: {sql_ms:8.2f} ms/query  "
+            f"column store: {store_ms:8.2f} ms/query  speedup: {sql_ms / store_ms:5.1f}x"
+        )
+    
+    conn.close()
+
+def main():
+    """Run the column store benchmark for each requested table size"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info("Column Store Benchmark")
+    logger.info("="*60)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        for row_count in args.rows:
+            run_benchmark(row_count, args.queries, workdir)
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
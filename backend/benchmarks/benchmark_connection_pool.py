@@ -0,0 +1,187 @@
+"""
+Benchmark concurrent sessions on one shared connection against the read-only pool
+
+Usage:
+    py backend/benchmarks/benchmark_connection_pool.py --rows 200000 --sessions 1 4 16 --with-writer
+"""
+
+import argparse
+import logging
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import search_engine
+from backend.benchmarks.synthetic import BERLIN_BBOX, build_database
+from backend.db import ConnectionPool
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SEARCH_TERMS = ['', 'bäck', 'fris', 'restaurant', 'auto', 'berlin', 'müller']
+
+# Pause between the writer's update transactions
+WRITER_INTERVAL_SECONDS = 0.05
+
+def session_queries(rng, category_ids, query_count):
+    """Query mix of one simulated session: searches, counts and map-area searches"""
+    min_lat, min_lon, max_lat, max_lon = BERLIN_BBOX
+    queries = []
+    for _ in range(query_count):
+        term = rng.choice(SEARCH_TERMS)
+        category_id = rng.choice([None, rng.choice(category_ids)])
+        lat = rng.uniform(min_lat, max_lat - 0.05)
+        lon = rng.uniform(min_lon, max_lon - 0.08)
+        bbox = (lat, lon, lat + 0.05, lon + 0.08)
+        queries.append(rng.choice([
+            lambda conn, term=term, category_id=category_id:
+                search_engine.search_businesses(conn, term, category_id, limit=100),
+            lambda conn, term=term, category_id=category_id:
+                search_engine.count_businesses(conn, term, category_id),
+            lambda conn, term=term, bbox=bbox:
+                search_engine.search_in_bbox(conn, *bbox, term),
+        ]))
+    return queries
+
+class SharedConnection:
+    """The previous app setup: one connection used by every session's thread"""
+    
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+    
+    @contextmanager
+    def connection(self):
+        yield self.conn
+    
+    def close(self):
+        self.conn.close()
+
+def run_writer(db_path, stop):
+    """Keep committing small updates until stop is set, like the incremental updater"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    rng = random.Random(3)
+    max_rowid = conn.execute('SELECT MAX(rowid) FROM businesses').fetchone()[0]
+    while not stop.is_set():
+        conn.execute(
+            'UPDATE businesses SET phone = ? WHERE rowid = ?',
+            (str(rng.randrange(10**8)), rng.randrange(1, max_rowid + 1))
+        )
+        conn.commit()
+        time.sleep(WRITER_INTERVAL_SECONDS)
+    conn.close()
+
+def run_sessions(source, session_count, query_count, category_ids):
+    """Run session_count threads of query_count queries; (seconds, latencies, errors)"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    
+    def session(seed):
+        queries = session_queries(random.Random(seed), category_ids, query_count)
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            try:
+                with source.connection() as conn:
+                    query(conn)
+            except sqlite3.Error as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            timings.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(timings)
+    
+    threads = [threading.Thread(target=session, args=(seed,)) for seed in range(session_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, errors
+
+def report(label, session_count, seconds, latencies, errors):
+    """Log throughput and latency percentiles of one run"""
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=20)
+        p50, p95 = cuts[9] * 1000, cuts[18] * 1000
+    else:
+        p50 = p95 = float('nan')
+    logger.info(
+        f"  {session_count:>3} sessions  {label:<17} {len(latencies) / seconds:8.1f} queries/s  "
+        f"p50: {p50:7.2f} ms  p95: {p95:7.2f} ms  errors: {len(errors)}"
+    )
+    if errors:
+        logger.info(f"      first error: {errors[0]}")
+
+def main():
+    """Run the concurrency benchmark for each requested session count"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--queries', type=int, default=50, help='Queries per session')
+    parser.add_argument('--pool-size', type=int, default=8)
+    parser.add_argument(
+        '--with-writer', action='store_true',
+        help='Commit small updates in the background while the sessions read'
+    )
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info("Connection Pool Benchmark")
+    logger.info("="*60)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        pool_path = Path(workdir) / 'pool.db'
+        logger.info(f"Building synthetic database with {args.rows:,} rows...")
+        conn = build_database(pool_path, args.rows)
+        category_ids = [category_id for category_id, _ in search_engine.get_categories(conn)]
+        conn.close()
+        
+        # The shared connection gets a copy in the previous rollback-journal mode
+        shared_path = Path(workdir) / 'shared.db'
+        shutil.copyfile(pool_path, shared_path)
+        conn = sqlite3.connect(shared_path)
+        conn.execute('PRAGMA journal_mode = DELETE')
+        conn.close()
+        
+        setups = (
+            ('shared connection', shared_path, lambda: SharedConnection(shared_path)),
+            (f'pool of {args.pool_size}', pool_path, lambda: ConnectionPool(pool_path, size=args.pool_size)),
+        )
+        for session_count in args.sessions:
+            for label, db_path, open_source in setups:
+                source = open_source()
+                stop = threading.Event()
+                writer = None
+                if args.with_writer:
+                    writer = threading.Thread(target=run_writer, args=(db_path, stop))
+                    writer.start()
+                try:
+                    seconds, latencies, errors = run_sessions(
+                        source, session_count, args.queries, category_ids
+                    )
+                finally:
+                    stop.set()
+                    if writer is not None:
+                        writer.join()
+                    source.close()
+                report(label, session_count, seconds, latencies, errors)
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Benchmark the gsbestand extraction with and without the postal code pre-filter
+
+Usage:
+    py backend/benchmarks/benchmark_extraction.py --rows 500000 --workers 1 4
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend.benchmarks.synthetic import write_gsbestand
+
+import extract_berlin_data
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def time_extraction(gsbestand_path, workers, prefilter):
+    """Run a full extraction, returning (seconds, extracted businesses)"""
+    start = time.perf_counter()
+    businesses = list(extract_berlin_data.extract_berlin_businesses(
+        gsbestand_path, {}, workers, prefilter=prefilter
+    ))
+    return time.perf_counter() - start, businesses
+
+def main():
+    """Time the extraction variants on a synthetic gsbestand file"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--berlin-share', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1])
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info("Extraction Benchmark")
+    logger.info("="*60)
+    
+    # Keep the per-chunk progress of the extraction itself out of the report
+    extract_berlin_data.logger.setLevel(logging.WARNING)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        gsbestand_path = Path(workdir) / 'gsbestand.json'
+        logger.info(f"Writing synthetic gsbestand with {args.rows:,} records...")
+        write_gsbestand(gsbestand_path, args.rows, args.berlin_share)
+        size_mb = gsbestand_path.stat().st_size / 1024 / 1024
+        
+        for workers in args.workers:
+            full_seconds, expected = time_extraction(gsbestand_path, workers, prefilter=False)
+            filtered_seconds, found = time_extraction(gsbestand_path, workers, prefilter=True)
+            
+            if found != expected:
+                raise AssertionError("Pre-filtered extraction differs from the full decode")
+            
+            logger.info(
+                f"  workers={workers:<2} full decode: {full_seconds:6.2f} s "
+                f"({size_mb / full_seconds:6.1f} MB/s)  pre-filter: {filtered_seconds:6.2f} s "
+                f"({size_mb / filtered_seconds:6.1f} MB/s)  speedup: {full_seconds / filtered_seconds:4.1f}x"
+            )
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Benchmark facet counts from the precomputed tables against grouping at query time
+
+Usage:
+    py backend/benchmarks/benchmark_facets.py --rows 200000 1000000
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import codec, facets, search_engine
+from backend.benchmarks.synthetic import build_database
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def count_by_decoding(conn, city=""):
+    """Category and city counts the way they had to be computed before: decode every row"""
+    categories = Counter()
+    cities = Counter()
+    cursor = conn.cursor()
+    cursor.execute('SELECT city, categories FROM businesses WHERE lat IS NOT NULL')
+    for row_city, row_categories in cursor:
+        cities[row_city] += 1
+        if not city or row_city == city:
+            categories.update(set(codec.loads(row_categories)))
+    return categories, cities
+
+def best_ms(func, repeat):
+    """Best of repeat runs in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def run_benchmark(row_count, repeat, update_count, workdir):
+    """Time facet counts and their incremental upkeep on row_count rows"""
+    db_path = Path(workdir) / f'facets_{row_count}.db'
+    logger.info(f"Building synthetic database with {row_count:,} rows...")
+    conn = build_database(db_path, row_count)
+    category_id = search_engine.get_categories(conn)[0][0]
+    
+    timings = {
+        'decode every row': best_ms(lambda: count_by_decoding(conn, 'Berlin'), repeat),
+        'facet tables': best_ms(
+            lambda: facets.get_facet_counts(conn, '', category_id, 'Berlin'), repeat
+        ),
+        'facet tables, no filter': best_ms(lambda: facets.get_facet_counts(conn), repeat),
+        'text search (live)': best_ms(
+            lambda: facets.get_facet_counts(conn, 'bäck', None, 'Berlin'), repeat
+        ),
+    }
+    for label, ms in timings.items():
+        logger.info(f"  {row_count:>9,} rows  {label:<24} {ms:10.2f} ms")
+    
+    # Incremental upkeep: move update_count businesses to another city
+    start = time.perf_counter()
+    conn.execute(
+        "UPDATE businesses SET city = city || ' Nord' WHERE rowid IN "
+        "(SELECT rowid FROM businesses ORDER BY random() LIMIT ?)",
+        (update_count,)
+    )
+    applied = facets.apply_facet_changes(conn)
+    conn.commit()
+    seconds = time.perf_counter() - start
+    logger.info(
+        f"  {row_count:>9,} rows  {update_count:,} city changes + fold of {applied:,} log rows: {seconds:.2f} s"
+    )
+    conn.close()
+
+def main():
+    """Run the facet benchmark for each requested table size"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[200000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--updates', type=int, default=10000, help='Businesses changed for the upkeep timing')
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info("Facet Count Benchmark")
+    logger.info("="*60)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        for row_count in args.rows:
+            run_benchmark(row_count, args.repeat, args.updates, workdir)
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Benchmark the NumPy geo kernels against per-point Python math
+
+Usage:
+    py backend/benchmarks/benchmark_geo.py --points 100000 1000000
+"""
+
+import argparse
+import logging
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import geo
+from backend.benchmarks.synthetic import BERLIN_BBOX
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Radius of the radius-query workload
+RADIUS_KM = 2.0
+
+def python_radius_query(lats, lons, lat, lon, radius_km):
+    """Reference radius query: haversine_km() for every point"""
+    found = []
+    for index, (point_lat, point_lon) in enumerate(zip(lats, lons)):
+        distance = geo.haversine_km(lat, lon, point_lat, point_lon)
+        if distance <= radius_km:
+            found.append((distance, index))
+    found.sort()
+    return [index for _, index in found]
+
+def best_of(func, repeat=3):
+    """Fastest of repeat runs of func() in milliseconds, and its result"""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def run_benchmark(point_count):
+    """Time each kernel and its Python equivalent on point_count points"""
+    rng = random.Random(7)
+    min_lat, min_lon, max_lat, max_lon = BERLIN_BBOX
+    lat_list = [rng.uniform(min_lat, max_lat) for _ in range(point_count)]
+    lon_list = [rng.uniform(min_lon, max_lon) for _ in range(point_count)]
+    lats = np.array(lat_list)
+    lons = np.array(lon_list)
+    center = (52.52, 13.405)
+    
+    workloads = (
+        ('centroid',
+         lambda: (sum(lat_list) / point_count, sum(lon_list) / point_count),
+         lambda: geo.centroid(lats, lons)),
+        ('bbox',
+         lambda: (min(lat_list), min(lon_list), max(lat_list), max(lon_list)),
+         lambda: geo.points_bbox(lats, lons)),
+        ('radius query',
+         lambda: python_radius_query(lat_list, lon_list, *center, RADIUS_KM),
+         lambda: geo.within_radius(lats, lons, *center, RADIUS_KM)[0].tolist()),
+        ('distances',
+         lambda: [geo.haversine_km(*center, lat, lon) for lat, lon in zip(lat_list, lon_list)],
+         lambda: geo.haversine_km_array(*center, lats, lons)),
+    )
+    
+    for label, python_run, numpy_run in workloads:
+        python_ms, expected = best_of(python_run)
+        numpy_ms, found = best_of(numpy_run)
+        
+        if not np.allclose(np.asarray(expected, dtype=np.float64), np.asarray(found, dtype=np.float64)):
+            raise AssertionError(f"{label}: NumPy kernel differs from the Python reference")
+        
+        logger.info(
+            f"  {point_count:>9,} points  {label:<12} Python: {python_ms:9.2f} ms  "
+            f"NumPy: {numpy_ms:8.2f} ms  speedup: {python_ms / numpy_ms:6.1f}x"
+        )
+
+def main():
+    """Run the geo kernel benchmark for each requested point count"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--points', type=int, nargs='+', default=[100000, 1000000])
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info("Geo Kernel Benchmark")
+    logger.info("="*60)
+    
+    for point_count in args.points:
+        run_benchmark(point_count)
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
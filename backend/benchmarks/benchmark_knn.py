@@ -0,0 +1,106 @@
+"""
+Benchmark k-nearest-neighbour search against a brute-force distance scan
+
+Usage:
+    py backend/benchmarks/benchmark_knn.py --rows 100000 1000000 --queries 50
+"""
+
+import argparse
+import heapq
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend.benchmarks.synthetic import BERLIN_BBOX, build_database
+from backend.geo import haversine_km
+from backend.search_engine import search_nearby
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def brute_force_nearby(conn, lat, lon, k, category_id=None):
+    """Reference k-NN: compute the distance to every geocoded business"""
+    cursor = conn.cursor()
+    if category_id is None:
+        cursor.execute('SELECT rowid, lat, lon FROM businesses WHERE lat IS NOT NULL')
+    else:
+        cursor.execute('''
+            SELECT b.rowid, b.lat, b.lon
+            FROM businesses b
+            JOIN business_categories bc ON bc.business_id = b.id AND bc.category_id = ?
+            WHERE b.lat IS NOT NULL
+        ''', (category_id,))
+    
+    return heapq.nsmallest(
+        k, ((haversine_km(lat, lon, row[1], row[2]), row[0]) for row in cursor)
+    )
+
+def run_benchmark(row_count, query_count, k, workdir):
+    """Time indexed and brute-force k-NN on a database of row_count rows"""
+    db_path = Path(workdir) / f'knn_{row_count}.db'
+    logger.info(f"Building synthetic database with {row_count:,} rows...")
+    conn = build_database(db_path, row_count)
+    
+    rng = random.Random(7)
+    min_lat, min_lon, max_lat, max_lon = BERLIN_BBOX
+    points = [
+        (rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon))
+        for _ in range(query_count)
+    ]
+    
+    results = {}
+    for label, category_id in (('all', None), ('category', 1)):
+        start = time.perf_counter()
+        indexed = [search_nearby(conn, lat, lon, k, category_id=category_id) for lat, lon in points]
+        indexed_ms = (time.perf_counter() - start) * 1000 / query_count
+        
+        start = time.perf_counter()
+        brute = [brute_force_nearby(conn, lat, lon, k, category_id) for lat, lon in points]
+        brute_ms = (time.perf_counter() - start) * 1000 / query_count
+        
+        # Both must agree on the distances of the k nearest
+        for found, expected in zip(indexed, brute):
+            found_distances = [round(b['distance_km'], 9) for b in found]
+            expected_distances = [round(d, 9) for d, _ in expected]
+            if found_distances != expected_distances:
+                raise AssertionError("k-NN result differs from brute force")
+        
+        results[label] = (indexed_ms, brute_ms)
+        logger.info(
+            f"  {row_count:>9,} rows, filter={label:<8} "
+            f"R*Tree: {indexed_ms:8.2f} ms/query  brute force: {brute_ms:8.2f} ms/query  "
+            f"speedup: {brute_ms / indexed_ms:6.1f}x"
+        )
+    
+    conn.close()
+    return results
+
+def main():
+    """Run the k-NN benchmark for each requested table size"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('-k', type=int, default=20)
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info("k-NN Benchmark")
+    logger.info("="*60)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        for row_count in args.rows:
+            run_benchmark(row_count, args.queries, args.k, workdir)
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Benchmark the precise-data merge, row by row against set-based
+
+Usage:
+    py backend/benchmarks/benchmark_precise_merge.py --rows 200000
+"""
+
+import argparse
+import logging
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import codec
+from backend.benchmarks.synthetic import build_database, precise_data_record
+
+import update_precise_data
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MERGED_COLUMNS_QUERY = '''
+    SELECT id, lat, lon, street_address, district, phone, email, website
+    FROM businesses ORDER BY id
+'''
+
+def write_precise_data(path, business_ids, seed=42):
+    """Write a berlin_business_data.jsonl with one record per business id"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for business_id in business_ids:
+            f.write(codec.dumps(precise_data_record(business_id, rng)))
+            f.write('\n')
+
+def time_merge(db_path, jsonl_path, in_memory):
+    """Merge jsonl_path into db_path, returning (seconds, merged rows)"""
+    start = time.perf_counter()
+    if in_memory:
+        update_precise_data.update_database(db_path, update_precise_data.load_precise_data(jsonl_path))
+    else:
+        update_precise_data.merge_precise_data(db_path, jsonl_path)
+    seconds = time.perf_counter() - start
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        return seconds, conn.execute(MERGED_COLUMNS_QUERY).fetchall()
+    finally:
+        conn.close()
+
+def main():
+    """Time both merge strategies on a synthetic database"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--coverage', type=float, default=0.8,
+                        help='Share of businesses with a precise-data record')
+    args = parser.parse_args()
+    
+    logger.info("="*60)
+    logger.info("Precise-Data Merge Benchmark")
+    logger.info("="*60)
+    
+    # Keep the progress output of the merge itself out of the report
+    update_precise_data.logger.setLevel(logging.WARNING)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        base_path = Path(workdir) / 'base.db'
+        jsonl_path = Path(workdir) / 'berlin_business_data.jsonl'
+        
+        logger.info(f"Building a synthetic database with {args.rows:,} businesses...")
+        conn = build_database(base_path, args.rows)
+        business_ids = [row[0] for row in conn.execute('SELECT id FROM businesses')]
+        conn.close()
+        write_precise_data(jsonl_path, business_ids[:int(len(business_ids) * args.coverage)])
+        
+        results = {}
+        for label, in_memory in (('row by row', True), ('set-based', False)):
+            db_path = Path(workdir) / f'{label}.db'
+            shutil.copy(base_path, db_path)
+            seconds, rows = time_merge(db_path, jsonl_path, in_memory)
+            results[label] = rows
+            logger.info(f"  {label:<10}  {seconds:7.2f} s  ({len(business_ids) / seconds:9,.0f} businesses/s)")
+        
+        if results['set-based'] != results['row by row']:
+            raise AssertionError("Set-based merge differs from the row-by-row update")
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
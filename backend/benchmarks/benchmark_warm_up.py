@@ -0,0 +1,114 @@
+"""
+Benchmark first-search latency on a cold page cache with and without warm-up
+
+Usage:
+    py backend/benchmarks/benchmark_warm_up.py --rows 200000 1000000
+
+Needs os.posix_fadvise (Linux) to evict the database from the page cache.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import search_engine
+from backend.benchmarks.synthetic import BERLIN_BBOX, build_database
+from backend.db import ConnectionPool, WARM_UP_MODES
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SEARCH_TERMS = ['bäck', 'fris', 'restaurant', 'auto', 'müller', 'kfz', 'arzt', 'bau']
+
+def evict_from_page_cache(path):
+    """Drop a file's clean pages from the OS page cache"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+def first_searches(rng, category_ids, count):
+    """Distinct searches, like the first requests after a deploy"""
+    min_lat, min_lon, max_lat, max_lon = BERLIN_BBOX
+    searches = []
+    for index in range(count):
+        term = SEARCH_TERMS[index % len(SEARCH_TERMS)]
+        category_id = rng.choice(category_ids)
+        lat = rng.uniform(min_lat, max_lat - 0.05)
+        lon = rng.uniform(min_lon, max_lon - 0.08)
+        searches.append(lambda conn, term=term, category_id=category_id, lat=lat, lon=lon: (
+            search_engine.search_businesses(conn, term, limit=100),
+            search_engine.count_businesses(conn, term),
+            search_engine.search_businesses(conn, '', category_id, limit=100),
+            search_engine.search_in_bbox(conn, lat, lon, lat + 0.05, lon + 0.08),
+        ))
+    return searches
+
+def time_searches(pool, searches):
+    """Average milliseconds per search"""
+    start = time.perf_counter()
+    for search in searches:
+        with pool.connection() as conn:
+            search(conn)
+    return (time.perf_counter() - start) * 1000 / len(searches)
+
+def run_benchmark(row_count, search_count, workdir):
+    """Compare first and steady-state search latency on row_count rows"""
+    db_path = Path(workdir) / f'warm_{row_count}.db'
+    logger.info(f"Building synthetic database with {row_count:,} rows...")
+    conn = build_database(db_path, row_count)
+    category_ids = [category_id for category_id, _ in search_engine.get_categories(conn)]
+    conn.close()
+    searches = first_searches(random.Random(7), category_ids, search_count)
+    
+    logger.info(f"  {row_count:>9,} rows  database: {db_path.stat().st_size / 1024 / 1024:.0f} MB")
+    for mode in (None,) + WARM_UP_MODES:
+        evict_from_page_cache(db_path)
+        start = time.perf_counter()
+        pool = ConnectionPool(db_path, size=2, warm_up=mode)
+        startup = time.perf_counter() - start
+        first_ms = time_searches(pool, searches)
+        steady_ms = time_searches(pool, searches)
+        pool.close()
+        
+        read = pool.warm_up_stats['bytes'] / 1024 / 1024 if mode else 0
+        logger.info(
+            f"  {row_count:>9,} rows  warm-up: {mode or 'off':<8} startup: {startup:6.2f} s "
+            f"({read:5.0f} MB read)  first search: {first_ms:8.2f} ms  steady state: {steady_ms:8.2f} ms"
+        )
+
+def main():
+    """Run the warm-up benchmark for each requested table size"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[200000, 1000000])
+    parser.add_argument('--searches', type=int, default=8)
+    args = parser.parse_args()
+    
+    if not hasattr(os, 'posix_fadvise'):
+        logger.error("os.posix_fadvise is not available on this platform")
+        return 1
+    
+    logger.info("="*60)
+    logger.info("Warm-Up Benchmark")
+    logger.info("="*60)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        for row_count in args.rows:
+            run_benchmark(row_count, args.searches, workdir)
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Synthetic Berlin business data for benchmarks
+"""
+
+import json
+import random
+import sqlite3
+import sys
+from pathlib import Path
+
+# Make the shared backend package and the pipeline scripts importable
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'backend' / 'scripts'))
+
+import create_database
+
+# Rough Berlin extent
+BERLIN_BBOX = (52.34, 13.09, 52.68, 13.76)
+
+CATEGORIES = [
+    'Bäckereien', 'Friseure', 'Restaurants', 'Rechtsanwälte', 'Ärzte',
+    'Zahnärzte', 'Apotheken', 'Cafés', 'Steuerberater', 'Autowerkstätten',
+    'Blumengeschäfte', 'Immobilienmakler', 'Hotels', 'Fahrschulen', 'Physiotherapie',
+]
+
+NAME_PARTS = [
+    'Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weiß', 'Krüger', 'Becker',
+    'Schäfer', 'Hoffmann', 'Köhler', 'Straßburger', 'Berliner', 'Spree', 'Kiez',
+]
+
+CITIES = ['Berlin', 'Berlin', 'Berlin', 'Potsdam', 'Falkensee', 'Teltow']
+
+# Non-Berlin postal codes and cities for the nationwide gsbestand dump
+OTHER_LOCATIONS = [
+    ('20095', 'Hamburg'), ('80331', 'München'), ('50667', 'Köln'),
+    ('60311', 'Frankfurt am Main'), ('01067', 'Dresden'), ('04109', 'Leipzig'),
+]
+
+def generate_businesses(count, seed=42):
+    """Yield geocoded business dicts in the create_database.py input shape"""
+    rng = random.Random(seed)
+    min_lat, min_lon, max_lat, max_lon = BERLIN_BBOX
+    
+    for i in range(count):
+        category = rng.choice(CATEGORIES)
+        yield {
+            'id': f'synthetic-{i:08d}',
+            'name': f'{rng.choice(NAME_PARTS)} {category[:-1]} {i}',
+            'postal_code': str(rng.randint(10115, 14199)),
+            'city': rng.choice(CITIES),
+            'lat': rng.uniform(min_lat, max_lat),
+            'lon': rng.uniform(min_lon, max_lon),
+            'categories': rng.sample(CATEGORIES, rng.randint(1, 3)),
+            'branch_ids': [str(rng.randint(1, 5000))]
+        }
+
+def build_database(db_path, count, seed=42):
+    """Create a complete benchmark database at db_path with count businesses"""
+    db_path = Path(db_path)
+    create_database.build_database(db_path, generate_businesses(count, seed))
+    return sqlite3.connect(db_path)
+
+def gsbestand_record(index, rng, berlin):
+    """One raw record in the nationwide gsbestand-559.json shape"""
+    if berlin:
+        postal_code, city = str(rng.randint(10115, 14199)), 'Berlin'
+    else:
+        postal_code, city = rng.choice(OTHER_LOCATIONS)
+    category = rng.choice(CATEGORIES)
+    
+    return {
+        '_id': f'gs-{index:08d}',
+        'verlagsdaten': {
+            'kontaktinformationen': {
+                'adresse': {
+                    'postleitzahl': postal_code,
+                    'ortsname': city,
+                    'strasse': f'{rng.choice(NAME_PARTS)}straße',
+                    'hausnummer': str(rng.randint(1, 200)),
+                },
+                'personListe': [{'name': f'{rng.choice(NAME_PARTS)} {category[:-1]} {index}'}],
+                'telefonListe': [{'nummer': f'0{rng.randint(30, 99)} {rng.randint(100000, 9999999)}'}],
+                'emailListe': [{'adresse': f'info{index}@example.de'}],
+            },
+            'branchenIdListe': [str(rng.randint(1, 5000)) for _ in range(rng.randint(1, 3))],
+            'oeffnungszeiten': [
+                {'tag': day, 'von': '09:00', 'bis': '18:00'}
+                for day in ('Mo', 'Di', 'Mi', 'Do', 'Fr')
+            ],
+            'beschreibung': ' '.join(rng.choice(NAME_PARTS) for _ in range(40)),
+        },
+    }
+
+def write_gsbestand(path, count, berlin_share=0.05, seed=42):
+    """Write a synthetic gsbestand JSONL file with count records"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            record = gsbestand_record(i, rng, rng.random() < berlin_share)
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+def precise_data_record(business_id, rng):
+    """One raw record in the berlin_business_data.jsonl shape"""
+    min_lat, min_lon, max_lat, max_lon = BERLIN_BBOX
+    street = f'{rng.choice(NAME_PARTS)}straße'
+    
+    return {
+        'antwort': {
+            'status': 'OK',
+            'daten': {
+                'teilnehmer': {
+                    'id': business_id,
+                    'name': f'{rng.choice(NAME_PARTS)} {rng.choice(CATEGORIES)}',
+                    'adresse': {
+                        'strasse': street,
+                        'anzeige_strasse': street,
+                        'hausnr': str(rng.randint(1, 200)),
+                        'plz': str(rng.randint(10115, 14199)),
+                        'ort': 'Berlin',
+                        'stadtteil': rng.choice(['Mitte', 'Kreuzberg', 'Pankow', 'Spandau']),
+                        'geodaten': {'koordinaten': [
+                            {'format': 'GK3', 'x': str(rng.uniform(4.5e6, 4.6e6)), 'y': str(rng.uniform(5.8e6, 5.9e6))},
+                            {'format': 'WGS84', 'x': str(rng.uniform(min_lon, max_lon)), 'y': str(rng.uniform(min_lat, max_lat))},
+                        ]},
+                    },
+                    'kontakt': {
+                        'telefon': [{'rufnummer': f'030 {rng.randint(100000, 9999999)}', 'typ': 'TELEFON'}],
+                        'email': [{'email': f'info@{business_id}.example.de'}],
+                        'www': [{'url': f'https://{business_id}.example.de'}],
+                    },
+                    'branchen': [{'id': str(rng.randint(1, 5000)), 'name': rng.choice(CATEGORIES)}],
+                    'oeffnungszeiten': [
+                        {'tag': day, 'von': '09:00', 'bis': '18:00'}
+                        for day in ('Mo', 'Di', 'Mi', 'Do', 'Fr')
+                    ],
+                    'beschreibung': ' '.join(rng.choice(NAME_PARTS) for _ in range(40)),
+                },
+            },
+        },
+    }
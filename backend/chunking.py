@@ -0,0 +1,59 @@
+"""
+Newline-aligned byte-range chunks for parsing large JSONL files in parallel
+Shared by the gsbestand extraction and the precise-data loader
+"""
+
+import os
+from collections import deque
+
+# Byte size of the chunks handed to worker processes
+DEFAULT_CHUNK_SIZE = 32 * 1024 * 1024
+
+def find_chunk_boundaries(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Split a file into (start, end) byte ranges that begin at line starts"""
+    file_size = os.path.getsize(path)
+    boundaries = [0]
+    
+    with open(path, 'rb') as f:
+        position = chunk_size
+        while position < file_size:
+            f.seek(position)
+            f.readline()  # move to the start of the next line
+            line_start = f.tell()
+            if line_start >= file_size:
+                break
+            if line_start > boundaries[-1]:
+                boundaries.append(line_start)
+            position = line_start + chunk_size
+    
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def iter_chunk_lines(path, start, end):
+    """Yield (byte offset, raw line) for every line starting in [start, end)"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            yield position, line
+            position += len(line)
+
+def imap_bounded(pool, func, items, window):
+    """Like pool.imap, but with at most window tasks in flight
+
+    pool.imap queues every task up front, so results pile up in memory
+    whenever the consumer is slower than the workers. Here a new task is
+    only submitted once the oldest result has been taken; results still
+    come back in input order.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    
+    while pending:
+        yield pending.popleft().get()
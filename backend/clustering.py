@@ -0,0 +1,206 @@
+"""
+Zoom-level aware grid clustering of business markers
+Clusters are precomputed per zoom level into the map_clusters table
+"""
+
+import math
+
+# Zoom range with precomputed clusters; above MAX_CLUSTER_ZOOM businesses
+# are shown individually
+MIN_CLUSTER_ZOOM = 8
+MAX_CLUSTER_ZOOM = 16
+
+# Grid cell size in screen pixels (Web Mercator, 256px tiles)
+CLUSTER_CELL_PX = 64
+TILE_SIZE = 256
+
+def project(lat, lon, zoom):
+    """Project WGS84 coordinates to global Web Mercator pixel coordinates"""
+    world_size = TILE_SIZE * 2 ** zoom
+    sin_lat = min(max(math.sin(math.radians(lat)), -0.9999), 0.9999)
+    x = (lon + 180.0) / 360.0 * world_size
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * world_size
+    return x, y
+
+def grid_cell(lat, lon, zoom, cell_px=CLUSTER_CELL_PX):
+    """Grid cell (cell_x, cell_y) containing a point at a zoom level"""
+    x, y = project(lat, lon, zoom)
+    return int(x // cell_px), int(y // cell_px)
+
+def cluster_points(points, zoom, cell_px=CLUSTER_CELL_PX):
+    """Group (id, lat, lon) tuples into grid clusters for one zoom level
+
+    Returns cluster dicts with the member centroid, member count and, for
+    single-member clusters, the business id.
+    """
+    return aggregate_cells(
+        ((grid_cell(lat, lon, zoom, cell_px), business_id, lat, lon) for business_id, lat, lon in points),
+        zoom
+    )
+
+def aggregate_cells(keyed_points, zoom):
+    """Build cluster dicts from (cell, id, lat, lon) tuples, see cluster_points()"""
+    cells = {}
+    for key, business_id, lat, lon in keyed_points:
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [1, lat, lon, business_id]
+        else:
+            cell[0] += 1
+            cell[1] += lat
+            cell[2] += lon
+    
+    clusters = []
+    for (cell_x, cell_y), (count, lat_sum, lon_sum, business_id) in cells.items():
+        clusters.append({
+            'zoom': zoom,
+            'cell_x': cell_x,
+            'cell_y': cell_y,
+            'count': count,
+            'lat': lat_sum / count,
+            'lon': lon_sum / count,
+            'business_id': business_id if count == 1 else None
+        })
+    return clusters
+
+def merge_clusters(clusters, zoom, cell_px=CLUSTER_CELL_PX):
+    """Regroup cluster dicts of a finer zoom level into the grid cells of zoom
+
+    Used below MIN_CLUSTER_ZOOM, where the precomputed cells are finer than
+    the screen grid. Centroids are weighted by the member counts.
+    """
+    cells = {}
+    for cluster in clusters:
+        key = grid_cell(cluster['lat'], cluster['lon'], zoom, cell_px)
+        count = cluster['count']
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [count, cluster['lat'] * count, cluster['lon'] * count, cluster['business_id']]
+        else:
+            cell[0] += count
+            cell[1] += cluster['lat'] * count
+            cell[2] += cluster['lon'] * count
+    
+    return [
+        {
+            'zoom': zoom,
+            'cell_x': cell_x,
+            'cell_y': cell_y,
+            'count': count,
+            'lat': lat_sum / count,
+            'lon': lon_sum / count,
+            'business_id': business_id if count == 1 else None
+        }
+        for (cell_x, cell_y), (count, lat_sum, lon_sum, business_id) in cells.items()
+    ]
+
+def create_cluster_table(conn):
+    """Create the map_clusters table"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS map_clusters (
+            zoom INTEGER NOT NULL,
+            cell_x INTEGER NOT NULL,
+            cell_y INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL,
+            business_id TEXT,
+            PRIMARY KEY (zoom, cell_x, cell_y)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_map_clusters_zoom_lat ON map_clusters(zoom, lat)')
+    conn.commit()
+
+def build_cluster_table(conn, min_zoom=MIN_CLUSTER_ZOOM, max_zoom=MAX_CLUSTER_ZOOM):
+    """Recompute map_clusters for every zoom level from the businesses table"""
+    create_cluster_table(conn)
+    
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, lat, lon FROM businesses WHERE lat IS NOT NULL AND lon IS NOT NULL')
+    points = cursor.fetchall()
+    
+    cursor.execute('DELETE FROM map_clusters')
+    cluster_counts = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        clusters = cluster_points(points, zoom)
+        cursor.executemany('''
+            INSERT INTO map_clusters (zoom, cell_x, cell_y, count, lat, lon, business_id)
+            VALUES (:zoom, :cell_x, :cell_y, :count, :lat, :lon, :business_id)
+        ''', clusters)
+        cluster_counts[zoom] = len(clusters)
+    
+    conn.commit()
+    return cluster_counts
+
+def update_cluster_cells(conn, points, min_zoom=MIN_CLUSTER_ZOOM, max_zoom=MAX_CLUSTER_ZOOM):
+    """Recompute only the clusters of the cells containing the given points
+
+    points are (lat, lon) tuples; after incremental changes pass the old
+    and the new position of every inserted, moved or deleted business.
+    Returns the number of cells recomputed.
+    """
+    create_cluster_table(conn)
+    
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, lat, lon FROM businesses WHERE lat IS NOT NULL AND lon IS NOT NULL')
+    rows = cursor.fetchall()
+    
+    # Project once at max_zoom: lower zooms only divide by a power of two,
+    # which is exact, so the cells match grid_cell() bit for bit
+    projected = [project(lat, lon, max_zoom) for _, lat, lon in rows]
+    
+    recomputed = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        cells = {grid_cell(lat, lon, zoom) for lat, lon in points}
+        cell_size = CLUSTER_CELL_PX * 2 ** (max_zoom - zoom)
+        members = []
+        for (business_id, lat, lon), (x, y) in zip(rows, projected):
+            key = (int(x // cell_size), int(y // cell_size))
+            if key in cells:
+                members.append((key, business_id, lat, lon))
+        
+        cursor.executemany(
+            'DELETE FROM map_clusters WHERE zoom = ? AND cell_x = ? AND cell_y = ?',
+            [(zoom, cell_x, cell_y) for cell_x, cell_y in cells]
+        )
+        cursor.executemany('''
+            INSERT INTO map_clusters (zoom, cell_x, cell_y, count, lat, lon, business_id)
+            VALUES (:zoom, :cell_x, :cell_y, :count, :lat, :lon, :business_id)
+        ''', aggregate_cells(members, zoom))
+        recomputed += len(cells)
+    
+    conn.commit()
+    return recomputed
+
+def get_clusters(conn, zoom, bbox=None):
+    """Get precomputed clusters for a zoom level, optionally inside a bbox
+
+    Zoom levels past MAX_CLUSTER_ZOOM get the MAX_CLUSTER_ZOOM clusters;
+    below MIN_CLUSTER_ZOOM the MIN_CLUSTER_ZOOM clusters are merged into
+    that zoom's coarser grid, see merge_clusters(). bbox is
+    (min_lat, min_lon, max_lat, max_lon).
+    """
+    requested_zoom = int(zoom)
+    zoom = min(max(requested_zoom, MIN_CLUSTER_ZOOM), MAX_CLUSTER_ZOOM)
+    
+    query = '''
+        SELECT zoom, cell_x, cell_y, count, lat, lon, business_id
+        FROM map_clusters
+        WHERE zoom = ?
+    '''
+    params = [zoom]
+    
+    if bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        query += ' AND lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?'
+        params.extend([min_lat, max_lat, min_lon, max_lon])
+    
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    
+    columns = ('zoom', 'cell_x', 'cell_y', 'count', 'lat', 'lon', 'business_id')
+    clusters = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    if requested_zoom < MIN_CLUSTER_ZOOM:
+        clusters = merge_clusters(clusters, requested_zoom)
+    return clusters
@@ -0,0 +1,166 @@
+"""
+JSON codec shared by the pipeline scripts, the search layer and the API
+Uses msgspec or orjson when installed and falls back to the standard library json
+"""
+
+import json
+import os
+from typing import Any, List, Optional
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Force a backend with BERLIN_JSON_BACKEND=msgspec|orjson|json
+_requested = os.environ.get('BERLIN_JSON_BACKEND', '').lower()
+if _requested == 'json' or (_requested == 'orjson' and orjson is not None):
+    BACKEND = _requested
+elif msgspec is not None and _requested in ('', 'msgspec'):
+    BACKEND = 'msgspec'
+elif orjson is not None:
+    BACKEND = 'orjson'
+else:
+    BACKEND = 'json'
+
+# Exceptions raised for malformed input by whichever backend is active
+# (orjson.JSONDecodeError is a subclass of json.JSONDecodeError)
+DecodeError = (json.JSONDecodeError,)
+if msgspec is not None:
+    DecodeError += (msgspec.DecodeError,)
+
+if BACKEND == 'msgspec':
+    _decoder = msgspec.json.Decoder()
+    _encoder = msgspec.json.Encoder()
+    
+    def loads(data):
+        """Decode a JSON document from str or bytes"""
+        return _decoder.decode(data)
+    
+    def dumps(obj, indent=False):
+        """Encode obj as a JSON string (UTF-8, not ASCII-escaped)"""
+        raw = _encoder.encode(obj)
+        if indent:
+            raw = msgspec.json.format(raw, indent=2)
+        return raw.decode('utf-8')
+
+elif BACKEND == 'orjson':
+    def loads(data):
+        """Decode a JSON document from str or bytes"""
+        return orjson.loads(data)
+    
+    def dumps(obj, indent=False):
+        """Encode obj as a JSON string (UTF-8, not ASCII-escaped)"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode('utf-8')
+
+else:
+    def loads(data):
+        """Decode a JSON document from str or bytes"""
+        return json.loads(data)
+    
+    def dumps(obj, indent=False):
+        """Encode obj as a JSON string (UTF-8, not ASCII-escaped)"""
+        if indent:
+            return json.dumps(obj, ensure_ascii=False, indent=2)
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+if BACKEND == 'msgspec':
+    # Typed views of the two raw record shapes. Only the fields the pipeline
+    # reads are declared; everything else in a record is skipped while
+    # decoding instead of being materialised as nested dicts. Leaf values are
+    # Any so that numbers and strings are accepted wherever the stdlib path
+    # accepts them, and lists are Optional because the raw data has nulls
+    # where a list is expected.
+    
+    class _Record(msgspec.Struct, omit_defaults=True):
+        pass
+    
+    # gsbestand-559.json
+    class GsAdresse(_Record):
+        postleitzahl: Any = None
+        ortsname: Any = None
+    
+    class GsPerson(_Record):
+        name: Any = None
+    
+    class GsKontaktinformationen(_Record):
+        adresse: GsAdresse = msgspec.field(default_factory=GsAdresse)
+        personListe: Optional[List[GsPerson]] = None
+    
+    class GsVerlagsdaten(_Record):
+        kontaktinformationen: GsKontaktinformationen = msgspec.field(
+            default_factory=GsKontaktinformationen
+        )
+        branchenIdListe: Any = None
+    
+    class GsbestandRecord(_Record):
+        id: Any = msgspec.field(default=None, name='_id')
+        verlagsdaten: GsVerlagsdaten = msgspec.field(default_factory=GsVerlagsdaten)
+    
+    # berlin_business_data.jsonl
+    class Koordinate(_Record):
+        format: Any = None
+        x: Any = None
+        y: Any = None
+    
+    class Geodaten(_Record):
+        koordinaten: Optional[List[Koordinate]] = None
+    
+    class TeilnehmerAdresse(_Record):
+        geodaten: Geodaten = msgspec.field(default_factory=Geodaten)
+        anzeige_strasse: Any = None
+        strasse: Any = None
+        hausnr: Any = None
+        stadtteil: Any = None
+    
+    class Telefon(_Record):
+        rufnummer: Any = None
+    
+    class Email(_Record):
+        email: Any = None
+    
+    class Www(_Record):
+        url: Any = None
+    
+    class Kontakt(_Record):
+        telefon: Optional[List[Telefon]] = None
+        email: Optional[List[Email]] = None
+        www: Optional[List[Www]] = None
+    
+    class Teilnehmer(_Record):
+        id: Any = None
+        adresse: TeilnehmerAdresse = msgspec.field(default_factory=TeilnehmerAdresse)
+        kontakt: Kontakt = msgspec.field(default_factory=Kontakt)
+    
+    class Daten(_Record):
+        teilnehmer: Teilnehmer = msgspec.field(default_factory=Teilnehmer)
+    
+    class Antwort(_Record):
+        daten: Daten = msgspec.field(default_factory=Daten)
+    
+    class PreciseDataRecord(_Record):
+        antwort: Antwort = msgspec.field(default_factory=Antwort)
+    
+    _gsbestand_decoder = msgspec.json.Decoder(GsbestandRecord)
+    _precise_data_decoder = msgspec.json.Decoder(PreciseDataRecord)
+    
+    # Structure mismatches (e.g. an address that is not an object) count as
+    # malformed records
+    DecodeError += (msgspec.ValidationError,)
+    
+    def decode_gsbestand(line):
+        """Decode a gsbestand line into a dict holding only the fields the pipeline reads"""
+        return msgspec.to_builtins(_gsbestand_decoder.decode(line))
+    
+    def decode_precise_data(line):
+        """Decode a berlin_business_data.jsonl line into a dict holding only the fields the pipeline reads"""
+        return msgspec.to_builtins(_precise_data_decoder.decode(line))
+
+else:
+    decode_gsbestand = loads
+    decode_precise_data = loads
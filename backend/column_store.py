@@ -0,0 +1,215 @@
+"""
+In-process column store of the geocoded businesses for the serving tier
+Category, city, district, postal code and bbox filters run vectorized over NumPy arrays
+"""
+
+import sys
+
+import numpy as np
+
+from backend import geo, search_engine
+
+# Set BERLIN_COLUMN_STORE=1 to serve filters from a BusinessStore
+ENV_FLAG = 'BERLIN_COLUMN_STORE'
+
+# Rows fetched from SQLite per batch while loading
+LOAD_BATCH_SIZE = 50000
+
+def intern_codes(values):
+    """Encode values as int32 codes, returning (codes, {value: code}, [value, ...])"""
+    lookup = {}
+    codes = np.fromiter(
+        (lookup.setdefault(value, len(lookup)) for value in values),
+        dtype=np.int32, count=len(values)
+    )
+    return codes, lookup, list(lookup)
+
+class BusinessStore:
+    """Read-only, array-backed copy of the filter and sort columns
+
+    One entry per geocoded business, in rowid order (an entry's position in
+    the arrays is its index):
+
+    - rowids: int64, ascending, the link back to the SQLite row
+    - lat, lon: float64, so bbox filters agree exactly with SQLite
+    - city, district, postal_code: int32 codes into interned value lists
+    - by_name: int32 indices in (name, rowid) order, the unranked sort
+    - categories: per-category index lists in CSR form, expanded into a
+      membership bitmask only for the category being filtered
+
+    Text columns are not kept: result pages are hydrated from SQLite by
+    rowid, so only the page being returned is ever materialized as dicts.
+    Text search still goes through businesses_fts; its bm25-ranked rowids
+    are then filtered here.
+    """
+    
+    def __init__(self, rowids, lat, lon, city, district, postal_code, by_name,
+                 category_ids, category_offsets, category_members, values, version=None):
+        self.rowids = rowids
+        self.lat = lat
+        self.lon = lon
+        self.city = city
+        self.district = district
+        self.postal_code = postal_code
+        self.by_name = by_name
+        self.category_ids = category_ids
+        self.category_offsets = category_offsets
+        self.category_members = category_members
+        # column -> ({value: code}, [value, ...])
+        self.values = values
+        # statistics.last_updated of the database the store was loaded from
+        self.version = version
+    
+    @classmethod
+    def from_connection(cls, conn):
+        """Load the store from an open database connection"""
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT rowid, lat, lon, city, district, postal_code, name
+            FROM businesses
+            WHERE lat IS NOT NULL
+            ORDER BY rowid
+        ''')
+        columns = [[] for _ in range(7)]
+        while True:
+            batch = cursor.fetchmany(LOAD_BATCH_SIZE)
+            if not batch:
+                break
+            for column, batch_values in zip(columns, zip(*batch)):
+                column.extend(batch_values)
+        rowid_list, lat_list, lon_list, city_list, district_list, postal_list, names = columns
+        
+        count = len(rowid_list)
+        rowids = np.array(rowid_list, dtype=np.int64)
+        lat = np.array(lat_list, dtype=np.float64)
+        lon = np.array(lon_list, dtype=np.float64)
+        
+        values = {}
+        codes = {}
+        for column, column_values in (
+            ('city', city_list), ('district', district_list), ('postal_code', postal_list)
+        ):
+            codes[column], lookup, interned = intern_codes(column_values)
+            values[column] = (lookup, interned)
+        
+        # sorted() is stable and the rows are in rowid order, so ties keep
+        # the (name, rowid) order of search_businesses_page() and
+        # search_in_bbox()
+        by_name = np.array(sorted(range(count), key=names.__getitem__), dtype=np.int32)
+        del columns, names
+        
+        # Category memberships as CSR, restricted to geocoded businesses
+        cursor.execute('''
+            SELECT bc.category_id, b.rowid
+            FROM business_categories bc
+            JOIN businesses b ON b.id = bc.business_id
+            WHERE b.lat IS NOT NULL
+        ''')
+        links = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+        members = np.searchsorted(rowids, links[:, 1]).astype(np.int32)
+        order = np.lexsort((members, links[:, 0]))
+        link_categories = links[order, 0]
+        category_ids, starts = np.unique(link_categories, return_index=True)
+        category_offsets = np.append(starts, len(link_categories)).astype(np.int64)
+        
+        version = search_engine.get_statistics(conn).get('last_updated')
+        return cls(
+            rowids, lat, lon, codes['city'], codes['district'], codes['postal_code'],
+            by_name, category_ids, category_offsets, members[order], values, version
+        )
+    
+    def __len__(self):
+        return len(self.rowids)
+    
+    def category_indices(self, category_id):
+        """Indices of the businesses in a category (empty if unknown)"""
+        position = np.searchsorted(self.category_ids, category_id)
+        if position >= len(self.category_ids) or self.category_ids[position] != category_id:
+            return self.category_members[:0]
+        start, end = self.category_offsets[position], self.category_offsets[position + 1]
+        return self.category_members[start:end]
+    
+    def _value_mask(self, column, value):
+        """Bitmask of the businesses whose interned column equals value"""
+        lookup, _ = self.values[column]
+        code = lookup.get(value)
+        if code is None:
+            return np.zeros(len(self), dtype=bool)
+        return getattr(self, column) == code
+    
+    def filter_mask(self, category_id=None, city="", bbox=None, district="", postal_code=""):
+        """Boolean mask of the businesses matching every given filter
+
+        bbox is an optional (min_lat, min_lon, max_lat, max_lon) tuple.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        
+        if category_id is not None:
+            in_category = np.zeros(len(self), dtype=bool)
+            in_category[self.category_indices(category_id)] = True
+            mask &= in_category
+        
+        for column, value in (('city', city), ('district', district), ('postal_code', postal_code)):
+            if value:
+                mask &= self._value_mask(column, value)
+        
+        if bbox is not None:
+            mask &= geo.bbox_mask(self.lat, self.lon, bbox)
+        
+        return mask
+    
+    def _fts_indices(self, conn, match_query):
+        """Indices of the geocoded full-text matches, best bm25 rank first"""
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT rowid FROM businesses_fts
+            WHERE businesses_fts MATCH ?
+            ORDER BY {search_engine.FTS_RANK}, rowid
+        ''', (match_query,))
+        matched = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+        if not len(self):
+            return self.by_name[:0]
+        
+        positions = np.searchsorted(self.rowids, matched)
+        positions[positions == len(self)] = 0
+        return positions[self.rowids[positions] == matched].astype(np.int32)
+    
+    def find(self, conn, search_term="", category_id=None, city="", bbox=None,
+             district="", postal_code=""):
+        """Indices of all matching businesses, in search result order
+
+        Ranked by bm25 when a text query is given, by (name, rowid) otherwise.
+        """
+        mask = self.filter_mask(category_id, city, bbox, district, postal_code)
+        match_query = search_engine.build_fts_query(search_term)
+        ordered = self._fts_indices(conn, match_query) if match_query else self.by_name
+        return ordered[mask[ordered]]
+    
+    def businesses(self, conn, indices):
+        """Hydrate full business dicts for the given indices, in order"""
+        return search_engine.get_businesses_by_rowids(conn, self.rowids[indices].tolist())
+    
+    def search(self, conn, search_term="", category_id=None, city="", bbox=None,
+               limit=100, offset=0, district="", postal_code=""):
+        """Same results, in the same order, as search_engine.search_businesses()/search_in_bbox()"""
+        indices = self.find(conn, search_term, category_id, city, bbox, district, postal_code)
+        return self.businesses(conn, indices[offset:offset + limit])
+    
+    def count(self, conn, search_term="", category_id=None, city="", bbox=None,
+              district="", postal_code=""):
+        """Same result as search_engine.count_businesses()"""
+        if not search_engine.build_fts_query(search_term):
+            return int(self.filter_mask(category_id, city, bbox, district, postal_code).sum())
+        return len(self.find(conn, search_term, category_id, city, bbox, district, postal_code))
+    
+    def memory_bytes(self):
+        """Approximate memory held by the store: arrays plus interned values"""
+        arrays = (
+            self.rowids, self.lat, self.lon, self.city, self.district, self.postal_code,
+            self.by_name, self.category_ids, self.category_offsets, self.category_members
+        )
+        total = sum(array.nbytes for array in arrays)
+        for lookup, interned in self.values.values():
+            total += sys.getsizeof(lookup) + sys.getsizeof(interned)
+            total += sum(sys.getsizeof(value) for value in interned)
+        return total
@@ -0,0 +1,211 @@
+"""
+SQLite connection handling for the serving tier
+Read-only connections shared through a fixed-size pool
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent / 'data' / 'berlin_businesses.db'
+
+# Applied to every read-only connection. The database itself is switched to
+# WAL when it is built (journal_mode is a property of the file and cannot be
+# changed from a read-only connection), so readers never wait for a writer.
+READ_PRAGMAS = {
+    'query_only': 'ON',
+    # Map the file instead of copying pages through read(); the mapping is
+    # shared by all connections via the OS page cache
+    'mmap_size': 256 * 1024 * 1024,
+    # Private page cache per connection, in KiB (negative values)
+    'cache_size': -16 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Set BERLIN_WARM_UP=indexes (or all) to warm the database up when a pool opens
+WARM_UP_ENV = 'BERLIN_WARM_UP'
+WARM_UP_MODES = ('indexes', 'all')
+
+# In warm-up mode mmap_size covers the whole file plus room for incremental
+# updates, capped at SQLite's default SQLITE_MAX_MMAP_SIZE
+MMAP_HEADROOM = 1.25
+MAX_MMAP_SIZE = 0x7fff0000
+
+# B-trees every search starts from: the secondary indexes and the FTS5 and
+# R*Tree shadow tables
+HOT_BTREES_SQL = '''
+    SELECT name FROM sqlite_schema
+    WHERE type = 'index' OR name GLOB 'businesses_fts_*' OR name GLOB 'businesses_rtree_*'
+'''
+
+# Bytes read per call when the whole file is pre-read
+WARM_UP_READ_SIZE = 1024 * 1024
+
+def open_read_only(db_path=DEFAULT_DB_PATH, pragmas=READ_PRAGMAS):
+    """Open a read-only connection usable from any thread"""
+    uri = f'{Path(db_path).resolve().as_uri()}?mode=ro'
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+def mmap_size_for(db_path):
+    """mmap_size mapping the whole database file, with MMAP_HEADROOM to grow"""
+    return min(MAX_MMAP_SIZE, int(os.path.getsize(db_path) * MMAP_HEADROOM))
+
+def _read_file(db_path):
+    """Read a file start to end, pulling it into the OS page cache; returns its size"""
+    size = 0
+    buffer = bytearray(WARM_UP_READ_SIZE)
+    with open(db_path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            size += read
+    return size
+
+def warm_page_cache(conn, db_path, mode='indexes'):
+    """Pull the database into the OS page cache ahead of the first search
+
+    mode 'indexes' walks the pages of the HOT_BTREES_SQL b-trees through
+    SQLite's dbstat table (falling back to 'all' if SQLite was built without
+    it); 'all' reads the whole file. The pages then serve every mmap'ed
+    connection without disk reads. Returns the mode used, pages, bytes and
+    seconds.
+    """
+    if mode not in WARM_UP_MODES:
+        raise ValueError(f"Unknown warm-up mode {mode!r}, expected one of {', '.join(WARM_UP_MODES)}")
+    
+    start = time.perf_counter()
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    pages = size = 0
+    if mode == 'indexes':
+        try:
+            for (name,) in conn.execute(HOT_BTREES_SQL).fetchall():
+                btree_pages, btree_bytes = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = ?', (name,)
+                ).fetchone()
+                pages += btree_pages
+                size += btree_bytes
+        except sqlite3.OperationalError:
+            mode = 'all'
+    if mode == 'all':
+        size = _read_file(db_path)
+        pages = size // page_size
+    
+    return {
+        'mode': mode,
+        'pages': pages,
+        'bytes': size,
+        'seconds': time.perf_counter() - start,
+    }
+
+def file_identity(db_path):
+    """(device, inode) of a file, which changes when the file is replaced"""
+    stat = os.stat(db_path)
+    return stat.st_dev, stat.st_ino
+
+class ConnectionPool:
+    """Fixed-size pool of read-only SQLite connections
+
+    Each connection is used by one thread at a time: callers check one out
+    with checkout() and hand it back with checkin(), or use connection() as
+    a with-block. A connection opened on a database file that has since
+    been replaced (build_database() renames a new file over the old one) is
+    reopened when it is next checked out.
+
+    With a warm_up mode (see warm_page_cache()), connections map the whole
+    file and the pool pre-reads the database once it is open; warm_up_stats
+    then holds what was read and how long it took.
+    """
+    
+    def __init__(self, db_path=DEFAULT_DB_PATH, size=4, pragmas=READ_PRAGMAS, warm_up=None):
+        db_path = Path(db_path)
+        if not db_path.exists():
+            raise FileNotFoundError(
+                f"Database not found at {db_path}. Please run the data processing scripts first."
+            )
+        
+        self.db_path = db_path
+        self.size = size
+        self.pragmas = pragmas
+        self.warm_up = warm_up
+        self.warm_up_stats = None
+        self._lock = threading.Lock()
+        # connection -> file_identity() of the file it was opened on
+        self._opened_on = {}
+        self._connections = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(self._open())
+        
+        if warm_up:
+            with self.connection() as conn:
+                self.warm_up_stats = warm_page_cache(conn, db_path, warm_up)
+            logger.info(
+                f"Warmed up {db_path.name} ({self.warm_up_stats['mode']}): "
+                f"{self.warm_up_stats['bytes'] / 1024 / 1024:.1f} MB in {self.warm_up_stats['seconds']:.2f} s"
+            )
+    
+    def _open(self):
+        identity = file_identity(self.db_path)
+        pragmas = self.pragmas
+        if self.warm_up:
+            mmap_size = max(pragmas.get('mmap_size', 0), mmap_size_for(self.db_path))
+            pragmas = {**pragmas, 'mmap_size': mmap_size}
+        conn = open_read_only(self.db_path, pragmas)
+        with self._lock:
+            self._opened_on[conn] = identity
+        return conn
+    
+    def _discard(self, conn):
+        with self._lock:
+            self._opened_on.pop(conn, None)
+        conn.close()
+    
+    def checkout(self, timeout=None):
+        """Take a connection out of the pool, waiting up to timeout seconds
+
+        Raises queue.Empty if none became free in time.
+        """
+        conn = self._connections.get(timeout=timeout)
+        try:
+            if self._opened_on.get(conn) != file_identity(self.db_path):
+                self._discard(conn)
+                conn = self._open()
+        except Exception:
+            # Keep the pool at full size; a closed connection is simply
+            # reopened by the next checkout()
+            self._connections.put(conn)
+            raise
+        return conn
+    
+    def checkin(self, conn):
+        """Return a connection taken with checkout()"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._connections.put(conn)
+    
+    @contextmanager
+    def connection(self, timeout=None):
+        """Check out a connection for the duration of a with-block"""
+        conn = self.checkout(timeout)
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+    
+    def close(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                self._discard(self._connections.get_nowait())
+            except queue.Empty:
+                break
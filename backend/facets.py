@@ -0,0 +1,240 @@
+"""
+Facet counts of geocoded businesses per category, city and district
+Precomputed into facet_* tables and kept current from a change log
+"""
+
+from backend.search_engine import build_fts_query, build_search_query
+
+# Count tables keyed by the columns they group geocoded businesses by; every
+# combination of filters get_facet_counts() can be asked for has its table
+FACET_TABLES = {
+    ('category_id',): 'facet_category',
+    ('city',): 'facet_city',
+    ('district',): 'facet_district',
+    ('category_id', 'city'): 'facet_category_city',
+    ('category_id', 'district'): 'facet_category_district',
+    ('city', 'district'): 'facet_city_district',
+    ('category_id', 'city', 'district'): 'facet_category_city_district',
+}
+
+# Facets returned by get_facet_counts(), in FACET_TABLES key column order
+FACET_DIMENSIONS = (
+    ('categories', 'category_id'),
+    ('cities', 'city'),
+    ('districts', 'district'),
+)
+
+COLUMN_TYPES = {'category_id': 'INTEGER', 'city': 'TEXT', 'district': 'TEXT'}
+
+def create_facet_tables(conn):
+    """Create the facet tables, the facet_changes log and the triggers filling it
+
+    The triggers only log the old and new (city, district, categories) of
+    geocoded businesses whose facet values change; apply_facet_changes()
+    folds the log into the counts in a few set-based statements, which is
+    much cheaper than updating every count table from each row's trigger.
+    """
+    cursor = conn.cursor()
+    for columns, table in FACET_TABLES.items():
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                {', '.join(f'{column} {COLUMN_TYPES[column]} NOT NULL' for column in columns)},
+                n INTEGER NOT NULL,
+                PRIMARY KEY ({', '.join(columns)})
+            ) WITHOUT ROWID
+        ''')
+        if len(columns) == 2:
+            # Lookups by the second column alone, e.g. the categories of a city
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{columns[1]} ON {table}({columns[1]}, n)')
+    
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS facet_changes (
+            sign INTEGER NOT NULL,
+            city TEXT,
+            district TEXT,
+            categories TEXT
+        );
+        
+        CREATE TRIGGER IF NOT EXISTS facet_changes_insert
+        AFTER INSERT ON businesses
+        WHEN new.lat IS NOT NULL
+        BEGIN
+            INSERT INTO facet_changes VALUES (1, new.city, new.district, new.categories);
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS facet_changes_update
+        AFTER UPDATE OF lat, city, district, categories ON businesses
+        WHEN (old.lat IS NULL) IS NOT (new.lat IS NULL)
+          OR old.city IS NOT new.city
+          OR old.district IS NOT new.district
+          OR old.categories IS NOT new.categories
+        BEGIN
+            INSERT INTO facet_changes
+            SELECT -1, old.city, old.district, old.categories WHERE old.lat IS NOT NULL;
+            INSERT INTO facet_changes
+            SELECT 1, new.city, new.district, new.categories WHERE new.lat IS NOT NULL;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS facet_changes_delete
+        AFTER DELETE ON businesses
+        WHEN old.lat IS NOT NULL
+        BEGIN
+            INSERT INTO facet_changes VALUES (-1, old.city, old.district, old.categories);
+        END;
+    ''')
+    conn.commit()
+
+def has_facet_tables(conn):
+    """Whether the database has the facet tables (older builds do not)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_schema WHERE name = 'facet_changes'")
+    return cursor.fetchone() is not None
+
+def _add_group_counts(cursor, with_category, groups_sql):
+    """Add groups_sql's (category_id,) city, district, n rows to the facet tables
+
+    with_category selects the tables keyed by category or the others.
+    Empty cities and districts are not counted.
+    """
+    cursor.execute(f'CREATE TEMP TABLE facet_groups AS {groups_sql}')
+    for columns, table in FACET_TABLES.items():
+        if ('category_id' in columns) != with_category:
+            continue
+        conditions = [f"{column} != ''" for column in columns if column != 'category_id']
+        cursor.execute(f'''
+            INSERT INTO {table} ({', '.join(columns)}, n)
+            SELECT {', '.join(columns)}, SUM(n)
+            FROM facet_groups
+            WHERE {' AND '.join(conditions) or '1'}
+            GROUP BY {', '.join(columns)}
+            HAVING SUM(n) != 0
+            ON CONFLICT ({', '.join(columns)}) DO UPDATE SET n = n + excluded.n
+        ''')
+    cursor.execute('DROP TABLE facet_groups')
+
+def build_facet_tables(conn):
+    """Recompute every facet table from the businesses table
+
+    Two GROUP BY passes, one over the businesses and one over their category
+    links, feed all tables. Returns the number of rows per table.
+    """
+    create_facet_tables(conn)
+    
+    cursor = conn.cursor()
+    for table in FACET_TABLES.values():
+        cursor.execute(f'DELETE FROM {table}')
+    cursor.execute('DELETE FROM facet_changes')
+    
+    _add_group_counts(cursor, False, '''
+        SELECT b.city, b.district, COUNT(*) AS n
+        FROM businesses b
+        WHERE b.lat IS NOT NULL
+        GROUP BY b.city, b.district
+    ''')
+    _add_group_counts(cursor, True, '''
+        SELECT bc.category_id, b.city, b.district, COUNT(*) AS n
+        FROM businesses b
+        JOIN business_categories bc ON bc.business_id = b.id
+        WHERE b.lat IS NOT NULL
+        GROUP BY bc.category_id, b.city, b.district
+    ''')
+    conn.commit()
+    
+    table_counts = {}
+    for table in FACET_TABLES.values():
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        table_counts[table] = cursor.fetchone()[0]
+    return table_counts
+
+def apply_facet_changes(conn):
+    """Fold the facet_changes log into the facet tables and clear it
+
+    Call after changing businesses, before categories no business uses any
+    more are deleted (their names are needed to resolve the logged
+    categories). Runs in the caller's transaction; does nothing on a
+    database without facet tables. Returns the number of changes applied.
+    """
+    if not has_facet_tables(conn):
+        return 0
+    
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM facet_changes')
+    change_count = cursor.fetchone()[0]
+    if not change_count:
+        return 0
+    
+    _add_group_counts(cursor, False, '''
+        SELECT city, district, SUM(sign) AS n
+        FROM facet_changes
+        GROUP BY city, district
+    ''')
+    # A category listed twice in one business counts once, as in business_categories
+    _add_group_counts(cursor, True, '''
+        SELECT category_id, city, district, SUM(sign) AS n
+        FROM (
+            SELECT DISTINCT ch.rowid, ch.sign, c.id AS category_id, ch.city, ch.district
+            FROM facet_changes ch, json_each(ch.categories) j
+            JOIN categories c ON c.name = trim(j.value)
+        )
+        GROUP BY category_id, city, district
+    ''')
+    for table in FACET_TABLES.values():
+        cursor.execute(f'DELETE FROM {table} WHERE n <= 0')
+    cursor.execute('DELETE FROM facet_changes')
+    return change_count
+
+def _stored_facet(conn, column, filters):
+    """column value -> count from the facet table covering column and filters"""
+    key = tuple(name for _, name in FACET_DIMENSIONS if name == column or name in filters)
+    conditions = ' AND '.join(f'{name} = ?' for name in filters) or '1'
+    cursor = conn.cursor()
+    cursor.execute(
+        f'SELECT {column}, n FROM {FACET_TABLES[key]} WHERE {conditions}',
+        list(filters.values())
+    )
+    return dict(cursor.fetchall())
+
+def _live_facet(conn, column, search_term, bbox, filters):
+    """column value -> count, grouped over the matching businesses"""
+    query, params, _ = build_search_query(
+        search_term, filters.get('category_id'), filters.get('city', ''), bbox,
+        columns='b.id, b.city, b.district'
+    )
+    if column == 'category_id':
+        query = f'''
+            SELECT bc.category_id, COUNT(*)
+            FROM ({query}) m
+            JOIN business_categories bc ON bc.business_id = m.id
+            GROUP BY bc.category_id
+        '''
+    else:
+        query = f"SELECT {column}, COUNT(*) FROM ({query}) m WHERE {column} != '' GROUP BY {column}"
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return dict(cursor.fetchall())
+
+def get_facet_counts(conn, search_term="", category_id=None, city="", bbox=None):
+    """Count geocoded businesses per category id, city and district
+
+    Each facet is counted under the filters of the other facets, so the
+    counts tell what picking another category or city would return.
+    Without a text query or bbox they are read from the facet tables,
+    otherwise (or on a database built without them) the matching
+    businesses are grouped on the fly.
+
+    Returns {'categories': {category_id: n}, 'cities': {city: n},
+    'districts': {district: n}}.
+    """
+    precomputed = not build_fts_query(search_term) and bbox is None and has_facet_tables(conn)
+    facets = {}
+    for facet, column in FACET_DIMENSIONS:
+        filters = {
+            name: value
+            for name, value in (('category_id', category_id), ('city', city or None))
+            if name != column and value is not None
+        }
+        if precomputed:
+            facets[facet] = _stored_facet(conn, column, filters)
+        else:
+            facets[facet] = _live_facet(conn, column, search_term, bbox, filters)
+    return facets
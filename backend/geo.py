@@ -0,0 +1,134 @@
+"""
+Geographic helpers for distance and bounding box calculations
+Scalar functions for single points, NumPy kernels for lat/lon arrays
+"""
+
+import math
+
+import numpy as np
+
+from backend.clustering import TILE_SIZE
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Length of one degree of latitude
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def bbox_around(lat, lon, radius_km):
+    """Bounding box (min_lat, min_lon, max_lat, max_lon) containing a circle
+
+    Every point within radius_km of (lat, lon) lies inside the returned box.
+    """
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    min_lat = max(-90.0, lat - d_lat)
+    max_lat = min(90.0, lat + d_lat)
+    
+    # Longitude degrees shrink towards the poles; use the widest latitude
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 90.0:
+        return min_lat, -180.0, max_lat, 180.0
+    
+    d_lon = radius_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(widest)))
+    if d_lon >= 180.0:
+        return min_lat, -180.0, max_lat, 180.0
+    
+    return min_lat, lon - d_lon, max_lat, lon + d_lon
+
+# Vectorized kernels over NumPy lat/lon arrays (degrees). Arguments broadcast
+# like NumPy arrays, so a scalar point can be compared against many.
+
+def haversine_km_array(lat1, lon1, lat2, lon2):
+    """Vectorized haversine_km()"""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(np.subtract(lon2, lon1))
+    
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+def distance_matrix_km(lats_a, lons_a, lats_b, lons_b):
+    """Distances between every point of a and every point of b, shape (len(a), len(b))"""
+    lats_a = np.asarray(lats_a, dtype=np.float64)[:, np.newaxis]
+    lons_a = np.asarray(lons_a, dtype=np.float64)[:, np.newaxis]
+    return haversine_km_array(lats_a, lons_a, np.asarray(lats_b), np.asarray(lons_b))
+
+def bbox_mask(lats, lons, bbox):
+    """Boolean mask of the points inside a (min_lat, min_lon, max_lat, max_lon) box"""
+    min_lat, min_lon, max_lat, max_lon = bbox
+    return (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+
+def points_bbox(lats, lons):
+    """Smallest (min_lat, min_lon, max_lat, max_lon) box around the points, None if empty"""
+    if len(lats) == 0:
+        return None
+    return float(np.min(lats)), float(np.min(lons)), float(np.max(lats)), float(np.max(lons))
+
+def centroid(lats, lons):
+    """Mean (lat, lon) of the points, None if empty"""
+    if len(lats) == 0:
+        return None
+    return float(np.mean(lats)), float(np.mean(lons))
+
+def within_radius(lats, lons, lat, lon, radius_km):
+    """Points within radius_km of (lat, lon), returning (indices, distances_km) nearest first
+
+    A bbox_around() pre-filter keeps the haversine evaluation to the
+    candidates that can possibly qualify.
+    """
+    candidates = np.flatnonzero(bbox_mask(lats, lons, bbox_around(lat, lon, radius_km)))
+    distances = haversine_km_array(lat, lon, lats[candidates], lons[candidates])
+    inside = distances <= radius_km
+    candidates, distances = candidates[inside], distances[inside]
+    
+    order = np.argsort(distances, kind='stable')
+    return candidates[order], distances[order]
+
+def mercator(lat, lon):
+    """Web Mercator world coordinates of a point, both in [0, 1], y growing southwards"""
+    sin_lat = min(max(math.sin(math.radians(lat)), -0.9999), 0.9999)
+    x = (lon + 180.0) / 360.0
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+def inverse_mercator(x, y):
+    """(lat, lon) of Web Mercator world coordinates, the inverse of mercator()"""
+    lon = x * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lat, lon
+
+def fit_bounds(bbox, width_px, height_px, padding_px=20, min_zoom=0, max_zoom=18):
+    """Map (center_lat, center_lon, zoom) showing all of bbox in a viewport
+
+    Like Leaflet's fitBounds(): the center is the middle of the box in Web
+    Mercator and zoom the largest integer level at which the box, plus
+    padding_px on every side, still fits into width_px x height_px.
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    left, top = mercator(max_lat, min_lon)
+    right, bottom = mercator(min_lat, max_lon)
+    center_lat, center_lon = inverse_mercator((left + right) / 2, (top + bottom) / 2)
+    
+    # World size in pixels at which each dimension exactly fills the viewport
+    usable_width = max(width_px - 2 * padding_px, 1)
+    usable_height = max(height_px - 2 * padding_px, 1)
+    fits = [
+        usable / span
+        for usable, span in ((usable_width, right - left), (usable_height, bottom - top))
+        if span > 0
+    ]
+    if not fits:
+        return center_lat, center_lon, max_zoom
+    
+    zoom = math.floor(math.log2(min(fits) / TILE_SIZE))
+    return center_lat, center_lon, min(max(zoom, min_zoom), max_zoom)
@@ -0,0 +1,120 @@
+"""
+Folium map layers for the business map
+Lazy popups: markers carry only coordinates, popup HTML is rendered on click
+"""
+
+from branca.element import MacroElement
+from jinja2 import Template
+from jinja2.utils import htmlsafe_json_dumps
+
+from backend import codec
+
+# Fields shipped per business, in lookup row order
+LAZY_POPUP_FIELDS = (
+    'id', 'name', 'postal_code', 'city', 'street_address',
+    'district', 'phone', 'email', 'website'
+)
+
+# Categories shown per popup (same as the eager popups)
+POPUP_MAX_CATEGORIES = 3
+
+# Coordinate precision shipped to the browser (~10 cm)
+COORD_DECIMALS = 6
+
+def compact_business_rows(businesses):
+    """Compact per-business lookup rows for LazyPopupMarkers
+
+    Each row is [lat, lon, *LAZY_POPUP_FIELDS, categories]; empty values
+    become '' so the JSON stays small.
+    """
+    rows = []
+    for business in businesses:
+        row = [
+            round(business['lat'], COORD_DECIMALS),
+            round(business['lon'], COORD_DECIMALS)
+        ]
+        row.extend(business.get(field) or '' for field in LAZY_POPUP_FIELDS)
+        row.append(business.get('categories', [])[:POPUP_MAX_CATEGORIES])
+        rows.append(row)
+    return rows
+
+def marker_rows_json(businesses):
+    """compact_business_rows() as JSON that is safe to inline in a <script>"""
+    return str(htmlsafe_json_dumps(compact_business_rows(businesses), dumps=codec.dumps))
+
+class LazyPopupMarkers(MacroElement):
+    """Business markers whose popup HTML is built in the browser on click
+
+    Instead of one folium.Marker with a full inline-styled popup per
+    business, the map gets a single compact JSON table and one shared
+    popup template. The rendered popup matches create_map()'s eager one.
+    """
+    
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function() {
+                var rows = {{ this.rows_json }};
+                var icon = L.AwesomeMarkers.icon({
+                    icon: 'info-sign', markerColor: 'orange', prefix: 'glyphicon', iconColor: 'white'
+                });
+                var layer = L.featureGroup();
+                
+                function esc(value) {
+                    return String(value).replace(/[&<>"']/g, function(c) {
+                        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                    });
+                }
+                
+                function contact(label, href, text, target) {
+                    return '<p style="color:#666;font-size:13px;margin:8px 0 4px 0;line-height:1.6;">'
+                        + '<strong>' + label + '</strong><br/>'
+                        + '<a href="' + esc(href) + '"' + (target ? ' target="_blank"' : '')
+                        + ' style="color:#2196F3;text-decoration:none;">' + esc(text) + '</a></p>';
+                }
+                
+                function renderPopup(r) {
+                    // r = [lat, lon, id, name, postal_code, city, street_address, district, phone, email, website, categories]
+                    var place = esc(r[4]) + ' ' + esc(r[5]);
+                    var address = r[6] ? esc(r[6]) + ', ' + place + (r[7] ? ' (' + esc(r[7]) + ')' : '') : place;
+                    var categories = r[11].map(function(cat) {
+                        return '<span style="background:#FFD700;padding:4px 10px;border-radius:12px;margin:2px;'
+                            + 'display:inline-block;font-size:12px;font-weight:600;color:#333;">' + esc(cat) + '</span>';
+                    }).join('');
+                    var button = 'display:inline-block;color:#333;padding:8px 16px;border-radius:6px;'
+                        + 'text-decoration:none;font-weight:600;font-size:12px;';
+                    
+                    return '<div style="width:320px;font-family:Arial,sans-serif;padding:10px;">'
+                        + '<h3 style="color:#333;margin:0 0 12px 0;font-size:17px;font-weight:700;'
+                        + 'border-bottom:2px solid #FFD700;padding-bottom:8px;">' + esc(r[3]) + '</h3>'
+                        + '<div style="margin:10px 0;">' + categories + '</div>'
+                        + '<div style="background:#f9f9f9;padding:12px;border-radius:8px;margin:10px 0;">'
+                        + '<p style="color:#666;font-size:13px;margin:4px 0;line-height:1.6;">'
+                        + '<strong>📍 Address:</strong><br/>' + address + '</p>'
+                        + (r[8] ? contact('☎️ Phone:', 'tel:' + r[8], r[8]) : '')
+                        + (r[9] ? contact('📧 Email:', 'mailto:' + r[9], r[9]) : '')
+                        + (r[10] ? contact('🌐 Website:', r[10], r[10], true) : '')
+                        + '</div><div style="margin-top:12px;">'
+                        + '<a href="https://www.google.com/maps/search/?api=1&query=' + r[0] + ',' + r[1] + '" target="_blank" '
+                        + 'style="' + button + 'background:#FFD700;margin-right:5px;">🚗 Get Directions</a>'
+                        + '<a href="https://www.google.com/search?q=' + encodeURIComponent(r[3] + ' ' + r[4] + ' ' + r[5])
+                        + '" target="_blank" style="' + button + 'background:#FFC107;">🔍 Search</a>'
+                        + '</div></div>';
+                }
+                
+                rows.forEach(function(r) {
+                    L.marker([r[0], r[1]], {icon: icon})
+                        .bindTooltip(esc(r[3] + ' - ' + r[5]))
+                        .bindPopup(function() { return renderPopup(r); }, {maxWidth: 320})
+                        .addTo(layer);
+                });
+                
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}
+    """)
+    
+    def __init__(self, businesses):
+        super().__init__()
+        self._name = 'LazyPopupMarkers'
+        self.rows_json = marker_rows_json(businesses)
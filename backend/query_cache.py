@@ -0,0 +1,128 @@
+"""
+In-process cache for query results, shared by the Streamlit app and the API
+Size-bounded LRU with TTL, emptied whenever statistics.last_updated changes
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from backend import search_engine
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 300
+
+# How often the database version is re-read; changes show up at most this late
+DEFAULT_VERSION_CHECK_SECONDS = 5
+
+def make_key(kind, search_term="", category_id=None, city="", limit=None, bbox=None, **extra):
+    """Normalized cache key of a query
+
+    Search terms are reduced to their folded, lower-cased tokens, which is
+    all the FTS query sees, so "Müller!", "mueller" and " MUELLER " share
+    one entry. extra holds any further arguments (offset, cursor, ...).
+    """
+    terms = tuple(term.lower() for term in search_engine.tokenize_query(search_term))
+    return (
+        kind, terms, category_id, city or '', limit,
+        tuple(bbox) if bbox is not None else None,
+        tuple(sorted(extra.items()))
+    )
+
+class QueryCache:
+    """Thread-safe LRU + TTL cache of query results, tied to one database version
+
+    Cached values are shared between callers and must not be modified.
+    """
+    
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 version_check_seconds=DEFAULT_VERSION_CHECK_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_check_seconds = version_check_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expires_at, value), least recently used first
+        self._entries = OrderedDict()
+        self._version_checked_at = None
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def reset(self, version):
+        """Drop all entries if they were computed from another database version"""
+        with self._lock:
+            if version == self.version:
+                return False
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+        return True
+    
+    def check_version(self, conn):
+        """reset() to the database's statistics.last_updated, at most every version_check_seconds"""
+        now = self._clock()
+        checked_at = self._version_checked_at
+        if checked_at is not None and now - checked_at < self.version_check_seconds:
+            return False
+        self._version_checked_at = now
+        return self.reset(search_engine.get_statistics(conn).get('last_updated', ''))
+    
+    def get_or_compute(self, conn, key, compute):
+        """Cached value for key, calling compute() on a miss
+
+        conn is only used to check the database version.
+        """
+        self.check_version(conn)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            version = self.version
+        
+        # Computed outside the lock so slow queries don't block cache hits
+        value = compute()
+        
+        with self._lock:
+            # A value computed across a version change may already be stale
+            if version == self.version:
+                self._entries[key] = (self._clock() + self.ttl_seconds, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+    
+    def clear(self):
+        """Drop all entries, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+    
+    def metrics(self):
+        """Hit/miss and eviction counters plus the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'version': self.version,
+            }
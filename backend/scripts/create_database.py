@@ -1,31 +1,75 @@
 """
 Create SQLite database from geocoded Berlin businesses
+With --incremental, only the changes against an existing database are applied
 """
 
-import json
+import argparse
+import hashlib
+import os
 import sqlite3
 import logging
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('database_creation.log'),
-        logging.StreamHandler()
-    ]
+# Make the shared backend package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import codec
+from backend.search_engine import (
+    FTS_TOKENIZER, FTS_PREFIX_INDEXES, fold_sql, categories_text_sql
 )
+from backend.clustering import build_cluster_table, update_cluster_cells
+from backend.facets import apply_facet_changes, build_facet_tables, has_facet_tables
+
 logger = logging.getLogger(__name__)
 
+# Columns filled from a business dict, in business_row() order
+BUSINESS_FIELDS = (
+    'id', 'name', 'postal_code', 'city', 'lat', 'lon', 'categories', 'branch_ids',
+    'street_address', 'district', 'phone', 'email', 'website'
+)
+
+# Load-time settings for a database file nobody reads yet, see bulk_load_pragmas()
+BULK_LOAD_PRAGMAS = {
+    'journal_mode': 'OFF',
+    'synchronous': 'OFF',
+    'cache_size': -262144,  # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+# Journal mode of the finished database: with WAL, the read-only serving
+# connections (backend/db.py) keep reading while the updaters write
+SERVING_JOURNAL_MODE = 'WAL'
+
+# checkpoint_wal() tries a busy checkpoint this often, doubling the wait
+# between attempts from CHECKPOINT_RETRY_SECONDS (7.5 s in total)
+CHECKPOINT_ATTEMPTS = 5
+CHECKPOINT_RETRY_SECONDS = 0.5
+
+# FTS5 default for the number of segments merged at a time
+FTS_AUTOMERGE = 4
+
+# Rows per executemany() in insert_businesses(); a batch that fails is
+# retried row by row
+INSERT_BATCH_SIZE = 10000
+
+# Columns added after the first schema version, see add_missing_columns()
+ADDED_COLUMNS = (
+    'street_address', 'district', 'phone', 'email', 'website', 'content_hash', 'coord_source'
+)
+
 def create_database_schema(conn):
     """Create database schema"""
     logger.info("Creating database schema...")
     
     cursor = conn.cursor()
     
-    # Create businesses table
+    # Create businesses table; coord_source is 'precise' once lat/lon come
+    # from berlin_business_data.jsonl instead of the postal code centroid
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS businesses (
             id TEXT PRIMARY KEY,
@@ -36,81 +80,182 @@ def create_database_schema(conn):
             lon REAL,
             categories TEXT,
             branch_ids TEXT,
+            street_address TEXT,
+            district TEXT,
+            phone TEXT,
+            email TEXT,
+            website TEXT,
+            content_hash TEXT,
+            coord_source TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
     
-    # Create indexes for faster queries
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_postal_code ON businesses(postal_code)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_city ON businesses(city)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_lat_lon ON businesses(lat, lon)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_name ON businesses(name)')
-    
     # Create full-text search virtual table
-    cursor.execute('''
+    # Stores German-folded text (see backend/search_engine.py), rowid = businesses.rowid
+    cursor.execute(f'''
         CREATE VIRTUAL TABLE IF NOT EXISTS businesses_fts USING fts5(
-            id UNINDEXED,
             name,
             categories,
-            content=businesses,
-            content_rowid=rowid
+            tokenize='{FTS_TOKENIZER}',
+            prefix='{FTS_PREFIX_INDEXES}'
+        )
+    ''')
+    
+    # Normalized categories: one row per distinct category name and a
+    # junction table so category filters are exact index lookups
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS business_categories (
+            category_id INTEGER NOT NULL REFERENCES categories(id),
+            business_id TEXT NOT NULL REFERENCES businesses(id),
+            PRIMARY KEY (category_id, business_id)
+        ) WITHOUT ROWID
+    ''')
+    
+    # R*Tree spatial index over business coordinates, id = businesses.rowid
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS businesses_rtree USING rtree(
+            id,
+            min_lat, max_lat,
+            min_lon, max_lon
         )
     ''')
     
     conn.commit()
     logger.info("Database schema created successfully")
 
+def create_indexes(conn):
+    """Create the secondary indexes
+
+    Called after the bulk load: building an index once is much faster than
+    maintaining it row by row during the inserts.
+    """
+    logger.info("Creating indexes...")
+    
+    cursor = conn.cursor()
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_postal_code ON businesses(postal_code)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_city ON businesses(city)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_lat_lon ON businesses(lat, lon)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_name ON businesses(name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_business_categories_business ON business_categories(business_id)')
+    conn.commit()
+
+@contextmanager
+def bulk_load_pragmas(conn):
+    """Apply BULK_LOAD_PRAGMAS for the duration of a load, then restore the previous values
+
+    Only safe for a database file that is thrown away if the load fails,
+    like the temporary file of build_database().
+    """
+    conn.commit()
+    previous = {name: conn.execute(f'PRAGMA {name}').fetchone()[0] for name in BULK_LOAD_PRAGMAS}
+    for name, value in BULK_LOAD_PRAGMAS.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    
+    try:
+        yield
+    finally:
+        conn.commit()
+        for name, value in previous.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+
+def add_missing_columns(conn):
+    """Add columns introduced by later schema versions to an existing businesses table"""
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA table_info(businesses)')
+    existing = {row[1] for row in cursor.fetchall()}
+    
+    for column in ADDED_COLUMNS:
+        if column not in existing:
+            logger.info(f"Adding column {column}...")
+            cursor.execute(f'ALTER TABLE businesses ADD COLUMN {column} TEXT')
+    conn.commit()
+
+def business_row(business):
+    """Column values of a business dict in BUSINESS_FIELDS order"""
+    return (
+        business.get('id', ''),
+        business.get('name', ''),
+        business.get('postal_code', ''),
+        business.get('city', ''),
+        business.get('lat'),
+        business.get('lon'),
+        codec.dumps(business.get('categories', [])),
+        codec.dumps(business.get('branch_ids', [])),
+        business.get('street_address'),
+        business.get('district'),
+        business.get('phone'),
+        business.get('email'),
+        business.get('website')
+    )
+
+def content_hash(row):
+    """Hash of a business_row(), stored to detect changed records on the next load"""
+    return hashlib.sha1(codec.dumps(row).encode('utf-8')).hexdigest()
+
 def insert_businesses(conn, businesses):
-    """Insert businesses into database"""
-    logger.info(f"Inserting {len(businesses):,} businesses...")
+    """Bulk insert businesses and build the full-text index
+
+    businesses may be any iterable of business dicts, e.g. a generator
+    streaming from the pipeline; it is consumed once and inserted in
+    batches of INSERT_BATCH_SIZE rows. Businesses without a name, and rows
+    SQLite rejects, are skipped.
+    """
+    logger.info("Inserting businesses...")
     
     cursor = conn.cursor()
+    insert_sql = '''
+        INSERT OR REPLACE INTO businesses 
+        (id, name, postal_code, city, lat, lon, categories, branch_ids,
+         street_address, district, phone, email, website, content_hash, coord_source)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
     inserted_count = 0
     skipped_count = 0
     
-    for i, business in enumerate(businesses):
+    def rows():
+        nonlocal skipped_count
+        for business in businesses:
+            row = business_row(business)
+            if row[1] is None:
+                logger.warning(f"Skipping business {row[0]}: no name")
+                skipped_count += 1
+                continue
+            yield row + (content_hash(row), business.get('coord_source'))
+    
+    pending = rows()
+    while True:
+        batch = list(islice(pending, INSERT_BATCH_SIZE))
+        if not batch:
+            break
+        
+        previous_count = inserted_count
         try:
-            # Convert categories list to JSON string
-            categories_json = json.dumps(business.get('categories', []))
-            branch_ids_json = json.dumps(business.get('branch_ids', []))
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO businesses 
-                (id, name, postal_code, city, lat, lon, categories, branch_ids)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                business.get('id', ''),
-                business.get('name', ''),
-                business.get('postal_code', ''),
-                business.get('city', ''),
-                business.get('lat'),
-                business.get('lon'),
-                categories_json,
-                branch_ids_json
-            ))
-            
-            inserted_count += 1
-            
-            # Progress logging
-            if (i + 1) % 10000 == 0:
-                logger.info(f"Progress: {i + 1:,}/{len(businesses):,} businesses inserted...")
-                conn.commit()  # Commit in batches
+            cursor.executemany(insert_sql, batch)
+            inserted_count += len(batch)
+        except sqlite3.Error:
+            # The rows before the failing one are already in; inserting
+            # them again just replaces them
+            for row in batch:
+                try:
+                    cursor.execute(insert_sql, row)
+                    inserted_count += 1
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to insert business {row[1]}: {e}")
+                    skipped_count += 1
         
-        except sqlite3.Error as e:
-            logger.warning(f"Failed to insert business {business.get('name')}: {e}")
-            skipped_count += 1
-            continue
-    
-    # Final commit
+        if inserted_count // 100000 > previous_count // 100000:
+            logger.info(f"Progress: {inserted_count:,} businesses inserted...")
     conn.commit()
     
-    # Update FTS index
-    logger.info("Updating full-text search index...")
-    cursor.execute('''
-        INSERT INTO businesses_fts(rowid, id, name, categories)
-        SELECT rowid, id, name, categories FROM businesses
-    ''')
-    conn.commit()
+    build_fts_index(conn)
     
     logger.info("="*60)
     logger.info(f"Database population complete!")
@@ -118,6 +263,310 @@ def insert_businesses(conn, businesses):
     logger.info(f"  Skipped: {skipped_count:,}")
     logger.info("="*60)
 
+def build_fts_index(conn):
+    """Fill the empty businesses_fts from the businesses table"""
+    # Build the FTS index in one pass: without automerge the segments are
+    # merged only once, by the final optimize
+    logger.info("Updating full-text search index...")
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO businesses_fts(businesses_fts, rank) VALUES('automerge', 0)")
+    cursor.execute(f'''
+        INSERT INTO businesses_fts(rowid, name, categories)
+        SELECT rowid, {fold_sql('name')}, {fold_sql(categories_text_sql('categories'))}
+        FROM businesses
+    ''')
+    cursor.execute("INSERT INTO businesses_fts(businesses_fts) VALUES('optimize')")
+    cursor.execute(
+        "INSERT INTO businesses_fts(businesses_fts, rank) VALUES('automerge', ?)",
+        (FTS_AUTOMERGE,)
+    )
+    conn.commit()
+
+def populate_category_tables(conn):
+    """Fill categories and business_categories from the businesses JSON column"""
+    logger.info("Populating normalized category tables...")
+    
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        INSERT OR IGNORE INTO categories (name)
+        SELECT DISTINCT trim(j.value)
+        FROM businesses b, json_each(b.categories) j
+        WHERE trim(j.value) != ''
+        ORDER BY trim(j.value)
+    ''')
+    
+    cursor.execute('''
+        INSERT OR IGNORE INTO business_categories (category_id, business_id)
+        SELECT c.id, b.id
+        FROM businesses b, json_each(b.categories) j
+        JOIN categories c ON c.name = trim(j.value)
+    ''')
+    conn.commit()
+    
+    cursor.execute('SELECT COUNT(*) FROM categories')
+    category_count = cursor.fetchone()[0]
+    cursor.execute('SELECT COUNT(*) FROM business_categories')
+    link_count = cursor.fetchone()[0]
+    
+    logger.info(f"  Categories: {category_count:,}")
+    logger.info(f"  Business-category links: {link_count:,}")
+
+def create_spatial_index(conn):
+    """Populate businesses_rtree and install triggers that keep it in sync"""
+    logger.info("Building R*Tree spatial index...")
+    
+    cursor = conn.cursor()
+    
+    cursor.execute('DELETE FROM businesses_rtree')
+    cursor.execute('''
+        INSERT INTO businesses_rtree (id, min_lat, max_lat, min_lon, max_lon)
+        SELECT rowid, lat, lat, lon, lon
+        FROM businesses
+        WHERE lat IS NOT NULL AND lon IS NOT NULL
+    ''')
+    indexed_count = cursor.rowcount
+    
+    # Later coordinate changes (e.g. update_precise_data.py) follow automatically
+    cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS businesses_rtree_insert
+        AFTER INSERT ON businesses
+        WHEN new.lat IS NOT NULL AND new.lon IS NOT NULL
+        BEGIN
+            INSERT INTO businesses_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            VALUES (new.rowid, new.lat, new.lat, new.lon, new.lon);
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS businesses_rtree_update
+        AFTER UPDATE OF lat, lon ON businesses
+        BEGIN
+            DELETE FROM businesses_rtree WHERE id = old.rowid;
+            INSERT INTO businesses_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            SELECT new.rowid, new.lat, new.lat, new.lon, new.lon
+            WHERE new.lat IS NOT NULL AND new.lon IS NOT NULL;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS businesses_rtree_delete
+        AFTER DELETE ON businesses
+        BEGIN
+            DELETE FROM businesses_rtree WHERE id = old.rowid;
+        END;
+    ''')
+    conn.commit()
+    
+    logger.info(f"  Indexed coordinates: {indexed_count:,}")
+
+def create_sync_triggers(conn):
+    """Install triggers that keep businesses_fts and the category tables in sync
+
+    Installed after the bulk load, so only later single-row changes (e.g.
+    apply_delta()) pay for them. The R*Tree has its own triggers, see
+    create_spatial_index().
+    """
+    logger.info("Installing full-text and category sync triggers...")
+    
+    # The conflict clause of the triggering upsert overrides OR IGNORE inside
+    # a trigger, so existing rows are filtered out explicitly
+    folded_name = fold_sql('new.name')
+    folded_categories = fold_sql(categories_text_sql('new.categories'))
+    link_categories = '''
+            INSERT INTO categories (name)
+            SELECT DISTINCT trim(value) FROM json_each(new.categories)
+            WHERE trim(value) != ''
+              AND trim(value) NOT IN (SELECT name FROM categories);
+            INSERT INTO business_categories (category_id, business_id)
+            SELECT DISTINCT c.id, new.id
+            FROM json_each(new.categories) j
+            JOIN categories c ON c.name = trim(j.value);
+    '''
+    
+    cursor = conn.cursor()
+    cursor.executescript(f'''
+        CREATE TRIGGER IF NOT EXISTS businesses_sync_insert
+        AFTER INSERT ON businesses
+        BEGIN
+            INSERT INTO businesses_fts (rowid, name, categories)
+            VALUES (new.rowid, {folded_name}, {folded_categories});
+            {link_categories}
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS businesses_sync_update
+        AFTER UPDATE OF name, categories ON businesses
+        BEGIN
+            DELETE FROM businesses_fts WHERE rowid = old.rowid;
+            INSERT INTO businesses_fts (rowid, name, categories)
+            VALUES (new.rowid, {folded_name}, {folded_categories});
+            DELETE FROM business_categories WHERE business_id = old.id;
+            {link_categories}
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS businesses_sync_delete
+        AFTER DELETE ON businesses
+        BEGIN
+            DELETE FROM businesses_fts WHERE rowid = old.rowid;
+            DELETE FROM business_categories WHERE business_id = old.id;
+        END;
+    ''')
+    conn.commit()
+
+def upgrade_derived_tables(conn):
+    """Rebuild the derived tables a database built by an older version lacks
+
+    Checks, in dependency order, for an outdated businesses_fts (external
+    content, unfolded), empty category tables, an unfilled R*Tree and a
+    missing map_clusters table, and rebuilds each from the businesses table.
+    The facet tables are (re)built after the category tables they count.
+    Run before apply_delta(): its triggers only keep complete tables in
+    sync. Returns the names of the rebuilt tables.
+    """
+    cursor = conn.cursor()
+    rebuilt = []
+    
+    cursor.execute("SELECT sql FROM sqlite_schema WHERE name = 'businesses_fts'")
+    fts_sql = cursor.fetchone()[0]
+    if 'content=' in fts_sql or f"tokenize='{FTS_TOKENIZER}'" not in fts_sql:
+        logger.info("Replacing the outdated full-text index...")
+        cursor.execute('DROP TABLE businesses_fts')
+        create_database_schema(conn)
+        build_fts_index(conn)
+        rebuilt.append('businesses_fts')
+    
+    cursor.execute('SELECT EXISTS (SELECT 1 FROM business_categories)')
+    has_links = cursor.fetchone()[0]
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM businesses WHERE categories NOT IN ('', '[]'))")
+    if not has_links and cursor.fetchone()[0]:
+        populate_category_tables(conn)
+        rebuilt.append('business_categories')
+    
+    cursor.execute("SELECT 1 FROM sqlite_schema WHERE type = 'trigger' AND name = 'businesses_rtree_insert'")
+    if cursor.fetchone() is None:
+        create_spatial_index(conn)
+        rebuilt.append('businesses_rtree')
+    
+    cursor.execute("SELECT 1 FROM sqlite_schema WHERE type = 'table' AND name = 'map_clusters'")
+    if cursor.fetchone() is None:
+        create_map_clusters(conn)
+        rebuilt.append('map_clusters')
+    
+    # Their change log only records later changes, so counts taken before
+    # the category links existed would never catch up
+    if 'business_categories' in rebuilt or not has_facet_tables(conn):
+        create_facet_counts(conn)
+        rebuilt.append('facet tables')
+    
+    return rebuilt
+
+def apply_delta(conn, businesses):
+    """Apply only what changed between businesses and the database
+
+    Records are matched by id and compared by content hash: new ids are
+    inserted, changed ones updated in place (rowids stay stable) and ids
+    missing from businesses deleted. Precise-data columns the input leaves
+    empty keep their current value, as in update_precise_data.py, and so
+    do precise coordinates unless the input brings precise ones too. The
+    triggers keep businesses_fts, the R*Tree and the category tables in
+    sync, and the facet counts follow through apply_facet_changes().
+    Everything happens in one transaction.
+    
+    Returns a dict with the inserted, updated and deleted counts and the
+    'moved' (lat, lon) positions whose map clusters need recomputing.
+    """
+    logger.info("Applying changes...")
+    
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, content_hash, lat, lon, coord_source FROM businesses')
+    known = {row[0]: row[1:] for row in cursor.fetchall()}
+    
+    inserted_count = 0
+    updated_count = 0
+    moved = []
+    
+    for business in businesses:
+        row = business_row(business)
+        row_hash = content_hash(row)
+        business_id = row[0]
+        coord_source = business.get('coord_source')
+        new_position = row[4:6]
+        
+        if business_id in known:
+            old_hash, old_lat, old_lon, old_coord_source = known.pop(business_id)
+            if old_hash == row_hash:
+                continue
+            updated_count += 1
+            old_position = (old_lat, old_lon)
+            if old_coord_source == 'precise' and coord_source is None:
+                new_position = old_position
+            if old_position != new_position:
+                moved.extend([old_position, new_position])
+        else:
+            inserted_count += 1
+            moved.append(new_position)
+        
+        cursor.execute('''
+            INSERT INTO businesses
+            (id, name, postal_code, city, lat, lon, categories, branch_ids,
+             street_address, district, phone, email, website, content_hash, coord_source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name,
+                postal_code = excluded.postal_code,
+                city = excluded.city,
+                lat = CASE WHEN coord_source = 'precise' AND excluded.coord_source IS NULL
+                           THEN lat ELSE excluded.lat END,
+                lon = CASE WHEN coord_source = 'precise' AND excluded.coord_source IS NULL
+                           THEN lon ELSE excluded.lon END,
+                categories = excluded.categories,
+                branch_ids = excluded.branch_ids,
+                street_address = COALESCE(excluded.street_address, street_address),
+                district = COALESCE(excluded.district, district),
+                phone = COALESCE(excluded.phone, phone),
+                email = COALESCE(excluded.email, email),
+                website = COALESCE(excluded.website, website),
+                content_hash = excluded.content_hash,
+                coord_source = COALESCE(excluded.coord_source, coord_source)
+        ''', row + (row_hash, coord_source))
+    
+    # Whatever was not seen in this drop is gone
+    deleted_ids = list(known)
+    cursor.executemany('DELETE FROM businesses WHERE id = ?', ((i,) for i in deleted_ids))
+    moved.extend(tuple(known[business_id][1:3]) for business_id in deleted_ids)
+    
+    apply_facet_changes(conn)
+    
+    # Categories no business uses any more
+    cursor.execute('''
+        DELETE FROM categories
+        WHERE id NOT IN (SELECT category_id FROM business_categories)
+    ''')
+    conn.commit()
+    
+    logger.info(f"  Inserted: {inserted_count:,}")
+    logger.info(f"  Updated: {updated_count:,}")
+    logger.info(f"  Deleted: {len(deleted_ids):,}")
+    
+    return {
+        'inserted': inserted_count,
+        'updated': updated_count,
+        'deleted': len(deleted_ids),
+        'moved': [(lat, lon) for lat, lon in moved if lat is not None and lon is not None]
+    }
+
+def create_map_clusters(conn):
+    """Precompute per-zoom marker clusters for the map overview"""
+    logger.info("Precomputing map clusters...")
+    
+    cluster_counts = build_cluster_table(conn)
+    for zoom, count in cluster_counts.items():
+        logger.info(f"  Zoom {zoom:>2}: {count:,} clusters")
+
+def create_facet_counts(conn):
+    """Precompute the category, city and district facet counts"""
+    logger.info("Precomputing facet counts...")
+    
+    table_counts = build_facet_tables(conn)
+    for table, count in table_counts.items():
+        logger.info(f"  {table}: {count:,} rows")
+
 def create_statistics_table(conn):
     """Create a statistics table with metadata"""
     logger.info("Creating statistics table...")
@@ -176,8 +625,154 @@ def optimize_database(conn):
     conn.commit()
     logger.info("Database optimized")
 
+def enable_serving_journal(conn):
+    """Switch the database file to SERVING_JOURNAL_MODE (persists in the file)"""
+    mode = conn.execute(f'PRAGMA journal_mode = {SERVING_JOURNAL_MODE}').fetchone()[0]
+    if mode.upper() != SERVING_JOURNAL_MODE:
+        logger.warning(f"Could not switch the database to {SERVING_JOURNAL_MODE} (journal mode is {mode})")
+
+def checkpoint_wal(db_path):
+    """Fold db_path's write-ahead log back into it and truncate the log
+
+    Run before a new file is renamed over db_path: SQLite would otherwise
+    replay the old file's leftover -wal frames onto the new database. A
+    checkpoint blocked by readers or a writer is retried with a short
+    backoff. Returns True once the log is truncated (or there is none),
+    False with a warning logged if it stayed busy.
+    """
+    if not db_path.with_name(db_path.name + '-wal').exists():
+        return True
+    # No busy handler: the retries below do the waiting
+    conn = sqlite3.connect(db_path, timeout=0)
+    try:
+        delay = CHECKPOINT_RETRY_SECONDS
+        for attempt in range(CHECKPOINT_ATTEMPTS):
+            if attempt:
+                time.sleep(delay)
+                delay *= 2
+            busy, _, _ = conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+            if not busy:
+                return True
+    finally:
+        conn.close()
+    
+    logger.warning(
+        f"Could not checkpoint {db_path} after {CHECKPOINT_ATTEMPTS} attempts: "
+        f"it is still being read or written"
+    )
+    return False
+
+def copy_database(source_path, target_path):
+    """Overwrite target_path's contents with source_path's through the backup API
+
+    Unlike a rename this goes through SQLite, so it is safe while
+    target_path is open in WAL mode; readers see the new data with their
+    next transaction.
+    """
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+def build_database(db_path, businesses):
+    """Create a complete database from businesses and swap it into place
+
+    The database is built next to db_path and renamed over it at the end,
+    so readers keep the previous file until the new one is complete. If
+    db_path's write-ahead log cannot be checkpointed, the new database is
+    copied into db_path instead, since renaming would leave the old log
+    to be replayed onto it.
+    """
+    temp_path = db_path.with_name(db_path.name + '.tmp')
+    if temp_path.exists():
+        temp_path.unlink()
+    
+    conn = sqlite3.connect(temp_path)
+    try:
+        with bulk_load_pragmas(conn):
+            create_database_schema(conn)
+            insert_businesses(conn, businesses)
+            populate_category_tables(conn)
+            create_indexes(conn)
+            create_spatial_index(conn)
+            create_sync_triggers(conn)
+            create_map_clusters(conn)
+            create_facet_counts(conn)
+            create_statistics_table(conn)
+        optimize_database(conn)
+        enable_serving_journal(conn)
+    finally:
+        conn.close()
+    
+    if checkpoint_wal(db_path):
+        os.replace(temp_path, db_path)
+    else:
+        logger.info(f"Copying the new database into {db_path}...")
+        copy_database(temp_path, db_path)
+        temp_path.unlink()
+
+def update_database(db_path, businesses):
+    """Bring an existing database up to date with businesses, in place
+
+    Falls back to build_database() if there is no database yet. Derived
+    tables an older database lacks are rebuilt first, see
+    upgrade_derived_tables(); after that only the map cluster cells around
+    moved businesses are recomputed.
+    """
+    if not db_path.exists():
+        logger.info("No existing database, creating a new one...")
+        build_database(db_path, businesses)
+        return
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        enable_serving_journal(conn)
+        create_database_schema(conn)
+        add_missing_columns(conn)
+        create_indexes(conn)
+        upgraded = upgrade_derived_tables(conn)
+        if upgraded:
+            logger.info(f"  Rebuilt for the current schema: {', '.join(upgraded)}")
+        create_sync_triggers(conn)
+        
+        changes = apply_delta(conn, businesses)
+        if not (upgraded or changes['inserted'] or changes['updated'] or changes['deleted']):
+            logger.info("Database is already up to date")
+            return
+        
+        if changes['moved']:
+            cell_count = update_cluster_cells(conn, changes['moved'])
+            logger.info(f"  Recomputed map cluster cells: {cell_count:,}")
+        create_statistics_table(conn)
+        conn.execute('PRAGMA optimize')
+    finally:
+        conn.close()
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Create the Berlin business database')
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='Update the existing database with only the changed records instead of rebuilding it'
+    )
+    return parser.parse_args()
+
 def main():
     """Main database creation process"""
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('database_creation.log'),
+            logging.StreamHandler()
+        ]
+    )
+    
+    args = parse_args()
     start_time = datetime.now()
     
     # Define paths
@@ -196,33 +791,15 @@ def main():
     try:
         # Load geocoded data
         logger.info("Loading geocoded businesses...")
-        with open(input_path, 'r', encoding='utf-8') as f:
-            businesses = json.load(f)
+        with open(input_path, 'rb') as f:
+            businesses = codec.loads(f.read())
         logger.info(f"Loaded {len(businesses):,} businesses")
         
-        # Remove existing database
-        if db_path.exists():
-            logger.info("Removing existing database...")
-            db_path.unlink()
-        
-        # Create database
-        logger.info("Connecting to database...")
-        conn = sqlite3.connect(db_path)
-        
-        # Create schema
-        create_database_schema(conn)
-        
-        # Insert businesses
-        insert_businesses(conn, businesses)
-        
-        # Create statistics
-        create_statistics_table(conn)
-        
-        # Optimize
-        optimize_database(conn)
-        
-        # Close connection
-        conn.close()
+        if args.incremental:
+            update_database(db_path, businesses)
+        else:
+            # Build a new file and replace the existing database with it
+            build_database(db_path, businesses)
         
         # Summary
         elapsed_time = (datetime.now() - start_time).total_seconds()
@@ -3,26 +3,30 @@ Extract Berlin businesses from Gelbe Seiten data
 Merges gsbestand and gs_final data to create a clean dataset
 """
 
-import json
+import argparse
+import multiprocessing
+import os
 import re
 import logging
+import sys
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('extraction.log'),
-        logging.StreamHandler()
-    ]
-)
+# Make the shared backend package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import codec
+from backend.chunking import DEFAULT_CHUNK_SIZE, find_chunk_boundaries, imap_bounded, iter_chunk_lines
+
 logger = logging.getLogger(__name__)
 
 # Berlin and surrounding Brandenburg postal codes
 BERLIN_POSTAL_CODES = set(range(10115, 14200))  # Berlin: 10xxx-14xxx
 
+# Every "postleitzahl" value in a raw gsbestand line, quoted or not
+POSTAL_CODE_PATTERN = re.compile(rb'"postleitzahl"\s*:\s*"?\s*(\d+)')
+
 def is_berlin_business(postal_code):
     """Check if postal code is in Berlin area"""
     try:
@@ -32,6 +36,17 @@ def is_berlin_business(postal_code):
         logger.debug(f"Invalid postal code format: {postal_code}")
         return False
 
+def may_be_berlin(raw_line):
+    """Byte-level pre-filter: False only if a raw line cannot be a Berlin record
+
+    Checks every postleitzahl in the line without decoding the JSON. Lines
+    without a recognisable postleitzahl are kept for the full decode.
+    """
+    postal_codes = POSTAL_CODE_PATTERN.findall(raw_line)
+    if not postal_codes:
+        return True
+    return any(int(code) in BERLIN_POSTAL_CODES for code in postal_codes)
+
 def extract_business_name(person_liste):
     """Extract business name from personListe"""
     if person_liste and len(person_liste) > 0:
@@ -43,8 +58,8 @@ def load_categories_map(gs_final_path):
     logger.info(f"Loading category mappings from {gs_final_path}...")
     
     try:
-        with open(gs_final_path, 'r', encoding='utf-8') as f:
-            gs_final_data = json.load(f)
+        with open(gs_final_path, 'rb') as f:
+            gs_final_data = codec.loads(f.read())
         
         logger.info(f"Successfully loaded {len(gs_final_data)} entries from gs_final.json")
         
@@ -64,97 +79,173 @@ def load_categories_map(gs_final_path):
     except FileNotFoundError:
         logger.error(f"File not found: {gs_final_path}")
         raise
-    except json.JSONDecodeError as e:
+    except codec.DecodeError as e:
         logger.error(f"JSON decode error in gs_final.json: {e}")
         raise
     except Exception as e:
         logger.error(f"Unexpected error loading categories: {e}", exc_info=True)
         raise
 
-def extract_berlin_businesses(gsbestand_path, categories_map):
-    """Extract Berlin businesses from gsbestand file - streaming line by line"""
+def new_extraction_stats():
+    """Counters collected while extracting"""
+    return {'total': 0, 'berlin': 0, 'prefiltered': 0, 'json_errors': 0, 'processing_errors': 0}
+
+def parse_berlin_business(line, categories_map, stats, location, prefilter=True):
+    """Parse one raw gsbestand line (bytes) into a Berlin business dict, or None
+
+    Updates the counters in stats; location (e.g. "Line 12") is only used
+    in log messages. With prefilter, lines that may_be_berlin() rejects are
+    skipped without being decoded.
+    """
+    stats['total'] += 1
+    
+    if prefilter and not may_be_berlin(line):
+        stats['prefiltered'] += 1
+        return None
+    
+    try:
+        record = codec.decode_gsbestand(line)
+        
+        # Extract address information
+        verlagsdaten = record.get('verlagsdaten', {})
+        kontakt = verlagsdaten.get('kontaktinformationen', {})
+        adresse = kontakt.get('adresse', {})
+        
+        postal_code = adresse.get('postleitzahl', '')
+        city = adresse.get('ortsname', '')
+        
+        # Check if Berlin business
+        if not is_berlin_business(postal_code):
+            return None
+        
+        # Extract business name
+        person_liste = kontakt.get('personListe') or []
+        business_name = extract_business_name(person_liste)
+        
+        if not business_name:
+            logger.debug(f"{location}: No business name found, skipping")
+            return None
+        
+        # Get categories from mapping
+        categories = categories_map.get(business_name, [])
+        
+        # Extract branch IDs as fallback
+        branch_ids = verlagsdaten.get('branchenIdListe', [])
+        
+        stats['berlin'] += 1
+        return {
+            'id': record.get('_id', ''),
+            'name': business_name,
+            'postal_code': postal_code,
+            'city': city,
+            'categories': categories,
+            'branch_ids': branch_ids
+        }
+    
+    except codec.DecodeError as e:
+        stats['json_errors'] += 1
+        logger.debug(f"{location}: JSON decode error - {e}")
+    except KeyError as e:
+        stats['processing_errors'] += 1
+        logger.debug(f"{location}: Missing key - {e}")
+    except Exception as e:
+        stats['processing_errors'] += 1
+        logger.warning(f"{location}: Unexpected error - {e}")
+    
+    return None
+
+def _extract_sequential(gsbestand_path, categories_map, stats, prefilter):
+    """Yield Berlin businesses, parsing the file on the current process"""
+    with open(gsbestand_path, 'rb') as f:
+        for line_num, line in enumerate(f, 1):
+            business = parse_berlin_business(
+                line, categories_map, stats, f"Line {line_num}", prefilter
+            )
+            
+            # Progress logging every 100k records
+            if stats['total'] % 100000 == 0:
+                logger.info(f"Progress: {stats['total']:,} records processed, {stats['berlin']:,} Berlin businesses found")
+            
+            if business is not None:
+                yield business
+
+# Category map of the current worker process, set by _init_worker()
+_worker_categories_map = None
+
+def _init_worker(categories_map):
+    global _worker_categories_map
+    _worker_categories_map = categories_map
+
+def _extract_chunk(chunk):
+    """Worker: parse one byte range, return (businesses, stats)"""
+    gsbestand_path, start, end, prefilter = chunk
+    stats = new_extraction_stats()
+    businesses = []
+    
+    for position, line in iter_chunk_lines(gsbestand_path, start, end):
+        business = parse_berlin_business(
+            line, _worker_categories_map, stats, f"Byte offset {position}", prefilter
+        )
+        if business is not None:
+            businesses.append(business)
+    
+    return businesses, stats
+
+def _extract_parallel(gsbestand_path, categories_map, stats, prefilter, workers, chunk_size):
+    """Yield Berlin businesses, parsing newline-aligned chunks in a process pool
+
+    Chunk results are merged in file order, so the output is identical to
+    the sequential path.
+    """
+    chunks = [
+        (str(gsbestand_path), start, end, prefilter)
+        for start, end in find_chunk_boundaries(gsbestand_path, chunk_size)
+    ]
+    logger.info(f"Parsing {len(chunks):,} chunks with {workers} worker processes")
+    
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(categories_map,)) as pool:
+        for chunk_num, (businesses, chunk_stats) in enumerate(imap_bounded(pool, _extract_chunk, chunks, 2 * workers), 1):
+            for key, value in chunk_stats.items():
+                stats[key] += value
+            
+            logger.info(
+                f"Progress: chunk {chunk_num}/{len(chunks)}, {stats['total']:,} records processed, "
+                f"{stats['berlin']:,} Berlin businesses found"
+            )
+            yield from businesses
+
+def extract_berlin_businesses(gsbestand_path, categories_map, workers=1,
+                              chunk_size=DEFAULT_CHUNK_SIZE, prefilter=True):
+    """Yield Berlin businesses from gsbestand file - streaming line by line
+
+    Records are produced one at a time, so memory use does not grow with
+    the number of Berlin businesses found. With workers > 1 the file is
+    split into byte-range chunks that are parsed in parallel processes.
+    prefilter skips non-Berlin lines before JSON decoding (see may_be_berlin).
+    """
     logger.info(f"Starting extraction from {gsbestand_path}")
     logger.info("Using streaming line-by-line processing for memory efficiency")
+    logger.info(f"JSON backend: {codec.BACKEND}")
     
-    berlin_businesses = []
-    total_count = 0
-    berlin_count = 0
-    json_errors = 0
-    processing_errors = 0
+    stats = new_extraction_stats()
     
     try:
-        with open(gsbestand_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                total_count += 1
-                
-                # Progress logging every 100k records
-                if total_count % 100000 == 0:
-                    logger.info(f"Progress: {total_count:,} records processed, {berlin_count:,} Berlin businesses found")
-                
-                try:
-                    record = json.loads(line.strip())
-                    
-                    # Extract address information
-                    verlagsdaten = record.get('verlagsdaten', {})
-                    kontakt = verlagsdaten.get('kontaktinformationen', {})
-                    adresse = kontakt.get('adresse', {})
-                    
-                    postal_code = adresse.get('postleitzahl', '')
-                    city = adresse.get('ortsname', '')
-                    
-                    # Check if Berlin business
-                    if not is_berlin_business(postal_code):
-                        continue
-                    
-                    # Extract business name
-                    person_liste = kontakt.get('personListe', [])
-                    business_name = extract_business_name(person_liste)
-                    
-                    if not business_name:
-                        logger.debug(f"Line {line_num}: No business name found, skipping")
-                        continue
-                    
-                    # Get categories from mapping
-                    categories = categories_map.get(business_name, [])
-                    
-                    # Extract branch IDs as fallback
-                    branch_ids = verlagsdaten.get('branchenIdListe', [])
-                    
-                    business = {
-                        'id': record.get('_id', ''),
-                        'name': business_name,
-                        'postal_code': postal_code,
-                        'city': city,
-                        'categories': categories,
-                        'branch_ids': branch_ids
-                    }
-                    
-                    berlin_businesses.append(business)
-                    berlin_count += 1
-                    
-                except json.JSONDecodeError as e:
-                    json_errors += 1
-                    logger.debug(f"Line {line_num}: JSON decode error - {e}")
-                    continue
-                except KeyError as e:
-                    processing_errors += 1
-                    logger.debug(f"Line {line_num}: Missing key - {e}")
-                    continue
-                except Exception as e:
-                    processing_errors += 1
-                    logger.warning(f"Line {line_num}: Unexpected error - {e}")
-                    continue
+        if workers > 1:
+            yield from _extract_parallel(
+                gsbestand_path, categories_map, stats, prefilter, workers, chunk_size
+            )
+        else:
+            yield from _extract_sequential(gsbestand_path, categories_map, stats, prefilter)
         
         # Final summary
         logger.info("="*60)
         logger.info(f"Extraction completed successfully!")
-        logger.info(f"Total records processed: {total_count:,}")
-        logger.info(f"Berlin businesses found: {berlin_count:,}")
-        logger.info(f"JSON decode errors: {json_errors}")
-        logger.info(f"Processing errors: {processing_errors}")
+        logger.info(f"Total records processed: {stats['total']:,}")
+        logger.info(f"Berlin businesses found: {stats['berlin']:,}")
+        logger.info(f"Skipped by postal code pre-filter: {stats['prefiltered']:,}")
+        logger.info(f"JSON decode errors: {stats['json_errors']}")
+        logger.info(f"Processing errors: {stats['processing_errors']}")
         logger.info("="*60)
-        
-        return berlin_businesses
     
     except FileNotFoundError:
         logger.error(f"File not found: {gsbestand_path}")
@@ -164,17 +255,29 @@ def extract_berlin_businesses(gsbestand_path, categories_map):
         raise
 
 def save_berlin_data(businesses, output_path):
-    """Save extracted data to JSON file"""
-    logger.info(f"Saving {len(businesses):,} businesses to {output_path}...")
+    """Stream businesses to a JSONL file (one record per line), return the count
+
+    Records are written as they arrive and the file is swapped in only when
+    complete, so readers never see a partial output file.
+    """
+    logger.info(f"Streaming businesses to {output_path}...")
+    
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    count = 0
     
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(businesses, f, ensure_ascii=False, indent=2)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for business in businesses:
+                f.write(codec.dumps(business))
+                f.write('\n')
+                count += 1
+        tmp_path.replace(output_path)
         
         # Get file size for logging
         file_size = output_path.stat().st_size / (1024 * 1024)  # MB
-        logger.info(f"Data saved successfully! File size: {file_size:.2f} MB")
-        
+        logger.info(f"Saved {count:,} businesses! File size: {file_size:.2f} MB")
+        return count
+    
     except IOError as e:
         logger.error(f"Failed to write file: {e}")
         raise
@@ -182,8 +285,37 @@ def save_berlin_data(businesses, output_path):
         logger.error(f"Unexpected error saving data: {e}", exc_info=True)
         raise
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Extract Berlin businesses from Gelbe Seiten data')
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='Number of parsing processes (0 = one per CPU core, default: 1)'
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE // (1024 * 1024),
+        help='Chunk size in MB handed to each worker (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--no-prefilter', dest='prefilter', action='store_false',
+        help='Fully decode every record instead of pre-filtering on the raw postal code'
+    )
+    return parser.parse_args()
+
 def main():
     """Main extraction process"""
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('extraction.log'),
+            logging.StreamHandler()
+        ]
+    )
+    
+    args = parse_args()
+    workers = args.workers or os.cpu_count() or 1
     start_time = datetime.now()
     
     # Define paths
@@ -194,7 +326,7 @@ def main():
     
     gsbestand_path = input_dir / 'gsbestand-559.json'
     gs_final_path = input_dir / 'gs_final.json'
-    output_path = output_dir / 'berlin_businesses.json'
+    output_path = output_dir / 'berlin_businesses.jsonl'
     
     logger.info("="*60)
     logger.info("Berlin Business Data Extraction")
@@ -206,11 +338,12 @@ def main():
         # Load category mappings
         categories_map = load_categories_map(gs_final_path)
         
-        # Extract Berlin businesses
-        berlin_businesses = extract_berlin_businesses(gsbestand_path, categories_map)
-        
-        # Save to file
-        save_berlin_data(berlin_businesses, output_path)
+        # Extract Berlin businesses and stream them to file
+        berlin_businesses = extract_berlin_businesses(
+            gsbestand_path, categories_map, workers, args.chunk_size * 1024 * 1024,
+            args.prefilter
+        )
+        berlin_count = save_berlin_data(berlin_businesses, output_path)
         
         # Calculate statistics
         elapsed_time = (datetime.now() - start_time).total_seconds()
@@ -220,12 +353,14 @@ def main():
         logger.info("="*60)
         logger.info(f"Output file: {output_path}")
         logger.info(f"Execution time: {elapsed_time:.2f} seconds")
-        logger.info(f"Processing speed: {len(berlin_businesses) / elapsed_time:.0f} businesses/sec")
+        logger.info(f"Processing speed: {berlin_count / elapsed_time:.0f} businesses/sec")
         
         # Print sample businesses
-        if berlin_businesses:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            samples = [codec.loads(line) for line in islice(f, 3)]
+        if samples:
             logger.info("\nSample businesses:")
-            for i, sample in enumerate(berlin_businesses[:3], 1):
+            for i, sample in enumerate(samples, 1):
                 logger.info(f"\n  Sample {i}:")
                 logger.info(f"    Name: {sample['name']}")
                 logger.info(f"    City: {sample['city']}")
@@ -235,7 +370,7 @@ def main():
         
         logger.info("\nLog file created: extraction.log")
         return 0
-        
+    
     except Exception as e:
         logger.error(f"FATAL ERROR: Extraction failed - {e}", exc_info=True)
         return 1
@@ -3,20 +3,16 @@ Add geocoding (lat/lon) to Berlin businesses using simplified postal code mappin
 Uses approximate center points for Berlin postal code areas
 """
 
-import json
 import logging
+import sys
 from pathlib import Path
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('geocoding.log'),
-        logging.StreamHandler()
-    ]
-)
+# Make the shared backend package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import codec
+
 logger = logging.getLogger(__name__)
 
 # Simplified Berlin postal code to approximate lat/lon mapping
@@ -134,6 +130,17 @@ def create_plz_lookup():
     logger.info(f"Using built-in postal code database with {len(ALL_PLZ_COORDS)} entries")
     return ALL_PLZ_COORDS
 
+def geocode_business(business, plz_lookup):
+    """Set lat/lon of one business from its postal code, True if it was found"""
+    coords = plz_lookup.get(business.get('postal_code', ''))
+    if coords is None:
+        business['lat'] = None
+        business['lon'] = None
+        return False
+    
+    business['lat'], business['lon'] = coords
+    return True
+
 def add_geocoding(businesses, plz_lookup):
     """Add lat/lon coordinates to businesses"""
     logger.info(f"Adding geocoding to {len(businesses):,} businesses...")
@@ -143,18 +150,11 @@ def add_geocoding(businesses, plz_lookup):
     missing_postcodes = set()
     
     for i, business in enumerate(businesses):
-        postal_code = business.get('postal_code', '')
-        
-        if postal_code in plz_lookup:
-            coords = plz_lookup[postal_code]
-            business['lat'] = coords[0]
-            business['lon'] = coords[1]
+        if geocode_business(business, plz_lookup):
             geocoded_count += 1
         else:
-            business['lat'] = None
-            business['lon'] = None
             missing_count += 1
-            missing_postcodes.add(postal_code)
+            missing_postcodes.add(business.get('postal_code', ''))
         
         # Progress logging
         if (i + 1) % 10000 == 0:
@@ -180,7 +180,7 @@ def save_geocoded_data(businesses, output_path):
     
     try:
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(businesses, f, ensure_ascii=False, indent=2)
+            f.write(codec.dumps(businesses, indent=True))
         
         file_size = output_path.stat().st_size / (1024 * 1024)
         logger.info(f"Data saved successfully! File size: {file_size:.2f} MB")
@@ -191,13 +191,23 @@ def save_geocoded_data(businesses, output_path):
 
 def main():
     """Main geocoding process"""
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('geocoding.log'),
+            logging.StreamHandler()
+        ]
+    )
+    
     start_time = datetime.now()
     
     # Define paths
     project_root = Path(__file__).parent.parent.parent
     data_dir = project_root / 'backend' / 'data'
     
-    input_path = data_dir / 'berlin_businesses.json'
+    input_path = data_dir / 'berlin_businesses.jsonl'
     output_path = data_dir / 'berlin_businesses_geocoded.json'
     
     logger.info("="*60)
@@ -209,8 +219,8 @@ def main():
     try:
         # Load businesses
         logger.info("Loading Berlin businesses...")
-        with open(input_path, 'r', encoding='utf-8') as f:
-            businesses = json.load(f)
+        with open(input_path, 'rb') as f:
+            businesses = [codec.loads(line) for line in f if line.strip()]
         logger.info(f"Loaded {len(businesses):,} businesses")
         
         # Create postal code lookup
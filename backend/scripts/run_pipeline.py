@@ -0,0 +1,189 @@
+"""
+Single-pass data pipeline from gsbestand to the SQLite database
+Streams extract -> category join -> PLZ geocode -> precise-data merge -> insert
+without intermediate JSON files; stage boundaries can be checkpointed as JSONL
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+from datetime import datetime
+
+# Make the shared backend package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import codec
+
+import create_database
+import extract_berlin_data
+import geocode_businesses
+import update_precise_data
+
+logger = logging.getLogger(__name__)
+
+# Stage boundaries, in pipeline order; each can be written as <stage>.jsonl
+STAGES = ('extracted', 'geocoded', 'merged')
+
+def read_checkpoint(path):
+    """Stream business dicts back from a checkpoint file"""
+    logger.info(f"Resuming from checkpoint {path}")
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield codec.loads(line)
+
+def write_checkpoint(businesses, path):
+    """Pass businesses through unchanged while writing them to a JSONL checkpoint"""
+    temp_path = path.with_suffix(path.suffix + '.tmp')
+    count = 0
+    
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        for business in businesses:
+            f.write(codec.dumps(business))
+            f.write('\n')
+            count += 1
+            yield business
+    
+    # Only complete checkpoints replace the previous one
+    temp_path.replace(path)
+    logger.info(f"Checkpoint written: {path} ({count:,} businesses)")
+
+def geocode_stage(businesses, plz_lookup, stats):
+    """Add postal code coordinates to each business"""
+    for business in businesses:
+        if geocode_businesses.geocode_business(business, plz_lookup):
+            stats['geocoded'] += 1
+        yield business
+
+def merge_stage(businesses, data_map, stats):
+    """Merge precise coordinates and contact data into each business"""
+    for business in businesses:
+        data = data_map.get(business.get('id'))
+        if data and update_precise_data.apply_precise_data(business, data):
+            stats['merged'] += 1
+        yield business
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Build the Berlin business database in a single pass')
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='Number of gsbestand parsing processes (0 = one per CPU core, default: 1)'
+    )
+    parser.add_argument(
+        '--no-prefilter', dest='prefilter', action='store_false',
+        help='Fully decode every gsbestand record instead of pre-filtering on the raw postal code'
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help='Update the existing database with only the changed records instead of rebuilding it'
+    )
+    parser.add_argument(
+        '--checkpoint-dir', type=Path,
+        help='Write every stage boundary to <dir>/<stage>.jsonl'
+    )
+    parser.add_argument(
+        '--resume-from', choices=STAGES,
+        help='Skip the stages up to this checkpoint and read it from --checkpoint-dir'
+    )
+    args = parser.parse_args()
+    
+    if args.resume_from and not args.checkpoint_dir:
+        parser.error('--resume-from requires --checkpoint-dir')
+    return args
+
+def main():
+    """Main pipeline process"""
+    # Configure logging (the stage scripts imported above only do so in
+    # their own main(), so this is the configuration that applies)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('pipeline.log'),
+            logging.StreamHandler()
+        ]
+    )
+    
+    args = parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    start_time = datetime.now()
+    
+    # Define paths
+    project_root = Path(__file__).parent.parent.parent
+    input_dir = project_root / 'input'
+    data_dir = project_root / 'backend' / 'data'
+    
+    gsbestand_path = input_dir / 'gsbestand-559.json'
+    gs_final_path = input_dir / 'gs_final.json'
+    precise_data_path = input_dir / 'berlin_business_data.jsonl'
+    db_path = data_dir / 'berlin_businesses.db'
+    
+    logger.info("="*60)
+    logger.info("Berlin Business Data Pipeline")
+    logger.info("="*60)
+    logger.info(f"Input files: {gsbestand_path}, {gs_final_path}, {precise_data_path}")
+    logger.info(f"Database file: {db_path}")
+    
+    try:
+        data_dir.mkdir(parents=True, exist_ok=True)
+        if args.checkpoint_dir:
+            args.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        
+        def checkpoint(businesses, stage):
+            if args.checkpoint_dir is None:
+                return businesses
+            return write_checkpoint(businesses, args.checkpoint_dir / f'{stage}.jsonl')
+        
+        stats = {'geocoded': 0, 'merged': 0}
+        first_stage = STAGES.index(args.resume_from) + 1 if args.resume_from else 0
+        
+        if first_stage > 0:
+            businesses = read_checkpoint(args.checkpoint_dir / f'{args.resume_from}.jsonl')
+        else:
+            categories_map = extract_berlin_data.load_categories_map(gs_final_path)
+            businesses = extract_berlin_data.extract_berlin_businesses(
+                gsbestand_path, categories_map, workers, prefilter=args.prefilter
+            )
+            businesses = checkpoint(businesses, 'extracted')
+        
+        if first_stage <= 1:
+            plz_lookup = geocode_businesses.create_plz_lookup()
+            businesses = checkpoint(geocode_stage(businesses, plz_lookup, stats), 'geocoded')
+        
+        if first_stage <= 2:
+            if precise_data_path.exists():
+                data_map = update_precise_data.load_precise_data(precise_data_path, workers)
+                businesses = merge_stage(businesses, data_map, stats)
+            else:
+                logger.warning(f"{precise_data_path} not found, skipping precise-data merge")
+            businesses = checkpoint(businesses, 'merged')
+        
+        # Pulling the stream through the insert drives every stage above
+        if args.incremental:
+            create_database.update_database(db_path, businesses)
+        else:
+            create_database.build_database(db_path, businesses)
+        
+        # Summary
+        elapsed_time = (datetime.now() - start_time).total_seconds()
+        db_size = db_path.stat().st_size / (1024 * 1024)
+        logger.info("\n" + "="*60)
+        logger.info("PIPELINE COMPLETE!")
+        logger.info("="*60)
+        logger.info(f"Geocoded from postal code: {stats['geocoded']:,}")
+        logger.info(f"Merged precise data: {stats['merged']:,}")
+        logger.info(f"Database size: {db_size:.2f} MB")
+        logger.info(f"Execution time: {elapsed_time:.2f} seconds")
+        logger.info("\nLog file created: pipeline.log")
+        
+        return 0
+    
+    except Exception as e:
+        logger.error(f"FATAL ERROR: Pipeline failed - {e}", exc_info=True)
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
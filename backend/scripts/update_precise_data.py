@@ -3,177 +3,274 @@ Update Berlin businesses with precise coordinates and additional data
 from berlin_business_data.jsonl
 """
 
-import json
+import argparse
+import multiprocessing
+import os
 import sqlite3
 import logging
+import sys
 from pathlib import Path
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('data_update.log'),
-        logging.StreamHandler()
-    ]
-)
+# Make the shared backend package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend import codec
+from backend.chunking import DEFAULT_CHUNK_SIZE, find_chunk_boundaries, imap_bounded, iter_chunk_lines
+from backend.clustering import build_cluster_table, update_cluster_cells
+from backend.facets import apply_facet_changes
+
 logger = logging.getLogger(__name__)
 
-def load_precise_data(jsonl_path):
-    """Load data from berlin_business_data.jsonl"""
-    logger.info(f"Loading precise data from {jsonl_path}...")
+# Columns filled from berlin_business_data.jsonl besides the coordinates
+PRECISE_COLUMNS = ('street_address', 'district', 'phone', 'email', 'website')
+
+# businesses.coord_source of rows whose lat/lon come from this file; an
+# incremental create_database.py run keeps them instead of the postal
+# code centroid
+PRECISE_COORD_SOURCE = 'precise'
+
+# Field order of the tuples produced by precise_row()
+PRECISE_ROW_FIELDS = ('id', 'lat', 'lon') + PRECISE_COLUMNS
+
+# Above this share of moved businesses merge_precise_data() rebuilds all map
+# clusters instead of recomputing the affected cells
+CLUSTER_REBUILD_SHARE = 0.1
+
+def new_precise_stats():
+    """Counters filled by parse_precise_line() and parse_precise_record()"""
+    return {
+        'total': 0,
+        'with_coords': 0,
+        'with_street': 0,
+        'with_phone': 0,
+        'with_email': 0,
+        'with_website': 0,
+    }
+
+def parse_precise_record(line, stats):
+    """Extract (business_id, data) from one berlin_business_data.jsonl line
+
+    Returns None for records without a participant id. data holds lat, lon
+    and the PRECISE_COLUMNS values.
+    """
+    record = codec.decode_precise_data(line)
+    teilnehmer = record.get('antwort', {}).get('daten', {}).get('teilnehmer', {})
+    
+    if not teilnehmer:
+        return None
     
-    data_map = {}
-    total_count = 0
-    with_coords = 0
-    with_street = 0
-    with_phone = 0
-    with_email = 0
-    with_website = 0
+    business_id = teilnehmer.get('id', '')
+    if not business_id:
+        return None
     
+    # Extract address data
+    adresse = teilnehmer.get('adresse', {})
+    kontakt = teilnehmer.get('kontakt', {})
+    
+    # Get coordinates
+    geodaten = adresse.get('geodaten', {})
+    koordinaten = geodaten.get('koordinaten') or []
+    
+    lat, lon = None, None
+    for coord in koordinaten:
+        if coord.get('format') == 'WGS84':
+            lon = float(coord.get('x', 0))
+            lat = float(coord.get('y', 0))
+            stats['with_coords'] += 1
+            break
+    
+    # Get street address
+    street = adresse.get('anzeige_strasse', adresse.get('strasse', ''))
+    hausnr = adresse.get('hausnr', '')
+    full_address = f"{street} {hausnr}".strip() if street else None
+    if full_address:
+        stats['with_street'] += 1
+    
+    # Get district
+    district = adresse.get('stadtteil', '')
+    
+    # Get phone
+    telefon_list = kontakt.get('telefon') or []
+    phone = None
+    if telefon_list:
+        phone = telefon_list[0].get('rufnummer', '')
+        if phone:
+            stats['with_phone'] += 1
+    
+    # Get email
+    email_list = kontakt.get('email') or []
+    email = None
+    if email_list:
+        email = email_list[0].get('email', '')
+        if email:
+            stats['with_email'] += 1
+    
+    # Get website
+    www_list = kontakt.get('www') or []
+    website = None
+    if www_list:
+        website = www_list[0].get('url', '')
+        if website:
+            stats['with_website'] += 1
+    
+    return business_id, {
+        'lat': lat,
+        'lon': lon,
+        'street_address': full_address,
+        'district': district,
+        'phone': phone,
+        'email': email,
+        'website': website
+    }
+
+def precise_row(business_id, data):
+    """Compact PRECISE_ROW_FIELDS tuple of one record; values that are not present become None"""
+    has_coords = bool(data['lat'] and data['lon'])
+    return (
+        business_id,
+        data['lat'] if has_coords else None,
+        data['lon'] if has_coords else None,
+        *(data[column] or None for column in PRECISE_COLUMNS)
+    )
+
+def parse_precise_line(line, stats, location):
+    """parse_precise_record() for one raw line, counting it and logging bad records"""
+    stats['total'] += 1
     try:
-        with open(jsonl_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                total_count += 1
-                
-                if total_count % 10000 == 0:
-                    logger.info(f"Processed {total_count:,} records...")
-                
-                try:
-                    record = json.loads(line.strip())
-                    teilnehmer = record.get('antwort', {}).get('daten', {}).get('teilnehmer', {})
-                    
-                    if not teilnehmer:
-                        continue
-                    
-                    business_id = teilnehmer.get('id', '')
-                    if not business_id:
-                        continue
-                    
-                    # Extract address data
-                    adresse = teilnehmer.get('adresse', {})
-                    kontakt = teilnehmer.get('kontakt', {})
-                    
-                    # Get coordinates
-                    geodaten = adresse.get('geodaten', {})
-                    koordinaten = geodaten.get('koordinaten', [])
-                    
-                    lat, lon = None, None
-                    for coord in koordinaten:
-                        if coord.get('format') == 'WGS84':
-                            lon = float(coord.get('x', 0))
-                            lat = float(coord.get('y', 0))
-                            with_coords += 1
-                            break
-                    
-                    # Get street address
-                    street = adresse.get('anzeige_strasse', adresse.get('strasse', ''))
-                    hausnr = adresse.get('hausnr', '')
-                    full_address = f"{street} {hausnr}".strip() if street else None
-                    if full_address:
-                        with_street += 1
-                    
-                    # Get district
-                    district = adresse.get('stadtteil', '')
-                    
-                    # Get phone
-                    telefon_list = kontakt.get('telefon', [])
-                    phone = None
-                    if telefon_list:
-                        phone = telefon_list[0].get('rufnummer', '')
-                        if phone:
-                            with_phone += 1
-                    
-                    # Get email
-                    email_list = kontakt.get('email', [])
-                    email = None
-                    if email_list:
-                        email = email_list[0].get('email', '')
-                        if email:
-                            with_email += 1
-                    
-                    # Get website
-                    www_list = kontakt.get('www', [])
-                    website = None
-                    if www_list:
-                        website = www_list[0].get('url', '')
-                        if website:
-                            with_website += 1
-                    
-                    # Store data
-                    data_map[business_id] = {
-                        'lat': lat,
-                        'lon': lon,
-                        'street_address': full_address,
-                        'district': district,
-                        'phone': phone,
-                        'email': email,
-                        'website': website
-                    }
-                    
-                except json.JSONDecodeError as e:
-                    logger.debug(f"Line {line_num}: JSON decode error")
-                    continue
-                except Exception as e:
-                    logger.debug(f"Line {line_num}: Error - {e}")
-                    continue
-        
-        logger.info("="*60)
-        logger.info(f"Data loading complete!")
-        logger.info(f"Total records processed: {total_count:,}")
-        logger.info(f"Businesses with data: {len(data_map):,}")
-        logger.info(f"  With coordinates: {with_coords:,}")
-        logger.info(f"  With street address: {with_street:,}")
-        logger.info(f"  With phone: {with_phone:,}")
-        logger.info(f"  With email: {with_email:,}")
-        logger.info(f"  With website: {with_website:,}")
-        logger.info("="*60)
-        
-        return data_map
+        return parse_precise_record(line, stats)
+    except codec.DecodeError:
+        logger.debug(f"{location}: JSON decode error")
+    except Exception as e:
+        logger.debug(f"{location}: Error - {e}")
+    return None
+
+def iter_precise_data(jsonl_path, stats):
+    """Stream (business_id, data) pairs from berlin_business_data.jsonl"""
+    with open(jsonl_path, 'rb') as f:
+        for line_num, line in enumerate(f, 1):
+            entry = parse_precise_line(line, stats, f"Line {line_num}")
+            
+            if stats['total'] % 10000 == 0:
+                logger.info(f"Processed {stats['total']:,} records...")
+            
+            if entry is not None:
+                yield entry
+
+def _decode_chunk(chunk):
+    """Worker: decode one byte range, return (precise rows, stats)"""
+    jsonl_path, start, end = chunk
+    stats = new_precise_stats()
+    rows = []
+    
+    for position, line in iter_chunk_lines(jsonl_path, start, end):
+        entry = parse_precise_line(line, stats, f"Byte offset {position}")
+        if entry is not None:
+            rows.append(precise_row(*entry))
+    
+    return rows, stats
+
+def iter_precise_rows(jsonl_path, stats, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream precise_row() tuples from berlin_business_data.jsonl
+
+    With workers > 1 newline-aligned chunks of the file are decoded in a
+    process pool. Only two chunks per worker are in flight at a time, so
+    memory is bounded by the chunk size, not the file size. Rows come out
+    in file order either way.
+    """
+    if workers <= 1:
+        for business_id, data in iter_precise_data(jsonl_path, stats):
+            yield precise_row(business_id, data)
+        return
+    
+    chunks = [
+        (str(jsonl_path), start, end)
+        for start, end in find_chunk_boundaries(jsonl_path, chunk_size)
+    ]
+    logger.info(f"Decoding {len(chunks):,} chunks with {workers} worker processes")
     
+    with multiprocessing.Pool(workers) as pool:
+        for rows, chunk_stats in imap_bounded(pool, _decode_chunk, chunks, 2 * workers):
+            for key, value in chunk_stats.items():
+                stats[key] += value
+            logger.info(f"Processed {stats['total']:,} records...")
+            yield from rows
+
+def log_precise_stats(stats, business_count):
+    """Log the counters of a finished iter_precise_rows() run"""
+    logger.info("="*60)
+    logger.info(f"Data loading complete!")
+    logger.info(f"Total records processed: {stats['total']:,}")
+    logger.info(f"Businesses with data: {business_count:,}")
+    logger.info(f"  With coordinates: {stats['with_coords']:,}")
+    logger.info(f"  With street address: {stats['with_street']:,}")
+    logger.info(f"  With phone: {stats['with_phone']:,}")
+    logger.info(f"  With email: {stats['with_email']:,}")
+    logger.info(f"  With website: {stats['with_website']:,}")
+    logger.info("="*60)
+
+def load_precise_data(jsonl_path, workers=1):
+    """Load data from berlin_business_data.jsonl into a dict keyed by business id"""
+    logger.info(f"Loading precise data from {jsonl_path}...")
+    
+    stats = new_precise_stats()
+    try:
+        data_map = {
+            row[0]: dict(zip(PRECISE_ROW_FIELDS[1:], row[1:]))
+            for row in iter_precise_rows(jsonl_path, stats, workers)
+        }
     except FileNotFoundError:
         logger.error(f"File not found: {jsonl_path}")
         raise
     except Exception as e:
         logger.error(f"Error loading data: {e}", exc_info=True)
         raise
+    
+    log_precise_stats(stats, len(data_map))
+    return data_map
 
-def update_database(db_path, data_map):
-    """Update database with precise data"""
-    logger.info(f"Updating database at {db_path}...")
+def apply_precise_data(business, data):
+    """Merge one load_precise_data() entry into a business dict
+
+    Follows the same rules as update_database(): only values that are
+    present overwrite. Returns True if anything changed.
+    """
+    changed = False
     
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    if data['lat'] and data['lon']:
+        business['lat'] = data['lat']
+        business['lon'] = data['lon']
+        business['coord_source'] = PRECISE_COORD_SOURCE
+        changed = True
     
-    # Add new columns if they don't exist
-    logger.info("Adding new columns to database...")
-    try:
-        cursor.execute('ALTER TABLE businesses ADD COLUMN street_address TEXT')
-    except sqlite3.OperationalError:
-        logger.info("street_address column already exists")
+    for column in PRECISE_COLUMNS:
+        if data[column]:
+            business[column] = data[column]
+            changed = True
     
-    try:
-        cursor.execute('ALTER TABLE businesses ADD COLUMN district TEXT')
-    except sqlite3.OperationalError:
-        logger.info("district column already exists")
+    return changed
+
+def add_precise_columns(conn):
+    """Add the PRECISE_COLUMNS and coord_source to databases created before they existed"""
+    logger.info("Adding new columns to database...")
     
-    try:
-        cursor.execute('ALTER TABLE businesses ADD COLUMN phone TEXT')
-    except sqlite3.OperationalError:
-        logger.info("phone column already exists")
+    cursor = conn.cursor()
+    for column in PRECISE_COLUMNS + ('coord_source',):
+        try:
+            cursor.execute(f'ALTER TABLE businesses ADD COLUMN {column} TEXT')
+        except sqlite3.OperationalError:
+            logger.info(f"{column} column already exists")
     
-    try:
-        cursor.execute('ALTER TABLE businesses ADD COLUMN email TEXT')
-    except sqlite3.OperationalError:
-        logger.info("email column already exists")
+    conn.commit()
+
+def update_database(db_path, data_map):
+    """Update database with precise data, one UPDATE per business in data_map"""
+    logger.info(f"Updating database at {db_path}...")
     
-    try:
-        cursor.execute('ALTER TABLE businesses ADD COLUMN website TEXT')
-    except sqlite3.OperationalError:
-        logger.info("website column already exists")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
     
-    conn.commit()
+    add_precise_columns(conn)
     
     # Update businesses
     logger.info("Updating business records...")
@@ -198,7 +295,8 @@ def update_database(db_path, data_map):
             if data['lat'] and data['lon']:
                 updates.append('lat = ?')
                 updates.append('lon = ?')
-                params.extend([data['lat'], data['lon']])
+                updates.append('coord_source = ?')
+                params.extend([data['lat'], data['lon'], PRECISE_COORD_SOURCE])
                 coords_updated += 1
             
             if data['street_address']:
@@ -227,6 +325,19 @@ def update_database(db_path, data_map):
                 cursor.execute(query, params)
                 updated_count += 1
     
+    # Districts and coordinates changed, so the facet counts follow
+    apply_facet_changes(conn)
+    conn.commit()
+    
+    # Coordinates changed, so the precomputed map clusters are stale
+    logger.info("Rebuilding map clusters...")
+    build_cluster_table(conn)
+    
+    # Signal the change to caches keyed on the database version
+    cursor.execute(
+        "INSERT OR REPLACE INTO statistics (key, value) VALUES ('last_updated', ?)",
+        (datetime.now().isoformat(),)
+    )
     conn.commit()
     
     logger.info("="*60)
@@ -252,8 +363,134 @@ def update_database(db_path, data_map):
     
     conn.close()
 
+def merge_precise_data(db_path, jsonl_path, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Update database with precise data in set-based statements
+
+    berlin_business_data.jsonl is streamed into a temporary staging table
+    and applied with a single UPDATE ... FROM, so memory stays bounded no
+    matter how large the file is; see iter_precise_rows() for workers and
+    chunk_size. Follows the same rules as
+    update_database(): only values that are present overwrite. Rows that
+    would not change are left alone, and unless many businesses moved
+    only the map cluster cells around them are recomputed.
+
+    Returns the number of businesses found in the file.
+    """
+    logger.info(f"Merging precise data into {db_path}...")
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        add_precise_columns(conn)
+        
+        # Stage the file; the last record for an id wins, as in load_precise_data()
+        logger.info(f"Staging precise data from {jsonl_path}...")
+        stats = new_precise_stats()
+        cursor.execute(f'''
+            CREATE TEMP TABLE precise_staging (
+                id TEXT PRIMARY KEY,
+                lat REAL,
+                lon REAL,
+                {', '.join(f'{column} TEXT' for column in PRECISE_COLUMNS)}
+            )
+        ''')
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO precise_staging VALUES ({", ".join("?" * len(PRECISE_ROW_FIELDS))})',
+            iter_precise_rows(jsonl_path, stats, workers, chunk_size)
+        )
+        cursor.execute('SELECT COUNT(*) FROM precise_staging')
+        staged_count = cursor.fetchone()[0]
+        log_precise_stats(stats, staged_count)
+        
+        # Old and new positions of moved businesses, for the cluster update
+        cursor.execute('''
+            SELECT b.lat, b.lon, s.lat, s.lon
+            FROM precise_staging s
+            JOIN businesses b ON b.id = s.id
+            WHERE s.lat IS NOT NULL AND (s.lat IS NOT b.lat OR s.lon IS NOT b.lon)
+        ''')
+        moved_rows = cursor.fetchall()
+        
+        logger.info("Updating business records...")
+        columns = ('lat', 'lon') + PRECISE_COLUMNS
+        cursor.execute(f'''
+            UPDATE businesses SET
+                {', '.join(f'{column} = COALESCE(s.{column}, businesses.{column})' for column in columns)},
+                coord_source = CASE WHEN s.lat IS NOT NULL THEN ? ELSE businesses.coord_source END
+            FROM precise_staging AS s
+            WHERE businesses.id = s.id
+              AND ({' OR '.join(f's.{column} IS NOT businesses.{column} AND s.{column} IS NOT NULL' for column in columns)}
+                   OR s.lat IS NOT NULL AND businesses.coord_source IS NOT ?)
+        ''', (PRECISE_COORD_SOURCE, PRECISE_COORD_SOURCE))
+        updated_count = cursor.rowcount
+        cursor.execute('DROP TABLE precise_staging')
+        apply_facet_changes(conn)
+        conn.commit()
+        
+        # Coordinates changed, so the precomputed map clusters around them are stale
+        moved = [
+            position
+            for old_lat, old_lon, lat, lon in moved_rows
+            for position in ((old_lat, old_lon), (lat, lon))
+            if position[0] is not None and position[1] is not None
+        ]
+        cursor.execute('SELECT COUNT(*) FROM businesses WHERE lat IS NOT NULL AND lon IS NOT NULL')
+        if len(moved_rows) > cursor.fetchone()[0] * CLUSTER_REBUILD_SHARE:
+            logger.info("Rebuilding map clusters...")
+            build_cluster_table(conn)
+        elif moved:
+            logger.info("Updating map clusters...")
+            cell_count = update_cluster_cells(conn, moved)
+            logger.info(f"  Recomputed map cluster cells: {cell_count:,}")
+        
+        # Signal the change to caches keyed on the database version
+        cursor.execute(
+            "INSERT OR REPLACE INTO statistics (key, value) VALUES ('last_updated', ?)",
+            (datetime.now().isoformat(),)
+        )
+        conn.commit()
+        
+        logger.info("="*60)
+        logger.info(f"Database update complete!")
+        logger.info(f"  Total businesses updated: {updated_count:,}")
+        logger.info(f"  Coordinates updated: {len(moved_rows):,}")
+        logger.info("="*60)
+        
+        return staged_count
+    finally:
+        conn.close()
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Merge berlin_business_data.jsonl into the business database')
+    parser.add_argument(
+        '--in-memory', action='store_true',
+        help='Load the whole file into a dict and update row by row instead of the set-based merge'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='Number of decoding processes (0 = one per CPU core, default: 1)'
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE // (1024 * 1024),
+        help='Chunk size in MB handed to each worker (default: %(default)s)'
+    )
+    return parser.parse_args()
+
 def main():
     """Main update process"""
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('data_update.log'),
+            logging.StreamHandler()
+        ]
+    )
+    
+    args = parse_args()
+    workers = args.workers or os.cpu_count() or 1
     start_time = datetime.now()
     
     # Define paths
@@ -271,11 +508,17 @@ def main():
     logger.info(f"Database: {db_path}")
     
     try:
-        # Load precise data
-        data_map = load_precise_data(jsonl_path)
-        
-        # Update database
-        update_database(db_path, data_map)
+        if args.in_memory:
+            # Load precise data
+            data_map = load_precise_data(jsonl_path, workers)
+            business_count = len(data_map)
+            
+            # Update database
+            update_database(db_path, data_map)
+        else:
+            business_count = merge_precise_data(
+                db_path, jsonl_path, workers, args.chunk_size * 1024 * 1024
+            )
         
         # Summary
         elapsed_time = (datetime.now() - start_time).total_seconds()
@@ -283,7 +526,7 @@ def main():
         logger.info("UPDATE COMPLETE!")
         logger.info("="*60)
         logger.info(f"Execution time: {elapsed_time:.2f} seconds")
-        logger.info(f"Processing speed: {len(data_map) / elapsed_time:.0f} records/sec")
+        logger.info(f"Processing speed: {business_count / elapsed_time:.0f} records/sec")
         logger.info("\nLog file created: data_update.log")
         
         return 0
@@ -0,0 +1,364 @@
+"""
+Search engine layer for the Berlin business database
+Full-text queries against the businesses_fts FTS5 index with German-aware folding
+"""
+
+import base64
+import json
+import re
+
+import numpy as np
+
+from backend import codec
+from backend.geo import haversine_km_array, bbox_around
+
+# German spellings folded to their ASCII transliteration before indexing and
+# before querying, so "Müller", "Mueller" and "MÜLLER" produce the same token.
+# Remaining diacritics (é, ç, ...) are stripped by the unicode61 tokenizer.
+GERMAN_FOLDS = (
+    ('ä', 'ae'), ('Ä', 'Ae'),
+    ('ö', 'oe'), ('Ö', 'Oe'),
+    ('ü', 'ue'), ('Ü', 'Ue'),
+    ('ß', 'ss'), ('ẞ', 'SS'),
+)
+
+FTS_TOKENIZER = 'unicode61 remove_diacritics 2'
+FTS_PREFIX_INDEXES = '2 3'
+
+# bm25 column weights for (name, categories): a hit in the name ranks higher
+FTS_RANK = 'bm25(businesses_fts, 10.0, 1.0)'
+
+# An unranked search_in_bbox() whose box holds more businesses than this walks
+# the name index in result order instead of sorting every match
+BBOX_SORT_MAX_MATCHES = 20000
+
+# Mirrors the unicode61 tokenizer: letters and digits, underscore separates
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+BUSINESS_COLUMNS = '''
+    b.id, b.name, b.postal_code, b.city, b.lat, b.lon, b.categories,
+    b.street_address, b.district, b.phone, b.email, b.website, b.branch_ids
+'''
+
+def fold_german(text):
+    """Fold German umlauts and ß to their ASCII transliteration"""
+    for source, target in GERMAN_FOLDS:
+        text = text.replace(source, target)
+    return text
+
+def fold_sql(expression):
+    """Wrap a SQL expression in the replace() chain equivalent to fold_german()"""
+    for source, target in GERMAN_FOLDS:
+        expression = f"replace({expression}, '{source}', '{target}')"
+    return expression
+
+def categories_text_sql(column='categories'):
+    """SQL expression turning a JSON categories array into space separated text"""
+    return f"(SELECT group_concat(value, ' ') FROM json_each({column}))"
+
+def tokenize_query(text):
+    """Split user input into folded search tokens"""
+    return TOKEN_PATTERN.findall(fold_german(text or ''))
+
+def build_fts_query(search_term=""):
+    """Build an FTS5 MATCH expression, or '' if there is nothing to match
+
+    Every search token becomes a prefix query so partial input like "fris"
+    already finds "Friseur".
+    """
+    terms = tokenize_query(search_term)
+    if not terms:
+        return ''
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def row_to_business(row):
+    """Convert a BUSINESS_COLUMNS row into a business dict"""
+    return {
+        'id': row[0],
+        'name': row[1],
+        'postal_code': row[2],
+        'city': row[3],
+        'lat': row[4],
+        'lon': row[5],
+        'categories': codec.loads(row[6]) if row[6] else [],
+        'street_address': row[7],
+        'district': row[8],
+        'phone': row[9],
+        'email': row[10],
+        'website': row[11],
+        'branch_ids': codec.loads(row[12]) if row[12] else []
+    }
+
+def get_categories(conn):
+    """Get all categories as (id, name) tuples sorted by name"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, name FROM categories ORDER BY name')
+    return cursor.fetchall()
+
+def get_category_id(conn, name):
+    """Get the id of a category by exact name, or None if unknown"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT id FROM categories WHERE name = ?', (name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def get_cities(conn):
+    """Get all distinct cities sorted by name"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT DISTINCT city FROM businesses ORDER BY city')
+    return [row[0] for row in cursor.fetchall() if row[0]]
+
+def get_statistics(conn):
+    """Get the statistics table as a key -> value dict"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT key, value FROM statistics')
+    return dict(cursor.fetchall())
+
+def get_businesses_by_ids(conn, business_ids):
+    """Get businesses by id, in the order given; unknown ids are skipped"""
+    if not business_ids:
+        return []
+    
+    cursor = conn.cursor()
+    placeholders = ', '.join('?' * len(business_ids))
+    cursor.execute(
+        f'SELECT {BUSINESS_COLUMNS} FROM businesses b WHERE b.id IN ({placeholders})',
+        list(business_ids)
+    )
+    found = {row[0]: row_to_business(row) for row in cursor.fetchall()}
+    return [found[business_id] for business_id in business_ids if business_id in found]
+
+def get_businesses_by_rowids(conn, rowids):
+    """Get businesses by rowid, in the order given; unknown rowids are skipped"""
+    if not rowids:
+        return []
+    
+    cursor = conn.cursor()
+    placeholders = ', '.join('?' * len(rowids))
+    cursor.execute(
+        f'SELECT b.rowid, {BUSINESS_COLUMNS} FROM businesses b WHERE b.rowid IN ({placeholders})',
+        list(rowids)
+    )
+    found = {row[0]: row_to_business(row[1:]) for row in cursor.fetchall()}
+    return [found[rowid] for rowid in rowids if rowid in found]
+
+def build_search_query(search_term="", category_id=None, city="", bbox=None,
+                       columns=BUSINESS_COLUMNS, name_order=False):
+    """Build the filtered business SELECT, returning (query, params, ranked)
+
+    bbox is an optional (min_lat, min_lon, max_lat, max_lon) tuple served by
+    the businesses_rtree spatial index. With name_order, an unranked query
+    walks the name index instead, so that ORDER BY b.name, b.rowid with a
+    LIMIT stops early. The query has no ORDER BY or LIMIT.
+    """
+    match_query = build_fts_query(search_term)
+    joins = []
+    conditions = ['b.lat IS NOT NULL']
+    params = []
+    use_rtree = bbox is not None
+    
+    # Drive the query from the most selective index: the FTS match if there is
+    # one, otherwise the R*Tree. CROSS JOIN pins SQLite's join order, which
+    # would otherwise prefer scanning every business of a category.
+    join = 'JOIN'
+    if match_query:
+        from_clause = 'businesses_fts JOIN businesses b ON b.rowid = businesses_fts.rowid'
+        if bbox is not None:
+            joins.append('JOIN businesses_rtree r ON r.id = b.rowid')
+    elif name_order:
+        from_clause = 'businesses b INDEXED BY idx_name'
+        join = 'CROSS JOIN'
+        use_rtree = False
+    elif bbox is not None:
+        from_clause = 'businesses_rtree r CROSS JOIN businesses b ON b.rowid = r.id'
+        join = 'CROSS JOIN'
+    else:
+        from_clause = 'businesses b'
+    
+    # Add category filter (exact match through the junction table)
+    if category_id is not None:
+        joins.append(f'{join} business_categories bc ON bc.business_id = b.id AND bc.category_id = ?')
+        params.append(category_id)
+    
+    # Add bounding box filter (R*Tree boxes are float32, so re-check exactly)
+    if bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        if use_rtree:
+            conditions.append(
+                'r.min_lat <= ? AND r.max_lat >= ? AND r.min_lon <= ? AND r.max_lon >= ?'
+            )
+            params.extend([max_lat, min_lat, max_lon, min_lon])
+        conditions.append('+b.lat BETWEEN ? AND ? AND +b.lon BETWEEN ? AND ?')
+        params.extend([min_lat, max_lat, min_lon, max_lon])
+    
+    # Add search filter
+    if match_query:
+        conditions.append('businesses_fts MATCH ?')
+        params.append(match_query)
+    
+    # Add city filter
+    if city:
+        conditions.append('b.city = ?')
+        params.append(city)
+    
+    query = f'''
+        SELECT {columns}
+        FROM {from_clause}
+        {' '.join(joins)}
+        WHERE {' AND '.join(conditions)}
+    '''
+    return query, params, bool(match_query)
+
+def _run_search(conn, query, params, ranked, limit):
+    """Execute a built search query in result order, limit applied
+
+    Results are ordered by (bm25 rank, rowid) for text searches and by
+    (name, rowid) otherwise, as in search_businesses_page().
+    """
+    if ranked:
+        query += f' ORDER BY {FTS_RANK}, b.rowid'
+    else:
+        query += ' ORDER BY b.name, b.rowid'
+    query += ' LIMIT ?'
+    
+    cursor = conn.cursor()
+    cursor.execute(query, params + [limit])
+    return [row_to_business(row) for row in cursor.fetchall()]
+
+def encode_cursor(sort_key, rowid):
+    """Encode a (sort key, rowid) position as an opaque URL-safe token"""
+    raw = json.dumps([sort_key, rowid], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Decode a token from encode_cursor(); raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        sort_key, rowid = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+    if not isinstance(rowid, int) or not isinstance(sort_key, (str, int, float)):
+        raise ValueError(f"Invalid cursor: {token!r}")
+    return sort_key, rowid
+
+def search_businesses_page(conn, search_term="", category_id=None, city="", limit=100,
+                           cursor=None, offset=0):
+    """Fetch one page of search results, returning (businesses, next_cursor)
+
+    Results are ordered by (bm25 rank, rowid) for text searches and by
+    (name, rowid) otherwise. Passing the returned next_cursor continues
+    after the last row with a keyset seek, so deep pages cost the same as
+    the first one. offset is only honoured when no cursor is given.
+    next_cursor is None on the last page.
+    """
+    sort_expr = FTS_RANK if build_fts_query(search_term) else 'b.name'
+    query, params, _ = build_search_query(
+        search_term, category_id, city,
+        columns=f'{BUSINESS_COLUMNS}, {sort_expr} AS sort_key, b.rowid AS sort_rowid'
+    )
+    
+    # bm25() is not allowed in WHERE, so the keyset condition goes outside
+    query = f'SELECT * FROM ({query})'
+    if cursor is not None:
+        query += ' WHERE (sort_key, sort_rowid) > (?, ?)'
+        params.extend(decode_cursor(cursor))
+        offset = 0
+    query += ' ORDER BY sort_key, sort_rowid LIMIT ? OFFSET ?'
+    params.extend([limit, offset])
+    
+    db_cursor = conn.cursor()
+    db_cursor.execute(query, params)
+    rows = db_cursor.fetchall()
+    
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+    
+    return [row_to_business(row) for row in rows], next_cursor
+
+def search_businesses(conn, search_term="", category_id=None, city="", limit=100, offset=0):
+    """Search geocoded businesses, ranked by bm25 when a text query is given"""
+    businesses, _ = search_businesses_page(
+        conn, search_term, category_id, city, limit, offset=offset
+    )
+    return businesses
+
+def count_businesses(conn, search_term="", category_id=None, city="", bbox=None):
+    """Count geocoded businesses matching the same filters as the searches"""
+    query, params, _ = build_search_query(
+        search_term, category_id, city, bbox, columns='COUNT(*)'
+    )
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return cursor.fetchone()[0]
+
+def search_in_bbox(conn, min_lat, min_lon, max_lat, max_lon,
+                   search_term="", category_id=None, city="", limit=500):
+    """Search geocoded businesses inside a lat/lon bounding box, in _run_search() order
+
+    Without a text query, a box holding more than BBOX_SORT_MAX_MATCHES
+    businesses is read in name order instead of sorting every match.
+    """
+    bbox = (min_lat, min_lon, max_lat, max_lon)
+    name_order = False
+    if not build_fts_query(search_term):
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*) FROM (
+                SELECT 1 FROM businesses_rtree
+                WHERE min_lat <= ? AND max_lat >= ? AND min_lon <= ? AND max_lon >= ?
+                LIMIT ?
+            )
+        ''', (max_lat, min_lat, max_lon, min_lon, BBOX_SORT_MAX_MATCHES + 1))
+        name_order = cursor.fetchone()[0] > BBOX_SORT_MAX_MATCHES
+    
+    query, params, ranked = build_search_query(
+        search_term, category_id, city, bbox, name_order=name_order
+    )
+    return _run_search(conn, query, params, ranked, limit)
+
+def search_nearby(conn, lat, lon, k=20, search_term="", category_id=None, city="",
+                  initial_radius_km=0.5, max_radius_km=100.0):
+    """Find the k businesses closest to (lat, lon), nearest first
+
+    Candidates come from R*Tree box queries around the point; the box is
+    doubled until k candidates lie within its inscribed circle (which makes
+    the haversine top-k exact) or max_radius_km is reached. Each business
+    dict gets an extra 'distance_km' key.
+    """
+    cursor = conn.cursor()
+    radius_km = initial_radius_km
+    
+    while True:
+        bbox = bbox_around(lat, lon, radius_km)
+        query, params, _ = build_search_query(
+            search_term, category_id, city, bbox, columns='b.rowid, b.lat, b.lon'
+        )
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        
+        rowids = np.array([row[0] for row in rows], dtype=np.int64)
+        distances = haversine_km_array(
+            lat, lon,
+            np.array([row[1] for row in rows], dtype=np.float64),
+            np.array([row[2] for row in rows], dtype=np.float64)
+        )
+        within_radius = int(np.count_nonzero(distances <= radius_km))
+        
+        if within_radius >= k or radius_km >= max_radius_km:
+            break
+        radius_km = min(radius_km * 2, max_radius_km)
+    
+    # Nearest first, ties broken by rowid
+    inside = distances <= radius_km
+    rowids, distances = rowids[inside], distances[inside]
+    nearest = np.lexsort((rowids, distances))[:k]
+    if not len(nearest):
+        return []
+    
+    # Load full rows for the winners only
+    businesses = get_businesses_by_rowids(conn, rowids[nearest].tolist())
+    for business, distance in zip(businesses, distances[nearest].tolist()):
+        business['distance_km'] = distance
+    
+    return businesses
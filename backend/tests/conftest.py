@@ -0,0 +1,14 @@
+"""
+Shared pytest fixtures
+"""
+
+import pytest
+
+@pytest.fixture(autouse=True)
+def run_in_tmp_path(tmp_path, monkeypatch):
+    """Run every test from its tmp_path
+
+    Files written relative to the working directory, like the scripts' log
+    files when a test calls a main(), stay out of the tree.
+    """
+    monkeypatch.chdir(tmp_path)
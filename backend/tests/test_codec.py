@@ -0,0 +1,70 @@
+"""
+The msgspec record decoders must keep every record the stdlib json path keeps
+"""
+
+import json
+import random
+
+import pytest
+
+from backend import codec
+from backend.benchmarks.synthetic import gsbestand_record, precise_data_record
+from backend.scripts import extract_berlin_data, update_precise_data
+
+pytestmark = pytest.mark.skipif(codec.BACKEND != 'msgspec', reason='msgspec backend not active')
+
+def precise_variants():
+    """Precise data records with null, missing and empty nested lists"""
+    variants = []
+    for field in ('koordinaten', 'telefon', 'email', 'www'):
+        for value in (None, [], 'missing'):
+            record = precise_data_record(f'id-{field}-{value}', random.Random(1))
+            teilnehmer = record['antwort']['daten']['teilnehmer']
+            parent = teilnehmer['adresse']['geodaten'] if field == 'koordinaten' else teilnehmer['kontakt']
+            if value == 'missing':
+                del parent[field]
+            else:
+                parent[field] = value
+            variants.append(record)
+    return variants
+
+def gsbestand_variants():
+    """Berlin gsbestand records with a null, missing and empty personListe"""
+    variants = []
+    for value in (None, [], 'missing'):
+        record = gsbestand_record(1, random.Random(1), True)
+        kontakt = record['verlagsdaten']['kontaktinformationen']
+        if value == 'missing':
+            del kontakt['personListe']
+        else:
+            kontakt['personListe'] = value
+        variants.append(record)
+    return variants
+
+@pytest.mark.parametrize('record', precise_variants())
+def test_precise_record_parity(record, monkeypatch):
+    line = json.dumps(record).encode('utf-8')
+    msgspec_stats = update_precise_data.new_precise_stats()
+    msgspec_result = update_precise_data.parse_precise_record(line, msgspec_stats)
+    
+    monkeypatch.setattr(codec, 'decode_precise_data', json.loads)
+    stdlib_stats = update_precise_data.new_precise_stats()
+    stdlib_result = update_precise_data.parse_precise_record(line, stdlib_stats)
+    
+    assert msgspec_result is not None
+    assert msgspec_result == stdlib_result
+    assert msgspec_stats == stdlib_stats
+
+@pytest.mark.parametrize('record', gsbestand_variants())
+def test_gsbestand_record_parity(record, monkeypatch):
+    line = json.dumps(record).encode('utf-8')
+    msgspec_stats = extract_berlin_data.new_extraction_stats()
+    msgspec_result = extract_berlin_data.parse_berlin_business(line, {}, msgspec_stats, 'Line 1')
+    
+    monkeypatch.setattr(codec, 'decode_gsbestand', json.loads)
+    stdlib_stats = extract_berlin_data.new_extraction_stats()
+    stdlib_result = extract_berlin_data.parse_berlin_business(line, {}, stdlib_stats, 'Line 1')
+    
+    assert msgspec_result == stdlib_result
+    assert msgspec_stats == stdlib_stats
+    assert msgspec_stats['json_errors'] == 0
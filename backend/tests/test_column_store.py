@@ -0,0 +1,58 @@
+"""
+BusinessStore results against the SQLite search paths
+"""
+
+import random
+import sqlite3
+
+import pytest
+
+from backend import search_engine
+from backend.benchmarks.synthetic import BERLIN_BBOX, generate_businesses
+from backend.column_store import BusinessStore
+from backend.scripts import create_database
+
+BUSINESS_COUNT = 3000
+LIMIT = 25
+
+@pytest.fixture(scope='module')
+def conn(tmp_path_factory):
+    """A synthetic database where many businesses share a name"""
+    businesses = list(generate_businesses(BUSINESS_COUNT, seed=7))
+    for business in businesses[::3]:
+        business['name'] = 'Kiez Café'
+    db_path = tmp_path_factory.mktemp('column_store') / 'businesses.db'
+    create_database.build_database(db_path, iter(businesses))
+    connection = sqlite3.connect(db_path)
+    yield connection
+    connection.close()
+
+def bbox_queries():
+    """(bbox, search_term, category_index, city) combinations, including a box around everything"""
+    rng = random.Random(11)
+    min_lat, min_lon, max_lat, max_lon = BERLIN_BBOX
+    queries = [(BERLIN_BBOX, '', None, ''), (BERLIN_BBOX, 'kiez', None, '')]
+    for _ in range(20):
+        lat = rng.uniform(min_lat, max_lat - 0.1)
+        lon = rng.uniform(min_lon, max_lon - 0.1)
+        bbox = (lat, lon, lat + rng.uniform(0.05, 0.3), lon + rng.uniform(0.05, 0.4))
+        queries.append((bbox, rng.choice(['', '', 'kiez', 'bäck']), rng.choice([None, 0, 3]), rng.choice(['', 'Berlin'])))
+    return queries
+
+@pytest.mark.parametrize('sort_max_matches', [search_engine.BBOX_SORT_MAX_MATCHES, 0])
+def test_bbox_search_parity_under_limit(conn, monkeypatch, sort_max_matches):
+    # 0 sends every unranked query through the name index instead of the sort
+    monkeypatch.setattr(search_engine, 'BBOX_SORT_MAX_MATCHES', sort_max_matches)
+    store = BusinessStore.from_connection(conn)
+    category_ids = [category_id for category_id, _ in search_engine.get_categories(conn)]
+    
+    truncated = 0
+    for bbox, search_term, category_index, city in bbox_queries():
+        category_id = None if category_index is None else category_ids[category_index]
+        expected = search_engine.search_in_bbox(conn, *bbox, search_term, category_id, city, limit=LIMIT)
+        found = store.search(conn, search_term, category_id, city, bbox, limit=LIMIT)
+        assert [b['id'] for b in found] == [b['id'] for b in expected]
+        if store.count(conn, search_term, category_id, city, bbox) > LIMIT:
+            truncated += 1
+    
+    assert truncated >= 10
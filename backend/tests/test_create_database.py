@@ -0,0 +1,90 @@
+"""
+Bulk loading in create_database.py
+"""
+
+import logging
+import sqlite3
+
+from backend.benchmarks.synthetic import generate_businesses
+from backend.scripts import create_database
+
+def test_rejected_rows_are_skipped_and_counted(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(create_database, 'INSERT_BATCH_SIZE', 8)
+    businesses = list(generate_businesses(30, seed=5))
+    # sqlite3 cannot bind a dict, so these two rows fail their batch
+    businesses[3]['phone'] = {'rufnummer': '030 123456'}
+    businesses[20]['website'] = {'url': 'https://example.de'}
+    businesses[11]['name'] = None
+    
+    conn = sqlite3.connect(tmp_path / 'businesses.db')
+    try:
+        create_database.create_database_schema(conn)
+        with caplog.at_level(logging.INFO, logger=create_database.logger.name):
+            create_database.insert_businesses(conn, iter(businesses))
+        
+        stored = {row[0] for row in conn.execute('SELECT id FROM businesses')}
+        fts_count = conn.execute('SELECT COUNT(*) FROM businesses_fts').fetchone()[0]
+    finally:
+        conn.close()
+    
+    rejected = {businesses[i]['id'] for i in (3, 11, 20)}
+    assert stored == {business['id'] for business in businesses} - rejected
+    assert fts_count == len(stored)
+    assert '  Inserted: 27' in caplog.messages
+    assert '  Skipped: 3' in caplog.messages
+    assert sum(message.startswith('Failed to insert business') for message in caplog.messages) == 2
+
+def test_busy_checkpoint_falls_back_to_copying_the_database(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(create_database, 'CHECKPOINT_RETRY_SECONDS', 0.001)
+    db_path = tmp_path / 'businesses.db'
+    writer = sqlite3.connect(db_path)
+    writer.execute('PRAGMA journal_mode = WAL')
+    writer.execute('CREATE TABLE t (x)')
+    writer.execute('INSERT INTO t VALUES (1)')
+    writer.commit()
+    
+    # An open read transaction keeps the log from being truncated
+    reader = sqlite3.connect(db_path)
+    reader.execute('BEGIN')
+    reader.execute('SELECT * FROM t').fetchall()
+    try:
+        with caplog.at_level(logging.WARNING, logger=create_database.logger.name):
+            assert create_database.checkpoint_wal(db_path) is False
+        assert any(message.startswith('Could not checkpoint') for message in caplog.messages)
+        
+        create_database.build_database(db_path, generate_businesses(10))
+        # The reader keeps its snapshot until its transaction ends
+        assert reader.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 1
+        reader.rollback()
+        assert reader.execute('SELECT COUNT(*) FROM businesses').fetchone()[0] == 10
+    finally:
+        reader.close()
+        writer.close()
+    
+    assert create_database.checkpoint_wal(db_path) is True
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute('SELECT COUNT(*) FROM businesses').fetchone()[0] == 10
+        assert conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+    finally:
+        conn.close()
+
+def test_checkpoint_succeeds_once_readers_finish(tmp_path, monkeypatch):
+    db_path = tmp_path / 'businesses.db'
+    writer = sqlite3.connect(db_path)
+    writer.execute('PRAGMA journal_mode = WAL')
+    writer.execute('CREATE TABLE t (x)')
+    writer.execute('INSERT INTO t VALUES (1)')
+    writer.commit()
+    
+    reader = sqlite3.connect(db_path)
+    reader.execute('BEGIN')
+    reader.execute('SELECT * FROM t').fetchall()
+    # The reader finishes while checkpoint_wal() waits for its second attempt
+    monkeypatch.setattr(create_database.time, 'sleep', lambda seconds: reader.rollback())
+    try:
+        assert create_database.checkpoint_wal(db_path) is True
+        assert (tmp_path / 'businesses.db-wal').stat().st_size == 0
+    finally:
+        reader.close()
+        writer.close()
@@ -0,0 +1,158 @@
+"""
+Incremental create_database.py runs after update_precise_data.py
+"""
+
+import json
+import random
+import sqlite3
+
+import pytest
+
+from backend import clustering, facets, search_engine
+from backend.benchmarks.synthetic import BERLIN_BBOX, generate_businesses, precise_data_record
+from backend.scripts import create_database, update_precise_data
+
+BUSINESS_COUNT = 200
+PRECISE_COUNT = 50
+
+@pytest.fixture
+def database(tmp_path):
+    """A built database, its input businesses and the precise data file for the first PRECISE_COUNT"""
+    db_path = tmp_path / 'businesses.db'
+    businesses = list(generate_businesses(BUSINESS_COUNT, seed=3))
+    create_database.build_database(db_path, iter(businesses))
+    
+    rng = random.Random(4)
+    jsonl_path = tmp_path / 'berlin_business_data.jsonl'
+    with open(jsonl_path, 'w', encoding='utf-8') as f:
+        for business in businesses[:PRECISE_COUNT]:
+            f.write(json.dumps(precise_data_record(business['id'], rng), ensure_ascii=False) + '\n')
+    return db_path, businesses, jsonl_path
+
+def positions(db_path):
+    """id -> (lat, lon) of every business"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0]: row[1:] for row in conn.execute('SELECT id, lat, lon FROM businesses')}
+    finally:
+        conn.close()
+
+def changed_copies(businesses):
+    """The businesses with every name changed, so each one is updated"""
+    return [dict(business, name=business['name'] + ' GmbH') for business in businesses]
+
+@pytest.mark.parametrize('merge', ['set-based', 'in-memory'])
+def test_precise_coordinates_survive_incremental_update(database, merge):
+    db_path, businesses, jsonl_path = database
+    if merge == 'set-based':
+        update_precise_data.merge_precise_data(db_path, jsonl_path)
+    else:
+        update_precise_data.update_database(db_path, update_precise_data.load_precise_data(jsonl_path))
+    precise = positions(db_path)
+    
+    create_database.update_database(db_path, changed_copies(businesses))
+    
+    updated = positions(db_path)
+    precise_ids = [business['id'] for business in businesses[:PRECISE_COUNT]]
+    assert all(updated[business_id] == precise[business_id] for business_id in precise_ids)
+    for business in businesses[PRECISE_COUNT:]:
+        assert updated[business['id']] == (business['lat'], business['lon'])
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        names = conn.execute("SELECT COUNT(*) FROM businesses WHERE name LIKE '% GmbH'").fetchone()[0]
+    finally:
+        conn.close()
+    assert names == BUSINESS_COUNT
+
+def test_precise_coordinates_in_input_replace_stored_ones(database):
+    db_path, businesses, jsonl_path = database
+    update_precise_data.merge_precise_data(db_path, jsonl_path)
+    
+    moved = changed_copies(businesses)
+    moved[0].update(lat=52.5, lon=13.4, coord_source=update_precise_data.PRECISE_COORD_SOURCE)
+    create_database.update_database(db_path, moved)
+    
+    assert positions(db_path)[moved[0]['id']] == (52.5, 13.4)
+
+def build_baseline_database(db_path, businesses):
+    """A database in the schema create_database.py wrote before the R*Tree, categories and clusters"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript('''
+            CREATE TABLE businesses (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                postal_code TEXT,
+                city TEXT,
+                lat REAL,
+                lon REAL,
+                categories TEXT,
+                branch_ids TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX idx_name ON businesses(name);
+            CREATE VIRTUAL TABLE businesses_fts USING fts5(
+                id UNINDEXED,
+                name,
+                categories,
+                content=businesses,
+                content_rowid=rowid
+            );
+            CREATE TABLE statistics (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        ''')
+        conn.executemany(
+            'INSERT INTO businesses (id, name, postal_code, city, lat, lon, categories, branch_ids) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                (b['id'], b['name'], b['postal_code'], b['city'], b['lat'], b['lon'],
+                 json.dumps(b['categories']), json.dumps(b['branch_ids']))
+                for b in businesses
+            ]
+        )
+        conn.execute('''
+            INSERT INTO businesses_fts(rowid, id, name, categories)
+            SELECT rowid, id, name, categories FROM businesses
+        ''')
+        conn.execute("INSERT INTO statistics (key, value) VALUES ('last_updated', 'baseline')")
+        conn.commit()
+    finally:
+        conn.close()
+
+def test_incremental_update_upgrades_baseline_database(tmp_path):
+    db_path = tmp_path / 'businesses.db'
+    businesses = list(generate_businesses(BUSINESS_COUNT, seed=5))
+    build_baseline_database(db_path, businesses)
+    
+    # Nothing moves, so the upgrade cannot lean on the cluster cell update
+    create_database.update_database(db_path, changed_copies(businesses[:-10]))
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        remaining = BUSINESS_COUNT - 10
+        assert conn.execute('SELECT COUNT(*) FROM businesses_rtree').fetchone()[0] == remaining
+        assert len(search_engine.search_in_bbox(conn, *BERLIN_BBOX, limit=1000)) == remaining
+        assert len(search_engine.search_nearby(conn, 52.5, 13.4, k=5)) == 5
+        
+        clusters = clustering.get_clusters(conn, clustering.MIN_CLUSTER_ZOOM)
+        assert sum(cluster['count'] for cluster in clusters) == remaining
+        
+        # The index holds folded names: "mueller" finds "Müller"
+        muellers = [b for b in businesses[:-10] if 'Müller' in b['name']]
+        found = search_engine.search_businesses(conn, 'mueller', limit=1000)
+        assert len(found) == len(muellers) > 0
+        
+        linked = conn.execute('SELECT COUNT(DISTINCT business_id) FROM business_categories').fetchone()[0]
+        assert linked == remaining
+        
+        # Stored facet counts agree with grouping the businesses on the fly
+        everywhere = (-90.0, -180.0, 90.0, 180.0)
+        stored = facets.get_facet_counts(conn)
+        assert stored['categories']
+        assert stored == facets.get_facet_counts(conn, bbox=everywhere)
+    finally:
+        conn.close()
@@ -0,0 +1,252 @@
+"""
+Mapbox Vector Tiles (MVT) for business points
+Tiles are generated from the SQLite data (pre-clustered up to
+MAX_CLUSTER_ZOOM) and cached in an MBTiles file
+"""
+
+import gzip
+import json
+import math
+import sqlite3
+import struct
+import threading
+from pathlib import Path
+
+from backend import clustering, search_engine
+
+TILE_EXTENT = 4096
+
+# Extra margin around each tile (in tile units) so markers on a tile edge
+# are drawn on both neighbouring tiles
+TILE_BUFFER = 64
+
+MAX_TILE_ZOOM = 22
+LAYER_NAME = 'businesses'
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / 'data' / 'tiles_cache.mbtiles'
+
+# ---------------------------------------------------------------------------
+# Protobuf encoding (vector_tile.proto, points only)
+# ---------------------------------------------------------------------------
+
+def _varint(value):
+    """Encode an unsigned integer as a protobuf varint"""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _zigzag(value):
+    """Zigzag-encode a signed integer"""
+    return (value << 1) ^ (value >> 63)
+
+def _key(field_number, wire_type):
+    return _varint((field_number << 3) | wire_type)
+
+def _bytes_field(field_number, payload):
+    return _key(field_number, 2) + _varint(len(payload)) + payload
+
+def _varint_field(field_number, value):
+    return _key(field_number, 0) + _varint(value)
+
+def _packed_field(field_number, values):
+    return _bytes_field(field_number, b''.join(_varint(v) for v in values))
+
+def _encode_value(value):
+    """Encode a property value as a vector_tile Value message"""
+    if isinstance(value, bool):
+        return _varint_field(7, int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _varint_field(5, value)
+        return _varint_field(6, _zigzag(value))
+    if isinstance(value, float):
+        return _key(3, 1) + struct.pack('<d', value)
+    return _bytes_field(1, str(value).encode('utf-8'))
+
+def encode_point_layer(name, features, extent=TILE_EXTENT):
+    """Encode a point layer as a complete single-layer tile
+
+    features is a list of (x, y, properties) with x/y in tile coordinates
+    (0..extent). Returns b'' when there are no features.
+    """
+    if not features:
+        return b''
+    
+    keys = {}
+    values = {}
+    encoded_features = []
+    
+    for x, y, properties in features:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        
+        # MoveTo(count=1) followed by the zigzag-encoded point
+        geometry = [(1 & 0x7) | (1 << 3), _zigzag(int(x)), _zigzag(int(y))]
+        
+        feature = b''
+        if tags:
+            feature += _packed_field(2, tags)
+        feature += _varint_field(3, 1)  # GeomType.POINT
+        feature += _packed_field(4, geometry)
+        encoded_features.append(_bytes_field(2, feature))
+    
+    layer = _varint_field(15, 2) + _bytes_field(1, name.encode('utf-8'))
+    layer += b''.join(encoded_features)
+    layer += b''.join(_bytes_field(3, key.encode('utf-8')) for key in keys)
+    layer += b''.join(_bytes_field(4, _encode_value(value)) for _, value in values)
+    layer += _varint_field(5, extent)
+    
+    return _bytes_field(3, layer)
+
+# ---------------------------------------------------------------------------
+# Tile generation
+# ---------------------------------------------------------------------------
+
+def tile_bounds(z, x, y, buffer=0):
+    """Bounding box (min_lat, min_lon, max_lat, max_lon) of a XYZ tile
+
+    buffer widens the box by that many tile units (of TILE_EXTENT) per side.
+    """
+    n = 2 ** z
+    pad = buffer / TILE_EXTENT
+    
+    def lon(tx):
+        return tx / n * 360.0 - 180.0
+    
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+    
+    return lat(y + 1 + pad), lon(x - pad), lat(y - pad), lon(x + 1 + pad)
+
+def _tile_point(lat, lon, z, x, y, extent=TILE_EXTENT):
+    """Position of a point in tile coordinates"""
+    px, py = clustering.project(lat, lon, z)
+    scale = extent / clustering.TILE_SIZE
+    return (px - x * clustering.TILE_SIZE) * scale, (py - y * clustering.TILE_SIZE) * scale
+
+def render_tile(conn, z, x, y):
+    """Render one uncompressed MVT tile of the businesses layer"""
+    bbox = tile_bounds(z, x, y, TILE_BUFFER)
+    features = []
+    
+    if z <= clustering.MAX_CLUSTER_ZOOM:
+        for cluster in clustering.get_clusters(conn, z, bbox):
+            tx, ty = _tile_point(cluster['lat'], cluster['lon'], z, x, y)
+            features.append((tx, ty, {
+                'count': cluster['count'],
+                'id': cluster['business_id']
+            }))
+    else:
+        businesses = search_engine.search_in_bbox(conn, *bbox, limit=TILE_EXTENT * 4)
+        for business in businesses:
+            tx, ty = _tile_point(business['lat'], business['lon'], z, x, y)
+            features.append((tx, ty, {
+                'count': 1,
+                'id': business['id'],
+                'name': business['name'],
+                'category': business['categories'][0] if business['categories'] else None
+            }))
+    
+    return encode_point_layer(LAYER_NAME, features)
+
+def is_valid_tile(z, x, y):
+    """Check that z/x/y address an existing tile"""
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+# ---------------------------------------------------------------------------
+# MBTiles cache
+# ---------------------------------------------------------------------------
+
+class MBTilesCache:
+    """Gzipped tile cache in MBTiles layout, tied to one source database version
+
+    The cache is emptied whenever reset() sees a different source version
+    (statistics.last_updated of the business database).
+    """
+    
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tiles (
+                zoom_level INTEGER,
+                tile_column INTEGER,
+                tile_row INTEGER,
+                tile_data BLOB,
+                PRIMARY KEY (zoom_level, tile_column, tile_row)
+            );
+        ''')
+        self.source_version = self._get_metadata('source_version')
+    
+    def _get_metadata(self, name):
+        row = self._conn.execute('SELECT value FROM metadata WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+    
+    def reset(self, source_version):
+        """Drop all tiles if they were rendered from another database version"""
+        if source_version == self.source_version:
+            return False
+        
+        with self._lock:
+            self._conn.execute('DELETE FROM tiles')
+            metadata = {
+                'name': 'Berlin businesses',
+                'format': 'pbf',
+                'minzoom': '0',
+                'maxzoom': str(MAX_TILE_ZOOM),
+                'json': json.dumps({'vector_layers': [{
+                    'id': LAYER_NAME,
+                    'fields': {'count': 'Number', 'id': 'String', 'name': 'String', 'category': 'String'}
+                }]}),
+                'source_version': source_version
+            }
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)', metadata.items()
+            )
+            self._conn.commit()
+            self.source_version = source_version
+        return True
+    
+    def get(self, z, x, y):
+        """Get a gzipped tile, or None if not cached"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+                (z, x, 2 ** z - 1 - y)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def put(self, z, x, y, tile_data):
+        """Store a gzipped tile (MBTiles rows are TMS, i.e. y flipped)"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)',
+                (z, x, 2 ** z - 1 - y, tile_data)
+            )
+            self._conn.commit()
+    
+    def close(self):
+        self._conn.close()
+
+def get_tile(conn, cache, z, x, y):
+    """Get a gzipped MVT tile from the cache, rendering it on a miss"""
+    source_version = search_engine.get_statistics(conn).get('last_updated', '')
+    cache.reset(source_version)
+    
+    tile_data = cache.get(z, x, y)
+    if tile_data is None:
+        tile_data = gzip.compress(render_tile(conn, z, x, y))
+        cache.put(z, x, y, tile_data)
+    return tile_data
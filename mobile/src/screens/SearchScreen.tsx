@@ -2,7 +2,7 @@
  * Search Screen - List view with filters
  */
 
-import React, {useState, useEffect} from 'react';
+import React, {useState, useEffect, useRef} from 'react';
 import {
   View,
   StyleSheet,
@@ -18,18 +18,31 @@ import {useNavigation} from '@react-navigation/native';
 import ApiService, {Business} from '../services/api';
 import colors from '../theme/colors';
 
+type SearchParams = {
+  search?: string;
+  category?: string;
+  city?: string;
+  limit: number;
+};
+
 export default function SearchScreen() {
   const {t} = useTranslation();
   const navigation = useNavigation();
   
   const [businesses, setBusinesses] = useState<Business[]>([]);
   const [loading, setLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  // Filters the first page was fetched with; later pages must reuse them
+  const [pageParams, setPageParams] = useState<SearchParams | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchText, setSearchText] = useState('');
   
   const [categories, setCategories] = useState<string[]>([]);
   const [cities, setCities] = useState<string[]>([]);
   const [selectedCategory, setSelectedCategory] = useState('');
   const [selectedCity, setSelectedCity] = useState('');
+  // Bumped per search so responses of a replaced search are dropped
+  const searchId = useRef(0);
 
   useEffect(() => {
     loadFilters();
@@ -49,20 +62,59 @@ export default function SearchScreen() {
     }
   };
 
+  const searchParams = (): SearchParams => ({
+    search: searchText || undefined,
+    category: selectedCategory || undefined,
+    city: selectedCity || undefined,
+    limit: 50,
+  });
+
   const loadBusinesses = async () => {
+    const id = ++searchId.current;
+    const params = searchParams();
     setLoading(true);
+    setLoadingMore(false);
+    setNextCursor(null);
     try {
-      const response = await ApiService.getBusinesses({
-        search: searchText || undefined,
-        category: selectedCategory || undefined,
-        city: selectedCity || undefined,
-        limit: 50,
-      });
+      const response = await ApiService.getBusinesses(params);
+      if (id !== searchId.current) {
+        return;
+      }
       setBusinesses(response.businesses);
+      setPageParams(params);
+      setNextCursor(response.next_cursor);
     } catch (error) {
       console.error('Error loading businesses:', error);
     } finally {
-      setLoading(false);
+      if (id === searchId.current) {
+        setLoading(false);
+      }
+    }
+  };
+
+  // Infinite scroll: keyset pages cost the same at any depth
+  const loadMoreBusinesses = async () => {
+    if (!nextCursor || !pageParams || loadingMore || loading) {
+      return;
+    }
+    const id = searchId.current;
+    setLoadingMore(true);
+    try {
+      const response = await ApiService.getBusinesses({
+        ...pageParams,
+        cursor: nextCursor,
+      });
+      if (id !== searchId.current) {
+        return;
+      }
+      setBusinesses(current => [...current, ...response.businesses]);
+      setNextCursor(response.next_cursor);
+    } catch (error) {
+      console.error('Error loading more businesses:', error);
+    } finally {
+      if (id === searchId.current) {
+        setLoadingMore(false);
+      }
     }
   };
 
@@ -161,6 +213,13 @@ export default function SearchScreen() {
           renderItem={renderBusinessItem}
           keyExtractor={item => item.id}
           contentContainerStyle={styles.listContent}
+          onEndReached={loadMoreBusinesses}
+          onEndReachedThreshold={0.5}
+          ListFooterComponent={
+            loadingMore ? (
+              <ActivityIndicator size="small" color={colors.primary} />
+            ) : null
+          }
           ListEmptyComponent={
             <View style={styles.emptyContainer}>
               <Text style={styles.emptyText}>🔍</Text>
@@ -21,9 +21,10 @@ export interface Business {
 
 export interface BusinessResponse {
   businesses: Business[];
-  total: number;
+  total: number | null; // only computed for the first page (no cursor)
   limit: number;
   offset: number;
+  next_cursor: string | null; // pass as `cursor` to load the next page
 }
 
 export interface Statistics {
@@ -33,6 +34,13 @@ export interface Statistics {
   unique_cities: number;
 }
 
+// Business counts per value; each facet is counted under the other filters
+export interface FacetCounts {
+  categories: Record<string, number>;
+  cities: Record<string, number>;
+  districts: Record<string, number>;
+}
+
 // API Client
 class ApiService {
   private baseURL: string;
@@ -50,6 +58,7 @@ class ApiService {
     city?: string;
     limit?: number;
     offset?: number;
+    cursor?: string;
   } = {}): Promise<BusinessResponse> {
     try {
       const response = await axios.get<BusinessResponse>(`${this.baseURL}/businesses`, {
@@ -123,6 +132,33 @@ class ApiService {
     }
   }
 
+  /**
+   * Get business counts per category, city and district for the given filters
+   */
+  async getFacets(params: {
+    search?: string;
+    category?: string;
+    city?: string;
+  } = {}): Promise<FacetCounts> {
+    try {
+      const response = await axios.get<FacetCounts>(`${this.baseURL}/facets`, {
+        params,
+        timeout: 5000,
+      });
+      return response.data;
+    } catch (error) {
+      console.error('Error fetching facets:', error);
+      throw error;
+    }
+  }
+
+  /**
+   * URL template of the business vector tiles (MVT), e.g. for MapLibre
+   */
+  getTileUrlTemplate(): string {
+    return `${this.baseURL.replace('/api/v1', '')}/tiles/{z}/{x}/{y}.mvt`;
+  }
+
   /**
    * Health check
    */